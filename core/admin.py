@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import CustomUser, Role, UserRole, Menu, RoleMenu, SearchPattern, GridLayout, TabInterface
+from .models import CustomUser, Role, UserRole, Menu, RoleMenu, SearchPattern, GridLayout, TabInterface, TableRowCount, SlowQuery, SearchShapeStat
+from django.utils.html import format_html
 
 admin.site.register(CustomUser)
 admin.site.register(Role)
@@ -24,3 +25,35 @@ class TabInterfaceAdmin(admin.ModelAdmin):
     list_display = ('username', 'tabs_name', 'is_default', 'created_at', 'updated_at')
     list_filter = ('username', 'is_default')
     search_fields = ('username', 'tabs_name')
+
+@admin.register(TableRowCount)
+class TableRowCountAdmin(admin.ModelAdmin):
+    list_display = ('table_name', 'row_count', 'updated_at')
+    search_fields = ('table_name',)
+
+@admin.register(SearchShapeStat)
+class SearchShapeStatAdmin(admin.ModelAdmin):
+    list_display = ('table_name', 'equality', 'ranges', 'sort', 'hits', 'last_seen')
+    list_filter = ('table_name',)
+    search_fields = ('table_name', 'equality', 'ranges', 'sort')
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'endpoint', 'duration_ms', 'rows', 'username', 'database', 'short_sql')
+    list_filter = ('endpoint', 'database')
+    search_fields = ('sql', 'fingerprint', 'endpoint', 'username')
+    fields = ('created_at', 'endpoint', 'username', 'database', 'duration_ms', 'rows',
+              'fingerprint', 'sql', 'params', 'formatted_plan', 'plan_error')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        # Rows only come from core.slowlog
+        return False
+
+    @admin.display(description='SQL')
+    def short_sql(self, obj):
+        return obj.sql if len(obj.sql) <= 120 else obj.sql[:117] + '...'
+
+    @admin.display(description='Plan')
+    def formatted_plan(self, obj):
+        return format_html('<pre style="white-space: pre-wrap">{}</pre>', obj.plan)
@@ -0,0 +1,171 @@
+"""
+Support for the async grid endpoints (api_search, api_gsearch, api_options, api_fields).
+
+Database work from an async view goes through run_db(), which runs it on a bounded pool of
+GRID_DB_THREADS threads. Django connections are per thread, so two run_db() calls awaited
+together (e.g. a page query and its count) use two connections and really overlap, while
+the event loop keeps serving other requests. The pool size therefore caps the database
+connections one process opens for these endpoints; with CONN_MAX_AGE > 0 each thread
+keeps its connection between requests.
+
+Django 4.2's view decorators only wrap sync views, so the async counterparts the grid
+endpoints need live here too. Serve pythonpoc.asgi:application with an ASGI server
+(uvicorn, daphne, ...) to get the concurrency; under WSGI the async views still work but
+each request occupies a worker thread as before.
+
+Streamed responses from sync views (exports, filter-based mutations) go through
+stream_content(): under ASGI, Django 4.2 reads a sync iterator into a list before sending
+anything, which would hold a whole export in memory.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import HttpResponseNotAllowed
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .routing import read_connection
+
+_executor = None
+
+
+def db_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'GRID_DB_THREADS', 16), thread_name_prefix='grid-db'
+        )
+    return _executor
+
+
+def _in_db_thread(func, *args, **kwargs):
+    # The request_started / request_finished handlers only clean up the request's own
+    # thread, so drop broken or expired connections around each call here
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a sync function that may touch the database on the grid DB pool."""
+    return await sync_to_async(_in_db_thread, thread_sensitive=False, executor=db_executor())(
+        func, *args, **kwargs
+    )
+
+
+def _with_cursor(func, *args, **kwargs):
+    with read_connection().cursor() as cursor:
+        return func(cursor, *args, **kwargs)
+
+
+async def run_query(func, *args, **kwargs):
+    """run_db() for functions that take a cursor (on the request's read connection) as their first argument."""
+    return await run_db(_with_cursor, func, *args, **kwargs)
+
+
+def require_http_methods(methods):
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+require_GET = require_http_methods(['GET'])
+require_POST = require_http_methods(['POST'])
+
+
+def login_required(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # Loading the session user is database work too
+        if not await run_db(lambda: request.user.is_authenticated):
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def csrf_exempt(view):
+    # CsrfViewMiddleware only looks at the attribute; wraps() carries it through outer decorators
+    view.csrf_exempt = True
+    return view
+
+
+def cache_control(**kwargs):
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **view_kwargs):
+            response = await view(request, *args, **view_kwargs)
+            patch_cache_control(response, **kwargs)
+            return response
+        return wrapper
+    return decorator
+
+
+def condition(etag_func):
+    """ETag-only version of django.views.decorators.http.condition; etag_func runs on the DB pool."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag = None
+            if request.method in ('GET', 'HEAD'):
+                etag = await run_db(etag_func, request, *args, **kwargs)
+                etag = quote_etag(etag) if etag else None
+                response = get_conditional_response(request, etag=etag)
+                if response is not None:
+                    return response
+            response = await view(request, *args, **kwargs)
+            if etag and request.method in ('GET', 'HEAD') and not response.has_header('ETag'):
+                response.headers['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
+
+
+_DONE = object()
+
+
+async def _iterate_on_request_thread(iterator):
+    # thread_sensitive keeps every step on the thread the sync view ran on (ASGIHandler wraps
+    # each request in a ThreadSensitiveContext), so the iterator keeps using that thread's
+    # connection and any server-side cursor it opened
+    step = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await step(iterator, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        if hasattr(iterator, 'close'):
+            await sync_to_async(iterator.close, thread_sensitive=True)()
+
+
+def stream_content(request, iterable):
+    """
+    Content for a StreamingHttpResponse built by a sync view: the iterable itself under WSGI,
+    an async iterator advancing it chunk by chunk under ASGI.
+    """
+    if isinstance(request, ASGIRequest):
+        return _iterate_on_request_thread(iter(iterable))
+    return iterable
+
+
+async def gather(*aws):
+    """asyncio.gather that fails with the first error, without leaving the rest unobserved."""
+    results = await asyncio.gather(*aws, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
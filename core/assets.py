@@ -0,0 +1,243 @@
+"""
+Production build of the grid front end (see `manage.py build_assets`).
+
+The grid's ES modules are bundled into a few files under core/dist/: each module becomes a
+function scope whose exports are handed to the modules that import them, so the page
+needs one request instead of a dozen. The rarely used modal and column-dragger modules
+stay standalone and are import()ed on first use (dynamic_grid/lazy.js). Bundles are
+minified when rjsmin / rcssmin are installed and hashed by ManifestStaticFilesStorage
+during collectstatic, so pages rendered with bundles_enabled() need a built STATIC_ROOT.
+Every collected text file also gets .gz (and, with the brotli package, .br) siblings
+that the static_asset view serves by Accept-Encoding.
+
+Bundling only understands the module syntax these files use: named `import { a, b as c }
+from './x.js'` at the start of a line and `export` in front of a declaration.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+BUILD_DIR = 'core/dist'
+
+# Bundle name -> entry files, in the order the page used to load them
+BUNDLES = {
+    'grid.js': [
+        'core/js/dynamic_grid/column-resizer.js',
+        'core/js/dynamic_grid/column-visibility.js',
+        'core/js/dynamic_grid/column-sorter.js',
+        'core/js/dynamic_grid/layout-manager.js',
+        'core/js/dynamic_grid.js',
+    ],
+    'tabs.js': ['core/js/tab-layout-manager.js'],
+    'grid.css': ['core/css/dynamic_grid.css'],
+}
+
+# Loaded with import() on first use; name (as used by lazy.js) -> source
+LAZY_MODULES = {
+    'modal': 'core/js/dynamic_grid/modal.js',
+    'dragger': 'core/js/dynamic_grid/column-dragger.js',
+}
+
+COMPRESSIBLE = ('.js', '.css', '.svg', '.json', '.txt', '.html', '.map')
+
+IMPORT_RE = re.compile(r"^[ \t]*import\s*\{([^}]*)\}\s*from\s*['\"](\.{1,2}/[^'\"]+)['\"][ \t]*;?[ \t]*$", re.M)
+OTHER_IMPORT_RE = re.compile(r"^[ \t]*import[\s{*'\"]", re.M)
+EXPORT_RE = re.compile(r"^export\s+((?:async\s+)?(?:function\*?|class|const|let|var)\s+([A-Za-z_$][\w$]*))", re.M)
+OTHER_EXPORT_RE = re.compile(r"^[ \t]*export\b", re.M)
+# ManifestStaticFilesStorage names: <name>.<12 hex digits>.<ext>
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.[^./]+$")
+
+
+class BundleError(Exception):
+    pass
+
+
+def bundles_enabled():
+    return getattr(settings, 'GRID_STATIC_BUNDLES', not settings.DEBUG)
+
+
+def bundle_path(name):
+    return f"{BUILD_DIR}/{name}"
+
+
+def lazy_module_path(name):
+    """Static path of a lazily loaded module: the minified copy in a build, else the source."""
+    source = LAZY_MODULES[name]
+    return bundle_path(os.path.basename(source)) if bundles_enabled() else source
+
+
+def _read(path):
+    found = finders.find(path)
+    if not found:
+        raise BundleError(f"Static file not found: {path}")
+    with open(found, encoding='utf-8') as f:
+        return f.read()
+
+
+def _resolve(importer, specifier):
+    return os.path.normpath(os.path.join(os.path.dirname(importer), specifier)).replace(os.sep, '/')
+
+
+def _bindings(names):
+    parts = []
+    for item in names.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        original, _, alias = item.partition(' as ')
+        original, alias = original.strip(), alias.strip()
+        parts.append(f"{original}: {alias}" if alias else original)
+    return ', '.join(parts)
+
+
+def bundle_modules(entries):
+    """Concatenate the ES modules reachable from entries into one module script."""
+    order = []
+    state = {}
+    sources = {}
+
+    def visit(path, chain):
+        if state.get(path) == 'done':
+            return
+        if state.get(path) == 'visiting':
+            raise BundleError(f"Import cycle: {' -> '.join(chain + [path])}")
+        state[path] = 'visiting'
+        source = _read(path)
+        sources[path] = source
+        for _, specifier in IMPORT_RE.findall(source):
+            visit(_resolve(path, specifier), chain + [path])
+        state[path] = 'done'
+        order.append(path)
+
+    for entry in entries:
+        visit(entry, [])
+
+    ids = {path: f"__grid_m{index}" for index, path in enumerate(order)}
+    exports = {path: [name for _, name in EXPORT_RE.findall(sources[path])] for path in order}
+    out = []
+    for path in order:
+        source = sources[path]
+        imports = []
+        for names, specifier in IMPORT_RE.findall(source):
+            target = _resolve(path, specifier)
+            for item in names.split(','):
+                name = item.split(' as ')[0].strip()
+                if name and name not in exports[target]:
+                    raise BundleError(f"{path}: {target} does not export {name}")
+            imports.append(f"const {{ {_bindings(names)} }} = {ids[target]};")
+        body = IMPORT_RE.sub('', source)
+        if OTHER_IMPORT_RE.search(body):
+            raise BundleError(f"{path}: only named relative imports can be bundled")
+        exported = exports[path]
+        body = EXPORT_RE.sub(r'\1', body)
+        if OTHER_EXPORT_RE.search(body):
+            raise BundleError(f"{path}: only `export <declaration>` can be bundled")
+        out.append(f"// {path}\nconst {ids[path]} = (() => {{\n" + '\n'.join(imports) + '\n' + body.rstrip()
+                   + f"\nreturn {{ {', '.join(exported)} }};\n}})();\n")
+    return '\n'.join(out)
+
+
+def minify_js(source):
+    try:
+        import rjsmin
+    except ImportError:
+        return source
+    return rjsmin.jsmin(source)
+
+
+def minify_css(source):
+    try:
+        import rcssmin
+    except ImportError:
+        return source
+    return rcssmin.cssmin(source)
+
+
+def build_bundles(output_dir):
+    """Write the bundles and minified lazy modules to output_dir/core/dist. Returns the written paths."""
+    written = []
+    target = Path(output_dir) / BUILD_DIR
+    target.mkdir(parents=True, exist_ok=True)
+    outputs = {}
+    for name, entries in BUNDLES.items():
+        if name.endswith('.css'):
+            outputs[name] = minify_css('\n'.join(_read(entry) for entry in entries))
+        else:
+            outputs[name] = minify_js(bundle_modules(entries))
+    for source in LAZY_MODULES.values():
+        text = _read(source)
+        if IMPORT_RE.search(text) or OTHER_IMPORT_RE.search(text):
+            raise BundleError(f"{source}: lazily loaded modules must not import other modules")
+        outputs[os.path.basename(source)] = minify_js(text)
+    for name, text in outputs.items():
+        path = target / name
+        path.write_text(text, encoding='utf-8')
+        written.append(path)
+    return written
+
+
+def precompress(root):
+    """Write .gz (and .br if the brotli package is installed) next to each compressible file under root."""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    count = 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if not filename.endswith(COMPRESSIBLE):
+                continue
+            path = os.path.join(dirpath, filename)
+            with open(path, 'rb') as f:
+                data = f.read()
+            variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants['.br'] = brotli.compress(data, quality=11)
+            for suffix, compressed in variants.items():
+                # Tiny files can grow when compressed
+                if len(compressed) < len(data):
+                    with open(path + suffix, 'wb') as f:
+                        f.write(compressed)
+                    count += 1
+    return count
+
+
+def accepted_encodings(header):
+    """Encodings from an Accept-Encoding header that are not refused with q=0."""
+    accepted = set()
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def is_hashed(path):
+    """Whether path is a content-hashed name, which never changes content."""
+    return bool(HASHED_NAME_RE.search(path))
+
+
+def content_type(path):
+    guessed, _ = mimetypes.guess_type(path)
+    if path.endswith(('.js', '.mjs')):
+        return 'text/javascript; charset=utf-8'
+    if guessed and guessed.startswith('text/'):
+        return f"{guessed}; charset=utf-8"
+    return guessed or 'application/octet-stream'
+
+
+def lazy_module_urls():
+    return {name: staticfiles_storage.url(lazy_module_path(name)) for name in LAZY_MODULES}
@@ -0,0 +1,137 @@
+"""
+Avatar normalization.
+
+An uploaded avatar is decoded once, square-cropped and written as a small set of fixed-size
+thumbnails (WebP, plus JPEG for older browsers) next to a JPEG master, all under
+avatars/<key>..., where key hashes the upload's bytes together with the processing
+settings. A given name therefore never changes content and can be cached forever
+(see the avatar_file view); identical uploads share one set of files.
+
+CustomUser.avatar holds the master's name. Avatars stored before this pipeline keep their
+original name and are served as-is until `manage.py backfill_avatars` converts them.
+"""
+import hashlib
+import io
+import re
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+AVATAR_DIR = 'avatars'
+# Bump when the processing below changes, so new files get new names
+PIPELINE_VERSION = 1
+
+NORMALIZED_NAME = re.compile(rf'^{AVATAR_DIR}/(?P<key>[0-9a-f]{{20}})\.jpg$')
+
+
+def avatar_sizes():
+    return tuple(sorted(getattr(settings, 'GRID_AVATAR_SIZES', (32, 64, 80, 160))))
+
+
+def avatar_quality():
+    return getattr(settings, 'GRID_AVATAR_QUALITY', 82)
+
+
+def master_size():
+    return getattr(settings, 'GRID_AVATAR_MASTER_SIZE', 512)
+
+
+def avatar_key(data):
+    params = f"{PIPELINE_VERSION}:{avatar_sizes()}:{avatar_quality()}:{master_size()}"
+    return hashlib.sha256(params.encode('ascii') + data).hexdigest()[:20]
+
+
+def thumbnail_name(key, size, fmt):
+    return f"{AVATAR_DIR}/{key}-{size}.{fmt}"
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'webp':
+        image.save(buffer, 'WEBP', quality=avatar_quality(), method=4)
+    else:
+        image.save(buffer, 'JPEG', quality=avatar_quality(), optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _write(name, data):
+    if not default_storage.exists(name):
+        saved = default_storage.save(name, ContentFile(data))
+        if saved != name:
+            # Another request wrote the same content first
+            default_storage.delete(saved)
+
+
+def _square(image):
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # Flatten transparency onto white; JPEG has no alpha channel
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    else:
+        image = image.convert('RGB')
+    side = min(image.size)
+    return ImageOps.fit(image, (side, side), Image.LANCZOS)
+
+
+def store_avatar(file, force=False):
+    """
+    Normalize an uploaded (or stored) image file and return the master's storage name.
+    Files that already exist under the content key are reused unless force is set.
+    """
+    file.seek(0)
+    data = file.read()
+    key = avatar_key(data)
+    name = f"{AVATAR_DIR}/{key}.jpg"
+    if default_storage.exists(name) and not force:
+        return name
+    with Image.open(io.BytesIO(data)) as source:
+        source.draft('RGB', (master_size(), master_size()))   # cheap JPEG downscale while decoding
+        image = _square(source)
+    image.thumbnail((master_size(), master_size()), Image.LANCZOS)
+    # Largest first, each size reduced from the previous one
+    current = image
+    for size in reversed(avatar_sizes()):
+        current = current.resize((size, size), Image.LANCZOS) if current.width > size else current
+        for fmt in ('webp', 'jpg'):
+            if force and default_storage.exists(thumbnail_name(key, size, fmt)):
+                default_storage.delete(thumbnail_name(key, size, fmt))
+            _write(thumbnail_name(key, size, fmt), _encode(current, fmt))
+    if force and default_storage.exists(name):
+        default_storage.delete(name)
+    _write(name, _encode(image, 'jpg'))
+    return name
+
+
+def normalized_key(name):
+    match = NORMALIZED_NAME.match(name or '')
+    return match.group('key') if match else None
+
+
+def avatar_sources(user, size):
+    """
+    (webp_srcset, jpeg_url) for showing a user's avatar at size CSS pixels, using the
+    smallest thumbnail that covers 1x and 2x displays; (None, original_url) for avatars
+    that are not normalized yet, and None without an avatar.
+    """
+    name = user.avatar.name if user.avatar else ''
+    if not name:
+        return None
+    key = normalized_key(name)
+    if key is None:
+        return None, user.avatar.url
+    sizes = avatar_sizes()
+
+    def pick(px):
+        return next((s for s in sizes if s >= px), sizes[-1])
+
+    one, two = pick(size), pick(size * 2)
+    url = default_storage.url
+    srcset = f"{url(thumbnail_name(key, one, 'webp'))} 1x"
+    if two != one:
+        srcset += f", {url(thumbnail_name(key, two, 'webp'))} 2x"
+    return srcset, url(thumbnail_name(key, one, 'jpg'))
@@ -0,0 +1,49 @@
+"""
+Django's MySQL backend with a per-process connection pool (ENGINE 'core.backends.mysql_pool').
+
+Opening a connection checks one out of the alias's ConnectionPool and closing it (at the
+end of every request with CONN_MAX_AGE = 0) hands it back, so requests reuse live
+sessions instead of paying for a TCP handshake and authentication each time. A connection
+that is closed inside an atomic block is discarded rather than pooled.
+
+Pool settings come from the database's 'POOL' dict (see pool.DEFAULTS); pool.pool_stats()
+reports every pool of this process.
+"""
+from django.db.backends.mysql import base
+
+from .pool import PoolTimeout, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get('POOL'))
+
+    def get_new_connection(self, conn_params):
+        try:
+            return self.pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        except PoolTimeout as e:
+            raise self.Database.OperationalError(str(e)) from e
+
+    def init_connection_state(self):
+        # Session settings survive on a pooled connection
+        if getattr(self.connection, '_grid_pool_initialized', False):
+            return
+        super().init_connection_state()
+        self.connection._grid_pool_initialized = True
+
+    def _set_autocommit(self, autocommit):
+        # get_autocommit() reads the client-side status flags, so a reused connection
+        # already in the right mode costs no round trip
+        with self.wrap_database_errors:
+            if self.connection.get_autocommit() != autocommit:
+                self.connection.autocommit(autocommit)
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if self.in_atomic_block:
+            # Django keeps using this wrapper's connection until the block unwinds
+            self.pool.discard(self.connection)
+        else:
+            self.pool.release(self.connection)
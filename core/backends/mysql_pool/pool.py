@@ -0,0 +1,219 @@
+"""
+A bounded, thread-safe pool of raw DB-API connections for one database alias in one process.
+
+Connections are handed out most recently used first, so the ones that sit idle longest sink
+to the bottom and are closed once idle for IDLE_TIMEOUT; any connection older than
+MAX_LIFETIME is closed instead of being reused. With PRE_PING a connection is pinged when it
+is checked out and replaced if the server dropped it. When all MAX_SIZE connections are in
+use, acquire() waits up to TIMEOUT seconds for one to come back.
+"""
+import os
+from collections import deque
+import threading
+import time
+
+DEFAULTS = {
+    'MAX_SIZE': 20,
+    'TIMEOUT': 10,
+    'MAX_LIFETIME': 1800,
+    'IDLE_TIMEOUT': 300,
+    'PRE_PING': True,
+}
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, options=None):
+        options = {**DEFAULTS, **(options or {})}
+        self.max_size = options['MAX_SIZE']
+        self.timeout = options['TIMEOUT']
+        self.max_lifetime = options['MAX_LIFETIME']
+        self.idle_timeout = options['IDLE_TIMEOUT']
+        self.pre_ping = options['PRE_PING']
+        self._cond = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self._idle = []     # (raw, created, last_used), most recently used last
+        self._size = 0      # open connections, idle or in use
+        self._waiters = deque()
+        self.created = 0
+        self.closed = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.ping_failures = 0
+
+    # Hooks for the DB-API flavour in use
+    def ping(self, raw):
+        raw.ping()
+
+    def reset(self, raw):
+        # Ends any transaction a view left open
+        raw.rollback()
+
+    def _close(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _expired(self, created, last_used, now):
+        return (self.max_lifetime is not None and now - created >= self.max_lifetime) or (
+            self.idle_timeout is not None and now - last_used >= self.idle_timeout
+        )
+
+    def _prune(self, now):
+        # Idle timeouts hit the least recently used connections at the bottom of the stack first
+        keep = []
+        for raw, created, last_used in self._idle:
+            if self._expired(created, last_used, now):
+                self._size -= 1
+                self.closed += 1
+                self._close(raw)
+            else:
+                keep.append((raw, created, last_used))
+        self._idle = keep
+
+    def acquire(self, connect):
+        """Check out a connection, opening one with connect() if the pool has room."""
+        started = None
+        turn = None
+        while True:
+            with self._cond:
+                if os.getpid() != self.pid:
+                    # Forked: the inherited sockets belong to the parent
+                    self._reset()
+                self._prune(time.monotonic())
+                available = self._idle or self._size < self.max_size
+                # Waiters are served in arrival order; newcomers queue behind them
+                if available and (not self._waiters or self._waiters[0] is turn):
+                    if turn is not None:
+                        self._waiters.popleft()
+                        self.wait_time += time.monotonic() - started
+                        turn = started = None
+                        # The next waiter may be able to go too
+                        self._cond.notify_all()
+                    if self._idle:
+                        raw, created, _ = self._idle.pop()
+                        reused = True
+                    else:
+                        self._size += 1
+                        raw, created, reused = None, None, False
+                else:
+                    if turn is None:
+                        turn = object()
+                        self._waiters.append(turn)
+                        started = time.monotonic()
+                        self.waits += 1
+                    remaining = self.timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        self._waiters.remove(turn)
+                        self.timeouts += 1
+                        self.wait_time += time.monotonic() - started
+                        self._cond.notify_all()
+                        raise PoolTimeout(f"No database connection free within {self.timeout}s (pool size {self.max_size})")
+                    self._cond.wait(remaining)
+                    continue
+            if reused:
+                if self.pre_ping:
+                    try:
+                        self.ping(raw)
+                    except Exception:
+                        with self._cond:
+                            self.ping_failures += 1
+                        self.discard(raw)
+                        continue
+            else:
+                try:
+                    raw = connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify_all()
+                    raise
+                created = time.monotonic()
+                with self._cond:
+                    self.created += 1
+            raw._grid_pool_created = created
+            with self._cond:
+                self.checkouts += 1
+            return raw
+
+    def release(self, raw):
+        """Return a checked-out connection, or close it if it is broken or past MAX_LIFETIME."""
+        created = getattr(raw, '_grid_pool_created', 0.0)
+        now = time.monotonic()
+        if self.max_lifetime is not None and now - created >= self.max_lifetime:
+            self.discard(raw)
+            return
+        try:
+            self.reset(raw)
+        except Exception:
+            self.discard(raw)
+            return
+        with self._cond:
+            if os.getpid() != self.pid:
+                return
+            self._idle.append((raw, created, now))
+            self._cond.notify_all()
+
+    def discard(self, raw):
+        """Close a checked-out connection instead of returning it."""
+        self._close(raw)
+        with self._cond:
+            if os.getpid() != self.pid:
+                return
+            self._size -= 1
+            self.closed += 1
+            self._cond.notify_all()
+
+    def close_idle(self):
+        with self._cond:
+            for raw, _, _ in self._idle:
+                self._close(raw)
+            self._size -= len(self._idle)
+            self.closed += len(self._idle)
+            self._idle = []
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                'waiting': len(self._waiters),
+                'created': self.created,
+                'closed': self.closed,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_time': round(self.wait_time, 6),
+                'timeouts': self.timeouts,
+                'ping_failures': self.ping_failures,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options=None):
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                pool = _pools[alias] = ConnectionPool(options)
+    return pool
+
+
+def pool_stats():
+    """{alias: stats} for the pools opened in this process."""
+    return {alias: pool.stats() for alias, pool in list(_pools.items())}
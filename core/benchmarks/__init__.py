@@ -0,0 +1,10 @@
+"""
+Endpoint benchmarks for the grid, run through the Django test client.
+
+    python manage.py bench_data --rows 1M                   # bench_people with 1,000,000 rows
+    python manage.py bench --output before.json             # p50/p95/p99, queries, peak RSS
+    python manage.py bench_compare before.json after.json
+
+Add --settings=pythonpoc.settings_bench to run against SQLite (bench.sqlite3; run migrate
+first) instead of the MySQL database in settings.
+"""
@@ -0,0 +1,204 @@
+"""
+Synthetic grid tables for the benchmarks: a user table with a job foreign key, plus its
+forms / search_config rows and the job lookup table.
+
+The data is seeded, so two runs with the same size and seed produce the same rows. Values
+follow skewed, realistic distributions:
+- job and city are Zipf-like, so a few values are very common
+- age is roughly normal and salary log-normal
+- some columns contain NULLs
+"""
+import random
+from datetime import date
+from functools import lru_cache
+from itertools import accumulate
+
+from django.db import connection, transaction
+
+from core.counts import recount
+from core.jobs import invalidate_job_cache
+from core.options import invalidate_options
+from core.registry import bump_config_version
+from core.suggest import note_changes
+
+TABLE_PREFIX = 'bench_'
+SIZE_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+FIRST_NAMES = (
+    'James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Wei', 'Fatima', 'Olga', 'Carlos', 'Aisha', 'Hiroshi', 'Priya', 'Mateo', 'Ingrid', 'Kwame',
+)
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Wang', 'Kim', 'Nguyen', 'Ivanova', 'Okafor', 'Tanaka', 'Patel', 'Silva', 'Larsen', 'Mensah',
+)
+JOB_TITLES = (
+    'Engineer', 'Analyst', 'Manager', 'Designer', 'Accountant', 'Consultant', 'Technician', 'Nurse',
+    'Teacher', 'Sales Representative', 'Support Agent', 'Recruiter', 'Architect', 'Scientist', 'Administrator',
+    'Developer', 'Editor', 'Planner', 'Coordinator', 'Specialist',
+)
+JOB_LEVELS = ('Junior', '', 'Senior', 'Lead', 'Principal', 'Chief', 'Associate', 'Assistant', 'Head', 'Trainee')
+CITIES = (
+    'London', 'New York', 'Tokyo', 'Paris', 'Berlin', 'Madrid', 'Toronto', 'Sydney', 'Singapore', 'Dubai',
+    'Chicago', 'Mumbai', 'Seoul', 'Amsterdam', 'Stockholm', 'Lagos', 'Nairobi', 'Lima', 'Oslo', 'Vienna',
+    'Austin', 'Denver', 'Lisbon', 'Prague', 'Warsaw', 'Dublin', 'Zurich', 'Osaka', 'Manila', 'Cairo',
+    'Bogota', 'Santiago', 'Helsinki', 'Athens', 'Budapest', 'Krakow', 'Porto', 'Seville', 'Lyon', 'Hamburg',
+)
+EMAIL_DOMAINS = (('example.com', 50), ('mail.test', 25), ('corp.example', 15), ('inbox.test', 10))
+STATUSES = (('active', 80), ('inactive', 15), ('suspended', 5))
+
+# (label, field_name, field_type, operator_tags, lookup_sql, mandatory)
+SEARCH_CONFIG = (
+    ('Name', 'fullname', 'text', 'equal,contains,GSearch,not_contains,not_equal', None, 1),
+    ('Email', 'email', 'text', 'equal,contains,not_contains', None, 0),
+    ('Job', 'job', 'dropdown', 'equal,IN,contains', 'SELECT id, name FROM job ORDER BY name', 0),
+    ('City', 'city', 'text', 'equal,not_equal,IN,contains,GSearch', None, 0),
+    ('Age', 'age', 'number', 'equal,greater,less', None, 0),
+    ('Salary', 'salary', 'number', 'greater,less', None, 0),
+    ('Birthday', 'birthday', 'date', 'equal,greater,less', None, 0),
+    ('Status', 'status', 'text', 'equal,not_equal,IN', None, 0),
+)
+COLUMNS = tuple(field for _, field, _, _, _, _ in SEARCH_CONFIG)
+
+
+def parse_size(value):
+    """Row counts like 10000, 10k, 1M or 10m."""
+    text = str(value).strip().lower().replace('_', '')
+    multiplier = SIZE_SUFFIXES.get(text[-1:], 1)
+    if multiplier > 1:
+        text = text[:-1]
+    return int(float(text) * multiplier)
+
+
+def job_names():
+    return [f"{level} {title}".strip() for title in JOB_TITLES for level in JOB_LEVELS]
+
+
+@lru_cache(maxsize=None)
+def zipf_cum_weights(count, exponent=1.1):
+    """Cumulative weights for random.choices: rank r is drawn with weight 1 / r ** exponent."""
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def _pick(rng, weighted):
+    # weighted: ((value, weight), ...); small enough that building the lists each time is cheap
+    return rng.choices([v for v, _ in weighted], [w for _, w in weighted])[0]
+
+
+def _pk_sql():
+    if connection.vendor == 'mysql':
+        return 'id INT AUTO_INCREMENT PRIMARY KEY'
+    return 'id INTEGER PRIMARY KEY AUTOINCREMENT'
+
+
+def _table_options():
+    return ' ENGINE=InnoDB DEFAULT CHARSET=utf8mb4' if connection.vendor == 'mysql' else ''
+
+
+def ensure_config_tables(cursor):
+    """Create forms, search_config and job when the database does not have them yet."""
+    existing = set(connection.introspection.table_names(cursor))
+    if 'forms' not in existing:
+        cursor.execute(
+            f"CREATE TABLE forms ({_pk_sql()}, tableview VARCHAR(100), fields TEXT, table_name VARCHAR(100))"
+            f"{_table_options()}"
+        )
+    if 'search_config' not in existing:
+        cursor.execute(
+            f"CREATE TABLE search_config ({_pk_sql()}, table_name VARCHAR(100), field_label VARCHAR(100), "
+            f"field_name VARCHAR(100), field_type VARCHAR(20), operator_tags VARCHAR(255), lookup_sql TEXT, "
+            f"mandatory SMALLINT NOT NULL DEFAULT 0){_table_options()}"
+        )
+    if 'job' not in existing:
+        cursor.execute(f"CREATE TABLE job ({_pk_sql()}, name VARCHAR(100) UNIQUE){_table_options()}")
+
+
+def ensure_jobs(cursor):
+    """Job ids in popularity order, adding any missing job names."""
+    names = job_names()
+    cursor.execute("SELECT id, name FROM job")
+    ids = {name: job_id for job_id, name in cursor.fetchall()}
+    missing = [name for name in names if name not in ids]
+    if missing:
+        cursor.executemany("INSERT INTO job (name) VALUES (%s)", [[name] for name in missing])
+        cursor.execute(f"SELECT id, name FROM job WHERE name IN ({','.join(['%s'] * len(names))})", names)
+        ids.update({name: job_id for job_id, name in cursor.fetchall()})
+    return [ids[name] for name in names]
+
+
+def create_table(cursor, table_name):
+    cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+    cursor.execute(
+        f"CREATE TABLE {table_name} ({_pk_sql()}, fullname VARCHAR(100) NOT NULL, email VARCHAR(150), "
+        f"job INT NULL, city VARCHAR(60), age INT NULL, salary DECIMAL(12, 2), birthday DATE NULL, "
+        f"status VARCHAR(20) NOT NULL, FOREIGN KEY (job) REFERENCES job (id)){_table_options()}"
+    )
+
+
+def register_table(cursor, table_name):
+    """forms and search_config rows that expose the table as a grid."""
+    cursor.execute("DELETE FROM search_config WHERE table_name = %s", [table_name])
+    cursor.executemany(
+        "INSERT INTO search_config (table_name, field_label, field_name, field_type, operator_tags, lookup_sql, "
+        "mandatory) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+        [[table_name, *row] for row in SEARCH_CONFIG]
+    )
+    # The grid reads forms positionally: [2] field list, [3] table name
+    columns = [col.name for col in connection.introspection.get_table_description(cursor, 'forms')]
+    cursor.execute("DELETE FROM forms WHERE tableview = %s", [table_name])
+    cursor.execute(
+        f"INSERT INTO forms (tableview, {columns[2]}, {columns[3]}) VALUES (%s, %s, %s)",
+        [table_name, ','.join(('id',) + COLUMNS), table_name]
+    )
+
+
+def row_values(rng, job_ids, today):
+    """One generated row, in COLUMNS order."""
+    first = rng.choice(FIRST_NAMES)
+    last = rng.choice(LAST_NAMES)
+    domain = _pick(rng, EMAIL_DOMAINS)
+    age = None if rng.random() < 0.03 else min(max(int(rng.gauss(40, 12)), 18), 75)
+    birth_year = today.year - (age if age is not None else rng.randint(18, 75))
+    return (
+        f"{first} {last}",
+        None if rng.random() < 0.05 else f"{first}.{last}{rng.randint(1, 9999)}@{domain}".lower(),
+        None if rng.random() < 0.02 else rng.choices(job_ids, cum_weights=zipf_cum_weights(len(job_ids)))[0],
+        rng.choices(CITIES, cum_weights=zipf_cum_weights(len(CITIES)))[0],
+        age,
+        round(rng.lognormvariate(10.8, 0.4), 2),
+        None if rng.random() < 0.01 else date(birth_year, rng.randint(1, 12), rng.randint(1, 28)),
+        _pick(rng, STATUSES),
+    )
+
+
+def generate(table_name, rows, seed=1, batch_size=5000, progress=None):
+    """(Re)create a bench table with `rows` generated rows and register it as a grid."""
+    if not table_name.startswith(TABLE_PREFIX):
+        # Never drop a real grid table
+        raise ValueError(f"Benchmark tables must be named {TABLE_PREFIX}*, got {table_name!r}")
+    rng = random.Random(seed)
+    today = date.today()
+    cursor = connection.cursor()
+    ensure_config_tables(cursor)
+    job_ids = ensure_jobs(cursor)
+    create_table(cursor, table_name)
+    register_table(cursor, table_name)
+    insert_sql = (f"INSERT INTO {table_name} ({','.join(COLUMNS)}) "
+                  f"VALUES ({','.join(['%s'] * len(COLUMNS))})")
+    done = 0
+    while done < rows:
+        batch = [row_values(rng, job_ids, today) for _ in range(min(batch_size, rows - done))]
+        with transaction.atomic():
+            cursor.executemany(insert_sql, batch)
+        done += len(batch)
+        if progress:
+            progress(done)
+    # Counters, compiled schemas and cached lookups all describe the old table
+    recount(table_name)
+    bump_config_version()
+    invalidate_job_cache()
+    invalidate_options()
+    note_changes(table_name, rebuild=True)
+    return done
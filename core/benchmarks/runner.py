@@ -0,0 +1,159 @@
+"""
+Runs benchmark scenarios through the Django test client and compares result files.
+
+Each request is timed end to end: middleware, view and the full (streamed) body. Query
+counts come from core.metrics' per-process counters, which also see the queries async
+views run on the grid DB threads. Peak RSS is the process high-water mark after each
+scenario, so a scenario that grows memory shows up from that point on.
+"""
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from core.counts import table_row_count
+from core.metrics import process_total
+
+from .scenarios import BenchContext
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)]
+
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _send(client, method, path, body):
+    if body is None:
+        response = getattr(client, method)(path)
+    else:
+        response = getattr(client, method)(path, json.dumps(body), content_type='application/json')
+    # Streamed bodies are produced (and their queries run) while they are read
+    if response.streaming:
+        b''.join(response.streaming_content)
+    else:
+        response.content
+    return response
+
+
+def run_scenario(client, ctx, scenario, iterations, warmup):
+    if scenario.setup:
+        scenario.setup(ctx, iterations + warmup)
+    latencies, queries, statuses = [], [], {}
+    try:
+        for i in range(warmup + iterations):
+            method, path, body = scenario.build(ctx)
+            queries_before = process_total('grid_db_queries_total')
+            started = time.perf_counter()
+            response = _send(client, method, path, body)
+            elapsed = time.perf_counter() - started
+            if i < warmup:
+                continue
+            latencies.append(elapsed * 1000)
+            queries.append(process_total('grid_db_queries_total') - queries_before)
+            status = str(response.status_code)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        if scenario.teardown:
+            scenario.teardown(ctx)
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': sum(count for status, count in statuses.items() if int(status) >= 400),
+        'status': statuses,
+        'latency_ms': {
+            **{f"p{pct}": round(percentile(latencies, pct), 3) for pct in PERCENTILES},
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'min': round(latencies[0], 3),
+            'max': round(latencies[-1], 3),
+        },
+        'queries': {'mean': round(sum(queries) / len(queries), 2), 'max': max(queries)},
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def run(table_name, scenarios, iterations=50, warmup=5, seed=1, username='bench', progress=None):
+    """Run scenarios against a datagen table; returns the JSON-ready report."""
+    user = get_user_model().objects.filter(username=username).first()
+    if user is None:
+        user = get_user_model().objects.create_user(username, f"{username}@example.com")
+    client = Client()
+    client.force_login(user)
+    ctx = BenchContext(table_name, seed)
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'table': table_name,
+            'rows': table_row_count(table_name),
+            'vendor': connection.vendor,
+            'iterations': iterations,
+            'warmup': warmup,
+            'seed': seed,
+            'debug': settings.DEBUG,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'scenarios': {},
+    }
+    # The test client's requests come from 'testserver'
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        for scenario in scenarios:
+            result = run_scenario(client, ctx, scenario, iterations, warmup)
+            report['scenarios'][scenario.name] = result
+            if progress:
+                progress(scenario.name, result)
+    return report
+
+
+def compare(baseline, current, threshold=10.0, min_ms=0.5):
+    """
+    [(scenario, metric, old, new, regressed)] for the scenarios both reports ran.
+    A latency regressed when it grew by more than threshold percent and min_ms; a query
+    count when it grew at all.
+    """
+    rows = []
+    for name, new in current['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if not old or 'skipped' in old or 'skipped' in new:
+            continue
+        for pct in PERCENTILES:
+            key = f"p{pct}"
+            before, after = old['latency_ms'][key], new['latency_ms'][key]
+            regressed = after - before > min_ms and after > before * (1 + threshold / 100)
+            rows.append((name, key, before, after, regressed))
+        before, after = old['queries']['mean'], new['queries']['mean']
+        rows.append((name, 'queries', before, after, after > before))
+    return rows
@@ -0,0 +1,127 @@
+"""
+The benchmarked requests, built against a table made by datagen.
+
+Each scenario turns a BenchContext into one request (method, path, JSON body). Values are
+drawn with the context's seeded RNG from the generator's distributions. This keeps runs
+comparable and stops them from all hitting the same cached rows.
+"""
+import random
+from dataclasses import dataclass
+from datetime import date
+
+from django.db import connection
+
+from core.counts import adjust_row_count
+from core.query import OPERATOR_MAP
+
+from .datagen import CITIES, COLUMNS, FIRST_NAMES, LAST_NAMES, job_names, row_values
+
+PAGE_SIZE = 50
+CREATED_NAME = 'Bench Created'
+DELETE_NAME = 'Bench Delete'
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    build: object           # BenchContext -> (method, path, body or None)
+    setup: object = None    # (BenchContext, request count) -> None, before the timed requests
+    teardown: object = None  # BenchContext -> None
+
+
+class BenchContext:
+    def __init__(self, table_name, seed=1):
+        self.table_name = table_name
+        self.rng = random.Random(seed)
+        self.jobs = job_names()
+        self.delete_ids = []
+        self.today = date.today()
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT MIN(id), MAX(id) FROM {table_name}")
+        self.min_id, self.max_id = cursor.fetchone()
+
+    def record_id(self):
+        return self.rng.randint(self.min_id, self.max_id)
+
+    def job(self):
+        # Mostly popular jobs, like the generated data
+        return self.jobs[min(int(self.rng.expovariate(0.1)), len(self.jobs) - 1)]
+
+    def search(self, filters=None, sort=None):
+        body = {'page_size': PAGE_SIZE, **(filters or {})}
+        if sort:
+            body['sort'] = sort
+        return 'post', f"/api/search/{self.table_name}/", body
+
+    def new_row(self, fullname):
+        values = dict(zip(COLUMNS, row_values(self.rng, [None], self.today)))
+        values.update(fullname=fullname, job=self.job())
+        values['birthday'] = values['birthday'].isoformat() if values['birthday'] else ''
+        return values
+
+
+# One api_search filter per query.OPERATOR_MAP operator; a new operator needs an entry here
+OPERATOR_FILTERS = {
+    'equal': lambda ctx: {'city': {'operator': 'equal', 'value': ctx.rng.choice(CITIES[:10])}},
+    'contains': lambda ctx: {'fullname': {'operator': 'contains', 'value': ctx.rng.choice(LAST_NAMES)}},
+    'greater': lambda ctx: {'age': {'operator': 'greater', 'value': ctx.rng.randint(30, 65)}},
+    'less': lambda ctx: {'salary': {'operator': 'less', 'value': ctx.rng.randint(20000, 60000)}},
+    'GSearch': lambda ctx: {'city': {'operator': 'GSearch', 'value': ctx.rng.choice(CITIES)[:3]}},
+    'not_equal': lambda ctx: {'status': {'operator': 'not_equal', 'value': 'active'}},
+    'not_contains': lambda ctx: {'email': {'operator': 'not_contains', 'value': 'example'}},
+    'IN': lambda ctx: {'job': {'operator': 'IN', 'value': ctx.rng.sample(ctx.jobs[:40], 3)}},
+}
+
+
+def _search_scenario(operator):
+    make_filter = OPERATOR_FILTERS[operator]
+    return Scenario(f"api_search[{operator}]", lambda ctx: ctx.search(make_filter(ctx)))
+
+
+def _update(ctx):
+    body = {'age': ctx.rng.randint(18, 75), 'city': ctx.rng.choice(CITIES), 'job': ctx.job()}
+    return 'post', f"/api/update/{ctx.table_name}/{ctx.record_id()}/", body
+
+
+def _delete(ctx):
+    return 'post', f"/api/delete/{ctx.table_name}/", {'ids': [ctx.delete_ids.pop()]}
+
+
+def _insert_for_delete(ctx, count):
+    # Rows of our own to delete, so the generated data is left as it was
+    cursor = connection.cursor()
+    rows = [(DELETE_NAME,) + row_values(ctx.rng, [None], ctx.today)[1:] for _ in range(count)]
+    cursor.executemany(
+        f"INSERT INTO {ctx.table_name} ({','.join(COLUMNS)}) VALUES ({','.join(['%s'] * len(COLUMNS))})", rows
+    )
+    adjust_row_count(ctx.table_name, count)
+    cursor.execute(f"SELECT id FROM {ctx.table_name} WHERE fullname = %s ORDER BY id", [DELETE_NAME])
+    ctx.delete_ids = [row[0] for row in cursor.fetchall()]
+
+
+def _remove_created(ctx):
+    cursor = connection.cursor()
+    cursor.execute(f"DELETE FROM {ctx.table_name} WHERE fullname = %s", [CREATED_NAME])
+    adjust_row_count(ctx.table_name, -cursor.rowcount)
+
+
+def scenarios():
+    """Every scenario, in run order (create before the other writes, delete last)."""
+    return [
+        Scenario('dynamic_grid', lambda ctx: ('get', f"/dynamic-grid/{ctx.table_name}/", None)),
+        Scenario('api_search', lambda ctx: ctx.search()),
+        Scenario('api_search[sorted]', lambda ctx: ctx.search(sort=[{'field': 'salary', 'direction': 'desc'}])),
+        *[_search_scenario(operator) for operator in OPERATOR_MAP],
+        Scenario('api_gsearch', lambda ctx: (
+            'get', f"/api/gsearch/{ctx.table_name}/fullname/?q={ctx.rng.choice(FIRST_NAMES)[:3]}", None
+        )),
+        Scenario('api_options', lambda ctx: ('get', f"/api/options/{ctx.table_name}/job/", None)),
+        Scenario('api_options[page]', lambda ctx: (
+            'get', f"/api/options/{ctx.table_name}/job/?q={ctx.rng.choice(ctx.jobs)[:4]}&page=1", None
+        )),
+        Scenario('api_record', lambda ctx: ('get', f"/api/record/{ctx.table_name}/{ctx.record_id()}/", None)),
+        Scenario('api_create', lambda ctx: ('post', f"/api/create/{ctx.table_name}/", ctx.new_row(CREATED_NAME)),
+                 teardown=_remove_created),
+        Scenario('api_update', _update),
+        Scenario('api_delete', _delete, setup=_insert_for_delete),
+    ]
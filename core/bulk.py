@@ -0,0 +1,114 @@
+"""
+Helpers for the bulk create / bulk update grid endpoints.
+
+Records are validated up front against the table's search_config fields; job names are
+resolved to ids in batches (core.jobs.resolve_jobs); rows are then written with executemany() in chunks of
+GRID_BULK_CHUNK_SIZE, all inside the caller's transaction.
+"""
+import datetime
+
+from django.conf import settings
+
+
+def chunk_size():
+    return max(int(getattr(settings, 'GRID_BULK_CHUNK_SIZE', 500)), 1)
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def check_value(field, value):
+    """Error message for a value that cannot be stored in field, or None."""
+    if value is None:
+        return f"{field.label} is required." if field.mandatory else None
+    if field.type == 'number':
+        try:
+            float(value)
+        except (TypeError, ValueError):
+            return f"{field.label} must be a number."
+    elif field.type == 'date':
+        try:
+            datetime.date.fromisoformat(str(value))
+        except ValueError:
+            return f"{field.label} must be a date (YYYY-MM-DD)."
+    return None
+
+
+def validate_records(schema, records, for_update=False):
+    """
+    Normalize a list of records for writing. Returns (rows, results) where rows holds one
+    {field: value} dict per record ('' stored as NULL, plus 'id' for updates) and results
+    holds one {'index', 'success'[, 'error']} entry per record.
+    """
+    rows = []
+    results = []
+    for index, record in enumerate(records):
+        row = {}
+        error = None
+        if not isinstance(record, dict):
+            error = 'Record must be an object.'
+        else:
+            for name in record:
+                if name not in schema.by_name and name != 'id':
+                    error = f"Unknown field: {name}"
+                    break
+            if error is None and for_update:
+                record_id = record.get('id')
+                if isinstance(record_id, bool) or not isinstance(record_id, int):
+                    error = 'Record id is required.'
+                else:
+                    row['id'] = record_id
+            if error is None:
+                for field in schema.fields:
+                    if field.name == 'id' or (for_update and field.name not in record):
+                        continue
+                    value = record.get(field.name)
+                    if isinstance(value, str):
+                        value = value.strip() if field.name == 'job' else value
+                        if value == '':
+                            value = None
+                    error = check_value(field, value)
+                    if error:
+                        break
+                    row[field.name] = value
+            if error is None and for_update and len(row) == 1:
+                error = 'No fields to update.'
+        rows.append(row)
+        results.append({'index': index, 'success': error is None, **({'error': error} if error else {})})
+    return rows, results
+
+
+def apply_job_ids(rows, mapping):
+    for row in rows:
+        if isinstance(row.get('job'), str):
+            row['job'] = mapping[row['job']]
+
+
+def insert_rows(cursor, table_name, field_names, rows):
+    """INSERT every row (missing fields as NULL) with one executemany per chunk."""
+    placeholders = ','.join(['%s'] * len(field_names))
+    sql = f"INSERT INTO {table_name} ({','.join(field_names)}) VALUES ({placeholders})"
+    for batch in chunked(rows, chunk_size()):
+        cursor.executemany(sql, [[row.get(name) for name in field_names] for row in batch])
+
+
+def existing_ids(cursor, table_name, ids):
+    found = set()
+    for batch in chunked(sorted(set(ids)), chunk_size()):
+        cursor.execute(f"SELECT id FROM {table_name} WHERE id IN ({','.join(['%s'] * len(batch))})", batch)
+        found.update(row[0] for row in cursor.fetchall())
+    return found
+
+
+def update_rows(cursor, table_name, rows):
+    """UPDATE rows by id, one executemany per chunk of rows that set the same fields."""
+    groups = {}
+    for row in rows:
+        fields = tuple(name for name in row if name != 'id')
+        groups.setdefault(fields, []).append(row)
+    for fields, group in groups.items():
+        sql = f"UPDATE {table_name} SET {', '.join(f'{name} = %s' for name in fields)} WHERE id = %s"
+        for batch in chunked(group, chunk_size()):
+            cursor.executemany(sql, [[row[name] for name in fields] + [row['id']] for row in batch])
@@ -0,0 +1,144 @@
+"""
+Response compression for the grid API.
+
+CompressionMiddleware compresses responses under GRID_COMPRESSION_PATHS with the best
+encoding both sides support: zstd (zstandard package), br (brotli package) or gzip.
+Regular responses smaller than GRID_COMPRESSION_MIN_SIZE are left alone. Streaming
+responses (exports, bulk-mutation progress) are compressed chunk by chunk and each
+chunk is flushed, so the client still sees every chunk as it is produced.
+
+Only JSON / CSV API paths are listed by default. HTML pages carry CSRF tokens, and
+compressing secrets next to attacker-influenced text is what BREACH exploits.
+"""
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .assets import accepted_encodings
+
+# Server preference, best ratio first
+ENCODINGS = ('zstd', 'br', 'gzip')
+DEFAULT_LEVELS = {'zstd': 10, 'br': 6, 'gzip': 6}
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def available_encodings():
+    found = []
+    if _zstandard() is not None:
+        found.append('zstd')
+    if _brotli() is not None:
+        found.append('br')
+    found.append('gzip')
+    return found
+
+
+def compression_level(encoding):
+    levels = {**DEFAULT_LEVELS, **getattr(settings, 'GRID_COMPRESSION_LEVELS', {})}
+    return levels[encoding]
+
+
+def compressor(encoding):
+    """Return (compress, flush, finish) callables for one stream in the given encoding."""
+    level = compression_level(encoding)
+    if encoding == 'zstd':
+        zstandard = _zstandard()
+        obj = zstandard.ZstdCompressor(level=level).compressobj()
+        return obj.compress, lambda: obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), obj.flush
+    if encoding == 'br':
+        obj = _brotli().Compressor(quality=level)
+        return obj.process, obj.flush, obj.finish
+    # wbits 31: gzip container
+    obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return obj.compress, lambda: obj.flush(zlib.Z_SYNC_FLUSH), obj.flush
+
+
+def negotiate(accept_encoding):
+    """The preferred encoding the client accepts, or None."""
+    accepted = accepted_encodings(accept_encoding)
+    for encoding in ENCODINGS:
+        if encoding in available_encodings() and (encoding in accepted or '*' in accepted):
+            return encoding
+    return None
+
+
+def compress_chunks(chunks, encoding):
+    compress, flush, finish = compressor(encoding)
+    for chunk in chunks:
+        if chunk:
+            data = compress(chunk) + flush()
+            if data:
+                yield data
+    tail = finish()
+    if tail:
+        yield tail
+
+
+async def compress_chunks_async(chunks, encoding):
+    compress, flush, finish = compressor(encoding)
+    async for chunk in chunks:
+        if chunk:
+            data = compress(chunk) + flush()
+            if data:
+                yield data
+    tail = finish()
+    if tail:
+        yield tail
+
+
+def _path_allowed(path):
+    return any(path.startswith(prefix) for prefix in getattr(settings, 'GRID_COMPRESSION_PATHS', ('/api/',)))
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if not _path_allowed(request.path):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.has_header('Content-Encoding') or response.status_code in (204, 304):
+            return response
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return response
+        encoding = negotiate(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_chunks_async(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_chunks(response.streaming_content, encoding)
+            # The compressed length is not known up front
+            del response['Content-Length']
+        else:
+            if len(response.content) < getattr(settings, 'GRID_COMPRESSION_MIN_SIZE', 1024):
+                return response
+            compress, _, finish = compressor(encoding)
+            compressed = compress(response.content) + finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # The representation changed, so a strong ETag no longer applies
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
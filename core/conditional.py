@@ -0,0 +1,106 @@
+"""
+ETag / Last-Modified functions for the read-mostly grid APIs, for use with
+django.views.decorators.http.condition.
+
+Config-derived responses are versioned by the grid config and options versions; per-user
+rows (layouts, search patterns) by their row count, newest id and newest updated_at. Each
+function costs at most one aggregate query, so a 304 never builds the response body.
+"""
+import asyncio
+import hashlib
+import time
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.views.decorators.cache import cache_control
+
+from . import aio
+from .models import GridLayout, SearchPattern, TabInterface
+from .options import options_version
+from .registry import config_version
+
+
+def _etag(*parts):
+    return hashlib.md5(':'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+
+def config_cache_control(view):
+    """Config-derived data: cache briefly per user, then revalidate."""
+    decorator = aio.cache_control if asyncio.iscoroutinefunction(view) else cache_control
+    return decorator(private=True, max_age=getattr(settings, 'GRID_CONFIG_MAX_AGE', 60))(view)
+
+
+def user_data_cache_control(view):
+    """User-edited data: always revalidate so saves show up immediately."""
+    return cache_control(private=True, no_cache=True)(view)
+
+
+def fields_etag(request, table_name):
+    return _etag('fields', table_name, config_version())
+
+
+def options_etag(request, table_name, field_name):
+    # Cached option lists also expire after GRID_OPTIONS_TTL, so the tag rolls over with them
+    ttl = getattr(settings, 'GRID_OPTIONS_TTL', 300)
+    return _etag('options', table_name, field_name, config_version(), options_version(), int(time.time()) // ttl)
+
+
+def _rows_state(request, queryset):
+    # condition() asks for the ETag and Last-Modified separately; aggregate once per request
+    state = getattr(request, '_grid_rows_state', None)
+    if state is None:
+        state = queryset.aggregate(count=Count('id'), last_id=Max('id'), last_modified=Max('updated_at'))
+        request._grid_rows_state = state
+    return state
+
+
+def _grid_layouts(request, table_name):
+    return _rows_state(request, GridLayout.objects.filter(username=request.user.username, table_name=table_name))
+
+
+def _tab_layouts(request):
+    return _rows_state(request, TabInterface.objects.filter(username=request.user.username))
+
+
+def _search_patterns(request, table_name):
+    return _rows_state(request, SearchPattern.objects.filter(tablename=table_name, username=request.user.username))
+
+
+def grid_layouts_etag(request, table_name):
+    state = _grid_layouts(request, table_name)
+    return _etag('layouts', state['count'], state['last_id'], state['last_modified'])
+
+
+def grid_layouts_last_modified(request, table_name):
+    return _grid_layouts(request, table_name)['last_modified']
+
+
+def grid_layout_last_modified(request, table_name, layout_id):
+    if not hasattr(request, '_grid_layout_updated_at'):
+        request._grid_layout_updated_at = GridLayout.objects.filter(
+            id=layout_id, username=request.user.username, table_name=table_name
+        ).values_list('updated_at', flat=True).first()
+    return request._grid_layout_updated_at
+
+
+def grid_layout_etag(request, table_name, layout_id):
+    updated_at = grid_layout_last_modified(request, table_name, layout_id)
+    return _etag('layout', layout_id, updated_at) if updated_at else None
+
+
+def tab_layouts_etag(request):
+    state = _tab_layouts(request)
+    return _etag('tabs', state['count'], state['last_id'], state['last_modified'])
+
+
+def tab_layouts_last_modified(request):
+    return _tab_layouts(request)['last_modified']
+
+
+def search_patterns_etag(request, table_name):
+    state = _search_patterns(request, table_name)
+    return _etag('patterns', state['count'], state['last_id'], state['last_modified'])
+
+
+def search_patterns_last_modified(request, table_name):
+    return _search_patterns(request, table_name)['last_modified']
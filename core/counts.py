@@ -0,0 +1,85 @@
+"""
+Row counts for the grid without re-running COUNT(*) next to every page query.
+
+- Unfiltered totals come from TableRowCount, adjusted by the grid write endpoints and
+  seeded with one COUNT(*) the first time a table is seen (`manage.py recount_rows` resyncs).
+- Filtered totals may be estimated from the optimizer's EXPLAIN row estimates (MySQL) and
+  are then flagged approximate; small estimates are replaced by an exact count.
+- exact_count() is always available for the on-demand count endpoint.
+"""
+from django.conf import settings
+from django.db import IntegrityError, connection
+from django.db.models import F
+
+from .models import TableRowCount
+from .query import compile_count, compile_select, execute
+
+COUNT_MODES = ('exact', 'estimate')
+
+
+def table_row_count(table_name):
+    """Unfiltered row count of a grid table from its maintained counter."""
+    count = TableRowCount.objects.filter(table_name=table_name).values_list('row_count', flat=True).first()
+    if count is None:
+        count = recount(table_name)
+    return count
+
+
+def recount(table_name):
+    """Reset a table's counter from an exact COUNT(*)."""
+    cursor = connection.cursor()
+    execute(cursor, compile_count(table_name, False))
+    count = cursor.fetchone()[0]
+    try:
+        TableRowCount.objects.update_or_create(table_name=table_name, defaults={'row_count': count})
+    except IntegrityError:
+        # Another worker seeded it at the same moment
+        TableRowCount.objects.filter(table_name=table_name).update(row_count=count)
+    return count
+
+
+def adjust_row_count(table_name, delta):
+    """Apply an insert/delete delta to a table's counter (no-op until the counter is seeded)."""
+    if delta:
+        TableRowCount.objects.filter(table_name=table_name).update(row_count=F('row_count') + delta)
+
+
+def exact_count(cursor, table_name, joins_job, filter_shape, params):
+    execute(cursor, compile_count(table_name, joins_job, filter_shape), params)
+    return cursor.fetchone()[0]
+
+
+def estimate_count(cursor, table_name, joins_job, filter_shape, params):
+    """Optimizer row estimate for a filtered grid query, or None if the backend can't provide one."""
+    if cursor.db.vendor != 'mysql':
+        return None
+    sql, _ = compile_select(table_name, ('id',), joins_job, filter_shape)
+    cursor.execute('EXPLAIN ' + sql, list(params))
+    names = [col[0].lower() for col in cursor.description]
+    if 'rows' not in names:
+        return None
+    rows_idx = names.index('rows')
+    filtered_idx = names.index('filtered') if 'filtered' in names else None
+    estimate = 1.0
+    for row in cursor.fetchall():
+        rows = row[rows_idx] or 0
+        filtered = row[filtered_idx] if filtered_idx is not None and row[filtered_idx] is not None else 100.0
+        estimate *= float(rows) * float(filtered) / 100.0
+    return int(round(estimate))
+
+
+def filtered_count(cursor, table_name, joins_job, filter_shape, params, mode=None):
+    """
+    Total for a grid query. Returns (count, approximate).
+    mode is 'exact' or 'estimate' (default GRID_COUNT_MODE).
+    """
+    if not filter_shape:
+        return table_row_count(table_name), False
+    if mode not in COUNT_MODES:
+        mode = getattr(settings, 'GRID_COUNT_MODE', 'estimate')
+    if mode == 'estimate':
+        estimate = estimate_count(cursor, table_name, joins_job, filter_shape, params)
+        # Small results are cheap to count exactly, so only estimate the big ones
+        if estimate is not None and estimate >= getattr(settings, 'GRID_EXACT_COUNT_THRESHOLD', 10000):
+            return estimate, True
+    return exact_count(cursor, table_name, joins_job, filter_shape, params), False
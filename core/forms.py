@@ -1,5 +1,6 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
+from .avatars import store_avatar
 from .models import CustomUser
 
 class CustomUserCreationForm(UserCreationForm):
@@ -29,4 +30,14 @@ class ProfileUpdateForm(forms.ModelForm):
 
     class Meta:
         model = CustomUser
-        fields = ('username', 'email', 'avatar') 
\ No newline at end of file
+        fields = ('username', 'email', 'avatar')
+
+    def save(self, commit=True):
+        user = super().save(commit=False)
+        avatar = self.cleaned_data.get('avatar')
+        if 'avatar' in self.changed_data and avatar:
+            # Keep only the normalized master and thumbnails, never the raw upload
+            user.avatar = store_avatar(avatar)
+        if commit:
+            user.save()
+        return user
@@ -0,0 +1,156 @@
+"""
+Full-text search support for contains / not_contains / GSearch filters.
+
+Fields flagged with search_config.fulltext_search are matched word by word (prefix match per
+term) through a MySQL FULLTEXT index, or an FTS5 table on SQLite for local testing.
+Run `manage.py sync_fulltext` to flag fields and create, drop or optimize the indexes. An
+unflagged field keeps its index until the run after, so workers still on the old flags never
+query a dropped index.
+Values with no usable terms, and other backends, fall back to LIKE '%value%'.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+
+from .registry import has_fulltext_column
+
+FLAG_COLUMN = 'fulltext_search'
+INDEX_PREFIX = 'ft_'
+
+
+def fulltext_enabled():
+    return connection.vendor in ('mysql', 'sqlite')
+
+
+def fulltext_terms(value):
+    """Words of a filter value usable as full-text terms, or None to fall back to LIKE."""
+    if not fulltext_enabled() or not isinstance(value, str):
+        return None
+    terms = re.findall(r'\w+', value)
+    # Terms under the server's minimum token size are not indexed (innodb_ft_min_token_size)
+    min_token = getattr(settings, 'GRID_FULLTEXT_MIN_TOKEN', 3)
+    if not terms or any(len(term) < min_token for term in terms):
+        return None
+    return terms
+
+
+def match_query(field, terms):
+    """Search string for MATCH / FTS5 requiring every term as a word prefix."""
+    if connection.vendor == 'sqlite':
+        return f"{field} : (" + ' AND '.join(f'"{term}"*' for term in terms) + ')'
+    return ' '.join(f"+{term}*" for term in terms)
+
+
+def fts_table(table_name):
+    return f"{table_name}_fts"
+
+
+def match_sql(table_name, field, negate):
+    """WHERE fragment testing t.<field> against a match_query parameter."""
+    if connection.vendor == 'sqlite':
+        fts = fts_table(table_name)
+        op = 'NOT IN' if negate else 'IN'
+        sql = f"t.id {op} (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)"
+    else:
+        sql = f"{'NOT ' if negate else ''}MATCH(t.{field}) AGAINST (%s IN BOOLEAN MODE)"
+    # NOT LIKE never matches NULL; keep that for the negated form
+    return f"(t.{field} IS NOT NULL AND {sql})" if negate else sql
+
+
+def ensure_flag_column(cursor):
+    if not has_fulltext_column(cursor):
+        cursor.execute(f"ALTER TABLE search_config ADD COLUMN {FLAG_COLUMN} SMALLINT NOT NULL DEFAULT 0")
+
+
+def flagged_fields(cursor):
+    """{table_name: [field_name, ...]} for every table in search_config."""
+    cursor.execute(f"SELECT table_name, field_name, {FLAG_COLUMN} FROM search_config ORDER BY id")
+    tables = {}
+    for table_name, field_name, flag in cursor.fetchall():
+        fields = tables.setdefault(table_name, [])
+        if flag:
+            fields.append(field_name)
+    return tables
+
+
+def _sync_mysql(cursor, table_name, fields, optimize, keep):
+    cursor.execute(f"SHOW INDEX FROM {table_name} WHERE Index_type = 'FULLTEXT'")
+    existing = {row[2]: row[4] for row in cursor.fetchall() if row[2].startswith(INDEX_PREFIX)}
+    changes = []
+    for index_name, column in existing.items():
+        if column in fields:
+            continue
+        if column in keep:
+            changes.append(f"kept {index_name} until the next run")
+        else:
+            cursor.execute(f"ALTER TABLE {table_name} DROP INDEX {index_name}")
+            changes.append(f"dropped {index_name}")
+    for field in fields:
+        if INDEX_PREFIX + field not in existing:
+            cursor.execute(f"ALTER TABLE {table_name} ADD FULLTEXT INDEX {INDEX_PREFIX}{field} ({field})")
+            changes.append(f"created {INDEX_PREFIX}{field}")
+    if optimize and fields:
+        cursor.execute(f"OPTIMIZE TABLE {table_name}")
+        cursor.fetchall()
+        changes.append('optimized')
+    return changes
+
+
+def _drop_sqlite(cursor, table_name):
+    fts = fts_table(table_name)
+    for suffix in ('ai', 'ad', 'au'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+    cursor.execute(f"DROP TABLE IF EXISTS {fts}")
+
+
+def _sync_sqlite(cursor, table_name, fields, optimize, keep):
+    fts = fts_table(table_name)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [fts])
+    existing = []
+    if cursor.fetchone():
+        cursor.execute(f"PRAGMA table_info({fts})")
+        existing = [row[1] for row in cursor.fetchall()]
+    kept = [f for f in existing if f in keep and f not in fields]
+    fields = fields + kept
+    if existing == fields:
+        if optimize and fields:
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+            return ['optimized']
+        return [f"kept {f} in {fts} until the next run" for f in kept]
+    _drop_sqlite(cursor, table_name)
+    if not fields:
+        return [f"dropped {fts}"]
+    # External-content FTS5 table kept in step with the base table by triggers
+    cols = ', '.join(fields)
+    new = ', '.join(f"new.{f}" for f in fields)
+    old = ', '.join(f"old.{f}" for f in fields)
+    cursor.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table_name}', content_rowid='id')")
+    cursor.execute(
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END"
+    )
+    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    return [f"built {fts}({cols})"]
+
+
+def sync_indexes(cursor, table_name, fields, optimize=False, keep=()):
+    """
+    Create/drop the full-text indexes of a table to match its flagged fields.
+    Indexes of fields in keep are not dropped even when they are no longer flagged: workers
+    that compiled the old flags may still be running MATCH queries against them.
+    """
+    if connection.vendor == 'mysql':
+        return _sync_mysql(cursor, table_name, fields, optimize, keep)
+    if connection.vendor == 'sqlite':
+        return _sync_sqlite(cursor, table_name, fields, optimize, keep)
+    return []
@@ -0,0 +1,224 @@
+"""
+Index advice for grid tables, based on how they are searched (`manage.py advise_indexes`).
+
+Shapes come from three places:
+- api_search telemetry (SearchShapeStat, see core.search_stats)
+- saved search patterns
+- the sort of saved layouts
+
+For each shape, the proposed index has the equality fields first (most used first, so
+proposals share prefixes), then the sort keys up to id, then one range field. id is
+dropped because the primary key already ends every secondary index. Proposals are
+dropped when an existing index's leading columns already serve them, or when a wider
+proposal covers them; a covered proposal's uses go to the wider one. TEXT / BLOB
+columns are skipped, since MySQL cannot index them whole.
+
+The impact estimate is the rows those searches could read without the index: uses ×
+table rows.
+"""
+import hashlib
+from dataclasses import dataclass, field
+
+from django.db import connection
+
+from .counts import table_row_count
+from .models import GridLayout, SearchPattern, SearchShapeStat
+from .query import QueryError, compile_filters, compile_sort
+from .search_stats import index_shape, parse_shape
+
+INDEX_PREFIX = 'gx_'
+MAX_NAME_LENGTH = 64
+
+
+@dataclass
+class Proposal:
+    table_name: str
+    columns: tuple          # (field, 'asc' | 'desc')
+    equality_count: int     # leading columns compared with = / IN, in any order
+    searches: int = 0       # api_search runs seen
+    saved: int = 0          # saved patterns / layouts with the shape
+    rows: int = 0
+    shapes: list = field(default_factory=list)
+
+    @property
+    def uses(self):
+        return self.searches + self.saved
+
+    @property
+    def impact(self):
+        return self.uses * self.rows
+
+    @property
+    def name(self):
+        name = INDEX_PREFIX + '_'.join((self.table_name,) + tuple(f for f, _ in self.columns))
+        if len(name) > MAX_NAME_LENGTH:
+            digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]
+            name = f"{name[:MAX_NAME_LENGTH - 9]}_{digest}"
+        return name
+
+    def column_sql(self):
+        qn = connection.ops.quote_name
+        return ', '.join(qn(f) + (' DESC' if order == 'desc' else '') for f, order in self.columns)
+
+    def create_sql(self):
+        qn = connection.ops.quote_name
+        if connection.vendor == 'mysql':
+            # Online DDL: reads and writes continue while the index builds
+            return (f"ALTER TABLE {qn(self.table_name)} ADD INDEX {qn(self.name)} ({self.column_sql()}), "
+                    f"ALGORITHM=INPLACE, LOCK=NONE")
+        return f"CREATE INDEX {qn(self.name)} ON {qn(self.table_name)} ({self.column_sql()})"
+
+
+def _existing_mysql(cursor, table_name):
+    cursor.execute(
+        "SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_TYPE = 'BTREE' "
+        "ORDER BY INDEX_NAME, SEQ_IN_INDEX",
+        [table_name]
+    )
+    indexes = {}
+    for index_name, column in cursor.fetchall():
+        indexes.setdefault(index_name, []).append(column)
+    return indexes
+
+
+def _existing_sqlite(cursor, table_name):
+    cursor.execute(f"PRAGMA index_list({connection.ops.quote_name(table_name)})")
+    indexes = {}
+    for row in cursor.fetchall():
+        cursor.execute(f"PRAGMA index_info({connection.ops.quote_name(row[1])})")
+        indexes[row[1]] = [info[2] for info in sorted(cursor.fetchall())]
+    return indexes
+
+
+def existing_indexes(cursor, table_name):
+    """{index name: [column, ...]} for the B-tree indexes of a table."""
+    if connection.vendor == 'mysql':
+        return _existing_mysql(cursor, table_name)
+    if connection.vendor == 'sqlite':
+        return _existing_sqlite(cursor, table_name)
+    return {}
+
+
+def unindexable_columns(cursor, table_name):
+    """Columns a plain index cannot hold (MySQL TEXT / BLOB / JSON / spatial)."""
+    if connection.vendor != 'mysql':
+        return set()
+    cursor.execute(
+        "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND DATA_TYPE IN "
+        "('tinytext', 'text', 'mediumtext', 'longtext', 'tinyblob', 'blob', 'mediumblob', 'longblob', "
+        "'json', 'geometry', 'point', 'linestring', 'polygon')",
+        [table_name]
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def saved_shapes(schema):
+    """[(shape, count)] from the table's saved search patterns and layout sorts."""
+    table_name = schema.table_name
+    shapes = []
+    for searchdata in SearchPattern.objects.filter(tablename=table_name).values_list('searchdata', flat=True):
+        if not isinstance(searchdata, dict):
+            continue
+        try:
+            filter_shape, _ = compile_filters(schema, searchdata.get('filters') or {})
+        except QueryError:
+            # Saved before a field was removed from search_config
+            continue
+        sort_keys = compile_sort(schema, searchdata.get('sorts'), default=())
+        shapes.append((index_shape(schema, filter_shape, sort_keys), 1))
+    for layout_json in GridLayout.objects.filter(table_name=table_name).values_list('layout_json', flat=True):
+        sort_state = layout_json.get('sortState') if isinstance(layout_json, dict) else None
+        if isinstance(sort_state, dict):
+            sort = [{'field': sort_state.get('column'), 'direction': sort_state.get('direction')}]
+            shapes.append((index_shape(schema, (), compile_sort(schema, sort, default=())), 1))
+    return shapes
+
+
+def observed_shapes(table_name, since=None):
+    """[(shape, hits)] from api_search telemetry, optionally only shapes seen since a datetime."""
+    stats = SearchShapeStat.objects.filter(table_name=table_name)
+    if since is not None:
+        stats = stats.filter(last_seen__gte=since)
+    return [(parse_shape(stat), stat.hits) for stat in stats]
+
+
+def index_columns(shape, equality_rank, unindexable, max_columns):
+    """Equality fields, then sort keys, then one range field, as (field, order) pairs."""
+    equality, ranges, sort = shape
+    if 'id' in equality:
+        # A primary key lookup
+        return ()
+    columns = [(f, 'asc') for f in sorted(equality, key=equality_rank) if f not in unindexable]
+    sort_columns = []
+    for f, order in sort:
+        if f == 'id' or f in unindexable:
+            break
+        if f not in equality:
+            sort_columns.append((f, order))
+    if sort_columns:
+        # A backward scan serves a uniform descending sort; mixed orders need DESC columns
+        first = sort_columns[0][1]
+        columns += [(f, 'asc' if order == first else 'desc') for f, order in sort_columns]
+    for f in ranges:
+        if f != 'id' and f not in unindexable:
+            columns.append((f, 'asc'))
+            break
+    return tuple(columns[:max_columns])
+
+
+def _serves(index, columns, equality_count):
+    """Whether an index (a list of column names) serves a proposal's columns through its leading ones."""
+    if len(index) < len(columns):
+        return False
+    if set(index[:equality_count]) != set(columns[:equality_count]):
+        return False
+    return list(index[equality_count:len(columns)]) == list(columns[equality_count:])
+
+
+def advise(cursor, schema, max_columns=4, since=None):
+    """Index proposals for a table, most impact first."""
+    table_name = schema.table_name
+    observed = observed_shapes(table_name, since)
+    saved = saved_shapes(schema)
+    # Most used equality fields lead, so proposals for related shapes share a prefix
+    equality_uses = {}
+    for (equality, _, _), uses in observed + saved:
+        for f in equality:
+            equality_uses[f] = equality_uses.get(f, 0) + uses
+
+    def equality_rank(f):
+        return -equality_uses.get(f, 0), f
+
+    unindexable = unindexable_columns(cursor, table_name)
+    proposals = {}
+    for shape, uses, kind in [s + ('searches',) for s in observed] + [s + ('saved',) for s in saved]:
+        columns = index_columns(shape, equality_rank, unindexable, max_columns)
+        if not columns:
+            continue
+        equality_count = sum(1 for f, _ in columns if f in shape[0])
+        proposal = proposals.get((columns, equality_count))
+        if proposal is None:
+            proposal = proposals[columns, equality_count] = Proposal(table_name, columns, equality_count)
+        setattr(proposal, kind, getattr(proposal, kind) + uses)
+        proposal.shapes.append(shape)
+    existing = list(existing_indexes(cursor, table_name).values())
+    kept = []
+    # Widest first, so narrower proposals fold into the ones that serve them
+    for proposal in sorted(proposals.values(), key=lambda p: (-len(p.columns), -p.uses)):
+        names = [f for f, _ in proposal.columns]
+        if any(_serves(index, names, proposal.equality_count) for index in existing):
+            continue
+        wider = next((p for p in kept if _serves([f for f, _ in p.columns], names, proposal.equality_count)), None)
+        if wider is not None:
+            wider.searches += proposal.searches
+            wider.saved += proposal.saved
+            wider.shapes.extend(proposal.shapes)
+            continue
+        kept.append(proposal)
+    if kept:
+        rows = table_row_count(table_name)
+        for proposal in kept:
+            proposal.rows = rows
+    return sorted(kept, key=lambda p: -p.impact)
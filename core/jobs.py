@@ -0,0 +1,140 @@
+"""
+Shared job-name -> job-id resolver for the grid write endpoints.
+
+Names are looked up in a per-worker cache first. Misses select the job by name and only
+insert it when it does not exist, so callers learn whether a job was really created. The
+insert is an upsert (MySQL: INSERT ... ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id);
+SQLite: INSERT ... ON CONFLICT DO UPDATE ... RETURNING id) that also returns the id when
+another request inserted the name meanwhile. It relies on the unique index on job.name that
+`manage.py dedupe_jobs` creates; without that index a plain INSERT is used.
+
+Resolve jobs before opening the write transaction: the job row is then committed on its
+own, so a rolled-back grid write can never leave a cached id pointing at a missing job.
+Call invalidate_job_cache() after renaming or deleting jobs outside the app.
+"""
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+from .bulk import chunk_size, chunked
+from .metrics import record_cache
+from .versions import bump_version, shared_version
+
+JOB_CACHE_VERSION_KEY = 'job_cache_version'
+
+_lock = threading.Lock()
+_ids = {}               # job name -> id
+_memo_version = None
+_unique_name = None     # whether job.name has a unique index (checked once per worker)
+
+
+def invalidate_job_cache():
+    """Drop cached job ids (and the unique-index check) in every worker sharing the cache."""
+    bump_version(JOB_CACHE_VERSION_KEY)
+    _sync()
+
+
+def _sync():
+    global _memo_version, _unique_name
+    version = shared_version(JOB_CACHE_VERSION_KEY)
+    if version != _memo_version:
+        with _lock:
+            if version != _memo_version:
+                _ids.clear()
+                _unique_name = None
+                _memo_version = version
+
+
+def _remember(mapping):
+    with _lock:
+        if len(_ids) + len(mapping) > getattr(settings, 'GRID_JOB_CACHE_SIZE', 10000):
+            _ids.clear()
+        _ids.update(mapping)
+
+
+def has_unique_name(cursor):
+    global _unique_name
+    if _unique_name is None:
+        constraints = connection.introspection.get_constraints(cursor, 'job')
+        _unique_name = any(c['unique'] and c['columns'] == ['name'] for c in constraints.values())
+    return _unique_name
+
+
+def _upsert_one(cursor, name):
+    if connection.vendor == 'mysql':
+        cursor.execute("INSERT INTO job (name) VALUES (%s) ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)", [name])
+        return cursor.lastrowid
+    cursor.execute(
+        "INSERT INTO job (name) VALUES (%s) ON CONFLICT (name) DO UPDATE SET name = job.name RETURNING id", [name]
+    )
+    return cursor.fetchone()[0]
+
+
+def _select_ids(cursor, names, mapping):
+    for batch in chunked(names, chunk_size()):
+        cursor.execute(f"SELECT id, name FROM job WHERE name IN ({','.join(['%s'] * len(batch))})", batch)
+        rows = cursor.fetchall()
+        exact = {name: job_id for job_id, name in rows}
+        # MySQL's default collation compares names case-insensitively
+        folded = {name.casefold(): job_id for job_id, name in rows}
+        for name in batch:
+            job_id = exact.get(name, folded.get(name.casefold()))
+            if job_id is not None:
+                mapping[name] = job_id
+
+
+def _insert_missing(cursor, names):
+    if not has_unique_name(cursor):
+        sql = "INSERT INTO job (name) VALUES (%s)"
+    elif connection.vendor == 'mysql':
+        # A no-op update: names another request inserted meanwhile are simply skipped
+        sql = "INSERT INTO job (name) VALUES (%s) ON DUPLICATE KEY UPDATE id = id"
+    else:
+        sql = "INSERT INTO job (name) VALUES (%s) ON CONFLICT (name) DO NOTHING"
+    for batch in chunked(names, chunk_size()):
+        cursor.executemany(sql, [[name] for name in batch])
+
+
+def resolve_job(cursor, name):
+    """
+    Return (job_id, created) for a job name, creating the job if needed.
+    created is True only when this call inserted the job row.
+    """
+    _sync()
+    job_id = _ids.get(name)
+    record_cache('job_ids', job_id is not None)
+    if job_id is not None:
+        return job_id, False
+    cursor.execute("SELECT id FROM job WHERE name = %s", [name])
+    row = cursor.fetchone()
+    created = row is None
+    if not created:
+        job_id = row[0]
+    elif has_unique_name(cursor) and connection.vendor in ('mysql', 'sqlite'):
+        # Another request may have inserted the name since the SELECT; the upsert returns its id
+        job_id = _upsert_one(cursor, name)
+    else:
+        cursor.execute("INSERT INTO job (name) VALUES (%s)", [name])
+        job_id = cursor.lastrowid
+    _remember({name: job_id})
+    return job_id, created
+
+
+def resolve_jobs(cursor, names):
+    """Map many job names to ids, creating missing jobs in batches. Returns (mapping, created_count)."""
+    _sync()
+    names = sorted({name for name in names if isinstance(name, str) and name})
+    mapping = {name: _ids[name] for name in names if name in _ids}
+    misses = [name for name in names if name not in mapping]
+    record_cache('job_ids', True, len(mapping))
+    record_cache('job_ids', False, len(misses))
+    found = {}
+    _select_ids(cursor, misses, found)
+    missing = [name for name in misses if name not in found]
+    if missing:
+        _insert_missing(cursor, missing)
+        _select_ids(cursor, missing, found)
+    _remember(found)
+    mapping.update(found)
+    return mapping, len(missing)
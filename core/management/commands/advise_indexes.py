@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from core.indexes import advise
+from core.registry import get_table_schema
+from core.search_stats import flush
+
+
+class Command(BaseCommand):
+    help = ('Propose indexes for grid tables from saved searches, layouts and api_search telemetry, '
+            'and optionally create them online.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('tables', nargs='*', help='Tables to advise on (default: every table in search_config)')
+        parser.add_argument('--apply', action='store_true', help='Create the proposed indexes')
+        parser.add_argument('--days', type=int, default=30,
+                            help='Only count search shapes seen in the last DAYS days (0: all)')
+        parser.add_argument('--min-uses', type=int, default=1,
+                            help='Skip proposals with fewer searches plus saved patterns / layouts')
+        parser.add_argument('--max-columns', type=int, default=4, help='Widest index to propose')
+
+    def handle(self, *args, **options):
+        # Counts this process may hold (e.g. when run from a shell) go in first
+        flush()
+        tables = options['tables']
+        cursor = connection.cursor()
+        if not tables:
+            cursor.execute("SELECT DISTINCT table_name FROM search_config")
+            tables = [row[0] for row in cursor.fetchall()]
+        proposed = False
+        since = timezone.now() - timedelta(days=options['days']) if options['days'] else None
+        for table_name in tables:
+            schema = get_table_schema(table_name)
+            if not schema.fields:
+                self.stderr.write(f"{table_name}: not in search_config, skipped")
+                continue
+            proposals = [p for p in advise(cursor, schema, options['max_columns'], since)
+                         if p.uses >= options['min_uses']]
+            if not proposals:
+                self.stdout.write(f"{table_name}: no new indexes needed")
+                continue
+            proposed = True
+            for proposal in proposals:
+                self.stdout.write(
+                    f"{table_name}: {proposal.name} ({proposal.column_sql()}) "
+                    f"searches={proposal.searches} saved={proposal.saved} "
+                    f"est. rows read without it={proposal.impact:,} ({proposal.uses:,} x {proposal.rows:,})"
+                )
+                self.stdout.write(f"    {proposal.create_sql()};")
+                if options['apply']:
+                    try:
+                        cursor.execute(proposal.create_sql())
+                    except DatabaseError as e:
+                        self.stderr.write(self.style.ERROR(f"    failed: {e}"))
+                    else:
+                        self.stdout.write(self.style.SUCCESS(f"    created {proposal.name}"))
+        if proposed and not options['apply']:
+            self.stdout.write('Run with --apply to create these indexes.')
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.avatars import normalized_key, store_avatar
+
+
+class Command(BaseCommand):
+    help = 'Convert stored avatars into normalized, content-addressed thumbnails.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Rewrite the thumbnails of avatars that are already normalized')
+        parser.add_argument('--delete-originals', action='store_true',
+                            help='Delete each original upload once it has been converted')
+
+    def handle(self, *args, **options):
+        converted = skipped = failed = 0
+        users = get_user_model().objects.exclude(avatar='').exclude(avatar__isnull=True).order_by('pk')
+        for user in users.iterator():
+            name = user.avatar.name
+            if normalized_key(name) and not options['force']:
+                skipped += 1
+                continue
+            if not default_storage.exists(name):
+                self.stderr.write(f"{user.username}: {name} is missing")
+                failed += 1
+                continue
+            try:
+                with default_storage.open(name, 'rb') as source:
+                    new_name = store_avatar(source, force=options['force'])
+            except Exception as exc:
+                self.stderr.write(f"{user.username}: {name} could not be converted ({exc})")
+                failed += 1
+                continue
+            if new_name != name:
+                type(user).objects.filter(pk=user.pk).update(avatar=new_name)
+                if options['delete_originals'] and not normalized_key(name):
+                    still_used = type(user).objects.filter(avatar=name).exists()
+                    if not still_used:
+                        default_storage.delete(name)
+            converted += 1
+            self.stdout.write(f"{user.username}: {name} -> {new_name}")
+        self.stdout.write(self.style.SUCCESS(f"Converted {converted}, skipped {skipped}, failed {failed}."))
@@ -0,0 +1,60 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks.runner import run
+from core.benchmarks.scenarios import scenarios
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the grid endpoints against a bench_data table: p50/p95/p99 latency, '
+            'query counts and peak RSS per scenario, as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', default='bench_people')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests before each scenario')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--user', default='bench', help='User the requests log in as (created if missing)')
+        parser.add_argument('--scenario', action='append', default=[], metavar='NAME',
+                            help='Only run these scenarios (repeatable)')
+        parser.add_argument('--list', action='store_true', help='List the scenarios and exit')
+        parser.add_argument('--output', help='Write the JSON report here instead of to stdout')
+
+    def handle(self, *args, **options):
+        selected = scenarios()
+        if options['list']:
+            for scenario in selected:
+                self.stdout.write(scenario.name)
+            return
+        if options['scenario']:
+            unknown = set(options['scenario']) - {s.name for s in selected}
+            if unknown:
+                raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+            selected = [s for s in selected if s.name in options['scenario']]
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING(
+                "DEBUG is on: timings include Django's query logging (see pythonpoc.settings_bench)."
+            ))
+        output = options['output']
+
+        def progress(name, result):
+            if not output:
+                return
+            latency = result['latency_ms']
+            self.stdout.write(
+                f"{name:<26} p50 {latency['p50']:8.2f}  p95 {latency['p95']:8.2f}  p99 {latency['p99']:8.2f} ms"
+                f"  queries {result['queries']['mean']:5.1f}  errors {result['errors']}"
+            )
+
+        report = run(options['table'], selected, options['iterations'], options['warmup'], options['seed'],
+                     options['user'], progress)
+        if output:
+            with open(output, 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {output}"))
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks.runner import compare
+
+
+class Command(BaseCommand):
+    help = 'Compare two `manage.py bench` reports, e.g. from the commits before and after a change.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline')
+        parser.add_argument('current')
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help='Percent a latency may grow before it counts as a regression')
+        parser.add_argument('--min-ms', type=float, default=0.5,
+                            help='Ignore latency changes smaller than this many milliseconds')
+        parser.add_argument('--fail', action='store_true', help='Exit with an error if anything regressed')
+
+    def handle(self, *args, **options):
+        reports = []
+        for path in (options['baseline'], options['current']):
+            try:
+                with open(path) as f:
+                    reports.append(json.load(f))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {path}: {e}")
+        baseline, current = reports
+        self.stdout.write(f"{baseline['meta'].get('commit')} -> {current['meta'].get('commit')}")
+        regressions = 0
+        for name, metric, before, after, regressed in compare(baseline, current, options['threshold'],
+                                                              options['min_ms']):
+            change = f"{(after - before) / before:+.1%}" if before else 'n/a'
+            line = f"{name:<26} {metric:<8} {before:10.2f} -> {after:10.2f}  {change:>8}"
+            if regressed:
+                regressions += 1
+                line = self.style.ERROR(line + '  regressed')
+            self.stdout.write(line)
+        if regressions and options['fail']:
+            raise CommandError(f"{regressions} regression(s).")
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks.datagen import generate, parse_size
+
+
+class Command(BaseCommand):
+    help = 'Create a synthetic grid table (with forms, search_config and job rows) for the benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', default='bench_people', help='Table to (re)create; must start with bench_')
+        parser.add_argument('--rows', default='10k', help='Row count, e.g. 10k, 1M or 10M')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT batch')
+
+    def handle(self, *args, **options):
+        try:
+            rows = parse_size(options['rows'])
+        except ValueError:
+            raise CommandError(f"Not a row count: {options['rows']!r}")
+        started = time.perf_counter()
+        step = max(rows // 20, options['batch_size'])
+
+        def progress(done):
+            if done % step < options['batch_size'] or done == rows:
+                self.stdout.write(f"{done:,} / {rows:,} rows")
+
+        try:
+            generate(options['table'], rows, options['seed'], options['batch_size'], progress)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['table']}: {rows:,} rows in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,45 @@
+import os
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from core.assets import BUNDLES, LAZY_MODULES, BundleError, build_bundles, bundle_path, precompress
+
+
+class Command(BaseCommand):
+    help = 'Bundle and minify the grid front end, collect it with hashed names and precompress it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bundle-only', action='store_true',
+                            help='Only write the bundles to core/static/core/dist')
+
+    def handle(self, *args, **options):
+        source_root = Path(apps.get_app_config('core').path) / 'static'
+        try:
+            written = build_bundles(source_root)
+        except BundleError as exc:
+            raise CommandError(str(exc))
+        for path in written:
+            self.stdout.write(f"Wrote {path.relative_to(source_root)} ({path.stat().st_size} bytes)")
+        if options['bundle_only']:
+            return
+        if not settings.STATIC_ROOT:
+            raise CommandError('STATIC_ROOT is not set.')
+        call_command('collectstatic', interactive=False, verbosity=max(options['verbosity'] - 1, 0))
+        count = precompress(settings.STATIC_ROOT)
+        self.stdout.write(f"Wrote {count} precompressed files.")
+        names = list(BUNDLES) + [os.path.basename(source) for source in LAZY_MODULES.values()]
+        for name in names:
+            hashed = staticfiles_storage.stored_name(bundle_path(name))
+            path = Path(settings.STATIC_ROOT) / hashed
+            sizes = [f"{path.stat().st_size}"]
+            for suffix in ('.gz', '.br'):
+                variant = path.with_name(path.name + suffix)
+                if variant.exists():
+                    sizes.append(f"{suffix[1:]} {variant.stat().st_size}")
+            self.stdout.write(f"{hashed}: {', '.join(sizes)} bytes")
+        self.stdout.write(self.style.SUCCESS('Static assets built.'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.jobs import has_unique_name, invalidate_job_cache
+from core.options import invalidate_options
+
+
+class Command(BaseCommand):
+    help = 'Merge duplicate job names into their oldest row and add the unique index on job.name.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the duplicates')
+
+    def handle(self, *args, **options):
+        cursor = connection.cursor()
+        cursor.execute("SELECT name, MIN(id), COUNT(*) FROM job GROUP BY name HAVING COUNT(*) > 1")
+        groups = cursor.fetchall()
+        # Grid tables whose job column holds a job id
+        cursor.execute("SELECT DISTINCT table_name FROM search_config WHERE field_name = 'job'")
+        tables = [row[0] for row in cursor.fetchall()]
+        for name, keep_id, count in groups:
+            self.stdout.write(f"{name}: {count} rows, keeping id {keep_id}")
+        if options['dry_run']:
+            return
+        with transaction.atomic():
+            for name, keep_id, count in groups:
+                cursor.execute("SELECT id FROM job WHERE name = %s AND id <> %s", [name, keep_id])
+                dup_ids = [row[0] for row in cursor.fetchall()]
+                placeholders = ','.join(['%s'] * len(dup_ids))
+                for table_name in tables:
+                    cursor.execute(f"UPDATE {table_name} SET job = %s WHERE job IN ({placeholders})", [keep_id] + dup_ids)
+                cursor.execute(f"DELETE FROM job WHERE id IN ({placeholders})", dup_ids)
+        if not has_unique_name(cursor):
+            cursor.execute("CREATE UNIQUE INDEX job_name_unique ON job (name)")
+            self.stdout.write('Created unique index job_name_unique.')
+        invalidate_job_cache()
+        invalidate_options()
+        self.stdout.write(self.style.SUCCESS(f"Merged {len(groups)} duplicate job names."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from django.db import connection
+
+from core.counts import recount
+
+
+class Command(BaseCommand):
+    help = 'Resync grid row counters with COUNT(*), e.g. after rows were changed outside the app.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tables', nargs='*', help='Tables to recount (default: every table in search_config)')
+
+    def handle(self, *args, **options):
+        tables = options['tables']
+        if not tables:
+            cursor = connection.cursor()
+            cursor.execute("SELECT DISTINCT table_name FROM search_config")
+            tables = [row[0] for row in cursor.fetchall()]
+        for table_name in tables:
+            count = recount(table_name)
+            self.stdout.write(f"{table_name}: {count}")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.registry import bump_config_version
+
+
+class Command(BaseCommand):
+    help = 'Invalidate cached grid metadata after search_config or forms rows were changed.'
+
+    def handle(self, *args, **options):
+        bump_config_version()
+        self.stdout.write(self.style.SUCCESS('Grid config version bumped.'))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.fulltext import FLAG_COLUMN, ensure_flag_column, flagged_fields, fulltext_enabled, sync_indexes
+from core.registry import bump_config_version
+
+
+def _table_field(value):
+    table_name, _, field_name = value.partition('.')
+    if not table_name or not field_name:
+        raise CommandError(f"Expected table.field, got {value!r}")
+    return table_name, field_name
+
+
+class Command(BaseCommand):
+    help = 'Flag search_config fields as full-text searchable and create/drop their full-text indexes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enable', action='append', default=[], metavar='TABLE.FIELD',
+                            help='Mark a field as full-text searchable')
+        parser.add_argument('--disable', action='append', default=[], metavar='TABLE.FIELD',
+                            help='Stop using full-text search for a field (its index is dropped by the next run)')
+        parser.add_argument('--optimize', action='store_true',
+                            help='Also optimize existing full-text indexes')
+
+    def handle(self, *args, **options):
+        if not fulltext_enabled():
+            raise CommandError(f"Full-text indexes are not supported on {connection.vendor}.")
+        cursor = connection.cursor()
+        ensure_flag_column(cursor)
+        # Running workers may still search these fields through their indexes until they reload
+        # the config, so an index is only dropped once its field was already unflagged
+        flagged_before = flagged_fields(cursor)
+        for value, flag in [(v, 1) for v in options['enable']] + [(v, 0) for v in options['disable']]:
+            table_name, field_name = _table_field(value)
+            cursor.execute(
+                f"UPDATE search_config SET {FLAG_COLUMN} = %s WHERE table_name = %s AND field_name = %s",
+                [flag, table_name, field_name]
+            )
+            if not cursor.rowcount:
+                raise CommandError(f"{value} is not in search_config.")
+        for table_name, fields in flagged_fields(cursor).items():
+            keep = flagged_before.get(table_name, ())
+            for change in sync_indexes(cursor, table_name, fields, options['optimize'], keep):
+                self.stdout.write(f"{table_name}: {change}")
+        # Compiled schemas carry the flags, so every worker must reload them
+        bump_config_version()
+        self.stdout.write(self.style.SUCCESS('Full-text indexes are in sync with search_config.'))
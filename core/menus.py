@@ -0,0 +1,107 @@
+"""
+Sidebar menu tree, cached per role set.
+
+A user's role ids and the tree for each distinct set of roles are kept in the shared Django
+cache under a menu version, for at most GRID_SHELL_CACHE_TTL seconds. post_save / post_delete
+on Menu, RoleMenu and UserRole bump the version (see core.signals), so every worker rebuilds
+on its next page view; the TTL bounds staleness after changes that skip the signals (raw SQL,
+queryset.update()).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from .metrics import record_cache
+from .models import Menu, RoleMenu, UserRole
+from .templatetags.url_filters import to_dynamic_grid_url
+from .versions import bump_version, shared_version
+
+MENU_VERSION_KEY = 'menu_version'
+
+# Fixed links the navbar renders itself
+STATIC_MENU_URLS = ('/', '/about/', '/contact/')
+
+
+def menu_version():
+    return shared_version(MENU_VERSION_KEY)
+
+
+def menu_cache_ttl():
+    return getattr(settings, 'GRID_SHELL_CACHE_TTL', 3600)
+
+
+def bump_menu_version(**kwargs):
+    """Invalidate every cached menu tree; usable directly as a signal receiver."""
+    bump_version(MENU_VERSION_KEY)
+
+
+def build_menu_tree(menus):
+    """
+    Nest menus (sorted by order) under their parents at any depth in linear time.
+    Menus whose parent is not in the list are dropped, as are the fixed top-level links.
+    Each node is {'menu', 'url', 'children', 'paths'}; paths holds the URLs of the node and
+    all its descendants, for highlighting the active branch.
+    """
+    nodes = {m.id: {'menu': m, 'url': to_dynamic_grid_url(m.url), 'children': [], 'paths': set()} for m in menus}
+    roots = []
+    for m in menus:
+        node = nodes[m.id]
+        if m.parent_id is None:
+            if m.url not in STATIC_MENU_URLS:
+                roots.append(node)
+        elif m.parent_id in nodes:
+            nodes[m.parent_id]['children'].append(node)
+
+    def collect(node):
+        node['paths'].add(node['url'])
+        for child in node['children']:
+            node['paths'].update(collect(child))
+        return node['paths']
+
+    for root in roots:
+        collect(root)
+    return roots
+
+
+def get_role_menu_tree(role_ids):
+    """Menu tree visible to a set of roles."""
+    role_ids = tuple(sorted(set(role_ids)))
+    key = f"menu_tree:{menu_version()}:{','.join(map(str, role_ids)) or '-'}"
+    tree = cache.get(key)
+    record_cache('menu_tree', tree is not None)
+    if tree is None:
+        menus = list(Menu.objects.filter(
+            id__in=RoleMenu.objects.filter(role_id__in=role_ids).values_list('menu_id', flat=True)
+        ).order_by('order', 'id'))
+        tree = build_menu_tree(menus)
+        cache.set(key, tree, menu_cache_ttl())
+    return tree
+
+
+def user_role_ids(user):
+    """Sorted role ids of a user, from the cache after the first page view."""
+    key = f"menu_roles:{menu_version()}:{user.pk}"
+    role_ids = cache.get(key)
+    record_cache('menu_roles', role_ids is not None)
+    if role_ids is None:
+        role_ids = sorted(set(UserRole.objects.filter(user=user).values_list('role_id', flat=True)))
+        cache.set(key, role_ids, menu_cache_ttl())
+    return role_ids
+
+
+def get_user_menus(user):
+    """Menu tree for a user."""
+    return get_role_menu_tree(user_role_ids(user))
+
+
+def shell_context(user):
+    """
+    Context for the page shell (sidebar, top bar) in base.html. The sidebar fragment is
+    cached under menu_cache_key, so the tree itself is only loaded when the fragment misses.
+    """
+    role_ids = user_role_ids(user)
+    return {
+        'menu_tree': SimpleLazyObject(lambda: get_role_menu_tree(role_ids)),
+        'menu_cache_key': f"{menu_version()}:{','.join(map(str, role_ids)) or '-'}",
+        'shell_cache_ttl': menu_cache_ttl(),
+    }
@@ -0,0 +1,418 @@
+"""
+Per-endpoint request, database and cache metrics in Prometheus text format (see the
+prometheus_metrics view at /metrics).
+
+MetricsMiddleware times each request and labels it with its URL pattern name. A database
+execute wrapper, installed on every connection by core.signals, adds the request's query
+count, SQL time and rows. That includes queries an async view runs on the core.aio thread
+pool, and those a streaming response runs while it is being sent. record_cache() counts
+hits and misses of the grid's caches.
+
+Each process counts in memory. With GRID_METRICS_DIR set, it also writes its numbers to
+<dir>/<pid>-<start>.json, at most every GRID_METRICS_FLUSH_INTERVAL seconds. /metrics adds
+up every file there: counters and histograms from all files, so a finished worker's
+requests still count, and gauges only from live processes. Empty the directory on each
+deploy, as with prometheus_client's multiprocess mode.
+
+Rows are the driver's rowcount for statements that return rows. That is exact for MySQL's
+buffered cursors, but SQLite does not report it and the export's server-side cursor
+bypasses the wrapper.
+"""
+import atexit
+import bisect
+import contextvars
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import FileResponse
+
+from .backends.mysql_pool.pool import pool_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS')
+
+# name -> (type, help)
+METRICS = {
+    'grid_http_requests_total': ('counter', 'Requests by URL pattern, method and status code.'),
+    'grid_http_request_duration_seconds': ('histogram', 'Time until the response is returned, by URL pattern.'),
+    'grid_http_response_bytes_total': ('counter', 'Response body bytes sent, by URL pattern.'),
+    'grid_db_queries_total': ('counter', 'SQL statements executed for requests, by URL pattern.'),
+    'grid_db_query_seconds_total': ('counter', 'Time spent executing SQL for requests, by URL pattern.'),
+    'grid_db_rows_total': ('counter', 'Rows returned by SQL statements for requests, by URL pattern.'),
+    'grid_cache_requests_total': ('counter', 'Cache lookups by cache and result (hit or miss).'),
+    'grid_db_pool_connections': ('gauge', 'Pooled database connections by alias and state.'),
+    'grid_db_pool_checkouts_total': ('counter', 'Connections checked out of the pool, by alias.'),
+    'grid_db_pool_waits_total': ('counter', 'Checkouts that had to wait for a free connection, by alias.'),
+    'grid_db_pool_wait_seconds_total': ('counter', 'Time spent waiting for a free connection, by alias.'),
+    'grid_db_pool_timeouts_total': ('counter', 'Checkouts that gave up waiting, by alias.'),
+}
+
+# Pool stats exported as counters (summed over every process that ever ran) and gauges (live processes)
+POOL_COUNTERS = {
+    'checkouts': 'grid_db_pool_checkouts_total',
+    'waits': 'grid_db_pool_waits_total',
+    'wait_time': 'grid_db_pool_wait_seconds_total',
+    'timeouts': 'grid_db_pool_timeouts_total',
+}
+POOL_GAUGES = ('in_use', 'idle', 'waiting')
+
+
+class _Store:
+    """This process's counters and histograms; keys are (name, ((label, value), ...))."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.started = time.time_ns()
+        self.counters = {}
+        self.histograms = {}
+        self.last_flush = 0.0
+
+    def _check_fork(self):
+        if os.getpid() != self.pid:
+            # Counts inherited from the parent are the parent's to report
+            self._reset()
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        with self.lock:
+            self._check_fork()
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        with self.lock:
+            self._check_fork()
+            # Per-bucket counts (the last one is +Inf), then sum and count
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 3)
+            histogram[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        with self.lock:
+            self._check_fork()
+            return {
+                'pid': self.pid,
+                'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, labels, values[:]] for (name, labels), values in self.histograms.items()],
+                'pool': pool_stats(),
+            }
+
+
+_store = _Store()
+
+
+def process_total(name):
+    """A counter summed over all its labels, for this process only (e.g. for benchmarks)."""
+    with _store.lock:
+        _store._check_fork()
+        return sum(value for (key, _), value in _store.counters.items() if key == name)
+
+
+def record_cache(cache_name, hit, count=1):
+    """Count `count` lookups of cache_name as hits (or misses)."""
+    if count:
+        _store.inc('grid_cache_requests_total', (('cache', cache_name), ('result', 'hit' if hit else 'miss')), count)
+
+
+# ----- Multi-process files -----
+
+def metrics_dir():
+    return getattr(settings, 'GRID_METRICS_DIR', None)
+
+
+def flush(force=False):
+    """Write this process's numbers to GRID_METRICS_DIR (at most every flush interval unless forced)."""
+    directory = metrics_dir()
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - _store.last_flush < getattr(settings, 'GRID_METRICS_FLUSH_INTERVAL', 1.0):
+        return
+    _store.last_flush = now
+    data = _store.snapshot()
+    path = os.path.join(directory, f"{data['pid']}-{_store.started}.json")
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(tmp, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, path)
+    except OSError:
+        # Metrics must never fail a request
+        pass
+
+
+atexit.register(flush, force=True)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _snapshots():
+    directory = metrics_dir()
+    if not directory:
+        return [_store.snapshot()]
+    flush(force=True)
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def collect():
+    """Merge every process's numbers: ({(name, labels): value}, {(name, labels): histogram})."""
+    counters, histograms = {}, {}
+    for snapshot in _snapshots():
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot['histograms']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                merged[i] += value
+        live = _alive(snapshot['pid'])
+        for alias, stats in snapshot.get('pool', {}).items():
+            for stat, name in POOL_COUNTERS.items():
+                key = (name, (('alias', alias),))
+                counters[key] = counters.get(key, 0) + stats[stat]
+            if live:
+                for state in POOL_GAUGES:
+                    key = ('grid_db_pool_connections', (('alias', alias), ('state', state)))
+                    counters[key] = counters.get(key, 0) + stats[state]
+    return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels, extra=()):
+    pairs = tuple(labels) + tuple(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    counters, histograms = collect()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        if kind == 'histogram':
+            series = sorted((labels, values) for (n, labels), values in histograms.items() if n == name)
+        else:
+            series = sorted((labels, value) for (n, labels), value in counters.items() if n == name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in series:
+            if kind != 'histogram':
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(value[-2])}")
+            lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_allowed(request):
+    """Scrapes bearing GRID_METRICS_TOKEN or from GRID_METRICS_ALLOWED_IPS, or staff users."""
+    token = getattr(settings, 'GRID_METRICS_TOKEN', None)
+    if token and hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return True
+    if request.META.get('REMOTE_ADDR') in getattr(settings, 'GRID_METRICS_ALLOWED_IPS', ()):
+        return True
+    return request.user.is_authenticated and request.user.is_staff
+
+
+# ----- Request and query instrumentation -----
+
+class _RequestStats:
+    def __init__(self, request):
+        self.request = request
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.rows = 0
+
+    def add(self, elapsed, rows):
+        # An async view may run queries on two pool threads at once
+        with self.lock:
+            self.queries += 1
+            self.sql_time += elapsed
+            self.rows += rows
+
+    def take(self):
+        with self.lock:
+            taken = (self.queries, self.sql_time, self.rows)
+            self.queries, self.sql_time, self.rows = 0, 0.0, 0
+            return taken
+
+
+_current = contextvars.ContextVar('grid_metrics_request', default=None)
+
+
+def current_request():
+    """The request whose code is running (also on aio pool threads and while streaming), or None."""
+    stats = _current.get()
+    return stats.request if stats is not None else None
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    rows = 0
+    try:
+        result = execute(sql, params, many, context)
+        cursor = context['cursor']
+        if cursor.description is not None and cursor.rowcount > 0:
+            rows = cursor.rowcount
+        return result
+    finally:
+        stats.add(time.perf_counter() - started, rows)
+
+
+def install_query_metrics(sender, connection, **kwargs):
+    """connection_created receiver: time every statement run on the connection."""
+    if _query_wrapper not in connection.execute_wrappers:
+        # First, so execute_wrapper() blocks opened earlier still pop their own wrapper
+        connection.execute_wrappers.insert(0, _query_wrapper)
+
+
+def request_endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+def _record_db(endpoint, stats):
+    queries, sql_time, rows = stats.take()
+    labels = (('endpoint', endpoint),)
+    if queries:
+        _store.inc('grid_db_queries_total', labels, queries)
+        _store.inc('grid_db_query_seconds_total', labels, sql_time)
+    if rows:
+        _store.inc('grid_db_rows_total', labels, rows)
+
+
+def _count_stream(chunks, endpoint, stats):
+    sent = 0
+    iterator = iter(chunks)
+    try:
+        while True:
+            # The rest of the response's queries run here, after the middleware returned
+            token = _current.set(stats)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                _current.reset(token)
+            sent += len(chunk)
+            yield chunk
+    finally:
+        _store.inc('grid_http_response_bytes_total', (('endpoint', endpoint),), sent)
+        _record_db(endpoint, stats)
+        flush()
+
+
+async def _count_stream_async(chunks, endpoint, stats):
+    sent = 0
+    try:
+        async for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        _store.inc('grid_http_response_bytes_total', (('endpoint', endpoint),), sent)
+        _record_db(endpoint, stats)
+        flush()
+
+
+class MetricsMiddleware:
+    """Outermost middleware: times requests and counts their queries and response bytes."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self._acall(request)
+        stats = _RequestStats(request)
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._record(request, response, stats, time.perf_counter() - started)
+
+    async def _acall(self, request):
+        stats = _RequestStats(request)
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._record(request, response, stats, time.perf_counter() - started)
+
+    def _record(self, request, response, stats, elapsed):
+        endpoint = request_endpoint(request)
+        method = request.method if request.method in METHODS else 'other'
+        labels = (('endpoint', endpoint),)
+        _store.observe('grid_http_request_duration_seconds', labels, elapsed)
+        _store.inc('grid_http_requests_total', labels + (('method', method), ('status', str(response.status_code))))
+        if isinstance(response, FileResponse):
+            # Leave the file to the server (sendfile); its size is known up front
+            _store.inc('grid_http_response_bytes_total', labels, int(response.get('Content-Length') or 0))
+        elif response.streaming:
+            # Bytes and the queries still to come are recorded when the stream ends
+            if response.is_async:
+                response.streaming_content = _count_stream_async(response.streaming_content, endpoint, stats)
+            else:
+                response.streaming_content = _count_stream(response.streaming_content, endpoint, stats)
+            return response
+        else:
+            _store.inc('grid_http_response_bytes_total', labels, len(response.content))
+        _record_db(endpoint, stats)
+        flush()
+        return response
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_tabinterface_is_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableRowCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_name', models.CharField(max_length=100, unique=True)),
+                ('row_count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_tablerowcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(db_index=True, max_length=40)),
+                ('sql', models.TextField()),
+                ('params', models.JSONField(blank=True, null=True)),
+                ('duration_ms', models.FloatField()),
+                ('rows', models.BigIntegerField(blank=True, null=True)),
+                ('endpoint', models.CharField(blank=True, max_length=200)),
+                ('username', models.CharField(blank=True, max_length=150)),
+                ('database', models.CharField(max_length=100)),
+                ('plan', models.TextField(blank=True)),
+                ('plan_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_slowquery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchShapeStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shape_key', models.CharField(max_length=40, unique=True)),
+                ('table_name', models.CharField(db_index=True, max_length=100)),
+                ('equality', models.TextField(blank=True)),
+                ('ranges', models.TextField(blank=True)),
+                ('sort', models.TextField(blank=True)),
+                ('hits', models.BigIntegerField(default=0)),
+                ('last_seen', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -102,3 +102,45 @@ class TabInterface(models.Model):
                 is_default=True
             ).exclude(id=self.id).update(is_default=False)
         super().save(*args, **kwargs)
+
+class TableRowCount(models.Model):
+    """Row counter for a grid table, kept up to date by the grid write endpoints."""
+    table_name = models.CharField(max_length=100, unique=True)
+    row_count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.table_name} - {self.row_count}"
+
+class SlowQuery(models.Model):
+    """A statement that ran longer than GRID_SLOW_QUERY_MS for a request, with its plan (see core.slowlog)."""
+    fingerprint = models.CharField(max_length=40, db_index=True)
+    sql = models.TextField()
+    params = models.JSONField(null=True, blank=True)
+    duration_ms = models.FloatField()
+    rows = models.BigIntegerField(null=True, blank=True)
+    endpoint = models.CharField(max_length=200, blank=True)
+    username = models.CharField(max_length=150, blank=True)
+    database = models.CharField(max_length=100)
+    plan = models.TextField(blank=True)
+    plan_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.endpoint} - {self.duration_ms:.0f} ms"
+
+class SearchShapeStat(models.Model):
+    """How often api_search ran a filter / sort shape on a table (see core.search_stats)."""
+    shape_key = models.CharField(max_length=40, unique=True)
+    table_name = models.CharField(max_length=100, db_index=True)
+    equality = models.TextField(blank=True)   # equal / IN fields, comma-separated
+    ranges = models.TextField(blank=True)     # greater / less fields, comma-separated
+    sort = models.TextField(blank=True)       # "field asc|desc" keys, comma-separated
+    hits = models.BigIntegerField(default=0)
+    last_seen = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.table_name} - {self.hits}"
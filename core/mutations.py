@@ -0,0 +1,79 @@
+"""
+Filter-based bulk delete / field update for the grid.
+
+Matching rows are walked in primary-key order, GRID_MUTATION_CHUNK_SIZE ids at a time; each
+chunk is changed and committed in its own short transaction, so a large cleanup never holds
+locks on the whole match set. Progress is reported as one dict per chunk.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .bulk import check_value
+from .counts import adjust_row_count
+from .query import compile_select, execute
+
+
+def mutation_chunk_size():
+    return max(int(getattr(settings, 'GRID_MUTATION_CHUNK_SIZE', 1000)), 1)
+
+
+def validate_assignments(schema, values):
+    """Check a {field: value} dict for an update. Returns (assignments, error)."""
+    if not isinstance(values, dict) or not values:
+        return None, 'No fields to update.'
+    assignments = {}
+    for name, value in values.items():
+        field = schema.field(name)
+        if field is None or name == 'id':
+            return None, f"Unknown field: {name}"
+        if isinstance(value, str):
+            value = value.strip() if name == 'job' else value
+            if value == '':
+                value = None
+        error = check_value(field, value)
+        if error:
+            return None, error
+        assignments[name] = value
+    return assignments, None
+
+
+def iter_id_chunks(cursor, table_name, joins_job, filter_shape, params, size):
+    """Yield lists of matching ids in ascending order, size ids at a time."""
+    last_id = None
+    while True:
+        seek_mask = None if last_id is None else (False,)
+        sql, _ = compile_select(
+            table_name, ('id',), joins_job, filter_shape, (('id', 'asc'),), seek_mask, True
+        )
+        seek = [] if last_id is None else [last_id]
+        execute(cursor, sql, list(params) + seek + [size])
+        ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return
+        yield ids
+        if len(ids) < size:
+            return
+        last_id = ids[-1]
+
+
+def run_mutation(cursor, table_name, joins_job, filter_shape, params, action, assignments=None):
+    """Delete or update every matching row chunk by chunk, yielding progress after each chunk."""
+    processed = 0
+    affected = 0
+    set_sql = ', '.join(f"{name} = %s" for name in assignments or ())
+    for ids in iter_id_chunks(cursor, table_name, joins_job, filter_shape, params, mutation_chunk_size()):
+        placeholders = ','.join(['%s'] * len(ids))
+        # Each chunk commits on its own, with its row-count adjustment
+        with transaction.atomic():
+            if action == 'delete':
+                cursor.execute(f"DELETE FROM {table_name} WHERE id IN ({placeholders})", ids)
+                adjust_row_count(table_name, -cursor.rowcount)
+            else:
+                cursor.execute(
+                    f"UPDATE {table_name} SET {set_sql} WHERE id IN ({placeholders})",
+                    list(assignments.values()) + ids
+                )
+            count = cursor.rowcount
+        processed += len(ids)
+        affected += count
+        yield {'processed': processed, 'affected': affected}
@@ -0,0 +1,49 @@
+"""
+Cached dropdown options for api_options.
+
+The rows of a field's search_config.lookup_sql are cached per (table, field) for
+GRID_OPTIONS_TTL seconds. Cache keys carry the grid config version and an options version,
+so editing search_config (bump_config_version) or calling invalidate_options() after
+writing to a lookup table drops every cached list at once.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import record_cache
+from .registry import config_version
+from .routing import read_connection
+from .versions import bump_version, shared_version
+
+OPTIONS_VERSION_KEY = 'grid_options_version'
+
+
+def options_version():
+    return shared_version(OPTIONS_VERSION_KEY)
+
+
+def invalidate_options():
+    """Drop every cached option list, e.g. after a row was added to a lookup table."""
+    bump_version(OPTIONS_VERSION_KEY)
+
+
+def option_list(table_name, field):
+    """All (id, text) options of a field, from the cache or its lookup_sql."""
+    key = f"grid_options:{config_version()}:{options_version()}:{table_name}:{field.name}"
+    options = cache.get(key)
+    record_cache('options', options is not None)
+    if options is None:
+        cursor = read_connection().cursor()
+        cursor.execute(field.lookup_sql)
+        options = [(r[0], r[1]) for r in cursor.fetchall()]
+        cache.set(key, options, getattr(settings, 'GRID_OPTIONS_TTL', 300))
+    return options
+
+
+def option_page(options, q='', page=1, page_size=None):
+    """Filter options by a case-insensitive substring of their text and slice one page. Returns (page, more)."""
+    page_size = page_size or getattr(settings, 'GRID_OPTIONS_PAGE_SIZE', 50)
+    q = q.casefold()
+    if q:
+        options = [opt for opt in options if opt[1] is not None and q in str(opt[1]).casefold()]
+    start = (page - 1) * page_size
+    return options[start:start + page_size], len(options) > start + page_size
@@ -0,0 +1,108 @@
+import base64
+import datetime
+import decimal
+import json
+
+from django.conf import settings
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded or does not fit the request."""
+
+
+def clamp_page_size(value):
+    """Return a page size bounded by GRID_MAX_PAGE_SIZE, falling back to GRID_PAGE_SIZE."""
+    default = getattr(settings, 'GRID_PAGE_SIZE', 100)
+    maximum = getattr(settings, 'GRID_MAX_PAGE_SIZE', 1000)
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    if size < 1:
+        return default
+    return min(size, maximum)
+
+
+def _cursor_value(value):
+    # Keep full precision so the seek predicate lands exactly on the last row
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(keys, row, direction):
+    """Build an opaque cursor token from the sort key values of a row."""
+    payload = {
+        'k': [[field, order] for field, order in keys],
+        'v': [_cursor_value(row.get(field)) for field, order in keys],
+        'd': direction,
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, keys):
+    """Decode a cursor token and check it was issued for the same sort keys. Returns (values, direction)."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = payload['v']
+        direction = payload['d']
+        cursor_keys = [tuple(item) for item in payload['k']]
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise CursorError('Invalid cursor.')
+    if cursor_keys != list(keys) or len(values) != len(keys) or direction not in ('next', 'prev'):
+        raise CursorError('Cursor does not match the current sort.')
+    return values, direction
+
+
+def _after(expr, order, index, is_null, indexes):
+    # NULLs sort first in ascending order on both MySQL and SQLite
+    if order == 'asc':
+        if is_null:
+            return f"{expr} IS NOT NULL"
+        indexes.append(index)
+        return f"{expr} > %s"
+    if is_null:
+        return None
+    indexes.append(index)
+    return f"({expr} < %s OR {expr} IS NULL)"
+
+
+def _equal(expr, index, is_null, indexes):
+    if is_null:
+        return f"{expr} IS NULL"
+    indexes.append(index)
+    return f"{expr} = %s"
+
+
+def build_seek_clause(key_exprs, null_mask):
+    """
+    Build the keyset predicate selecting rows strictly after the cursor position.
+    key_exprs is a list of (sql_expression, 'asc'|'desc') ending with a unique key (id);
+    null_mask flags which cursor values are NULL, since that changes the SQL text.
+    Returns (sql, indexes) where indexes picks the cursor values for each placeholder.
+    """
+    branches = []
+    indexes = []
+    for i, (expr, order) in enumerate(key_exprs):
+        branch_indexes = []
+        parts = [_equal(key_exprs[j][0], j, null_mask[j], branch_indexes) for j in range(i)]
+        after = _after(expr, order, i, null_mask[i], branch_indexes)
+        if after is None:
+            continue
+        parts.append(after)
+        branches.append('(' + ' AND '.join(parts) + ')')
+        indexes.extend(branch_indexes)
+    if not branches:
+        return '1 = 0', []
+    return '(' + ' OR '.join(branches) + ')', indexes
+
+
+def reverse_order(order):
+    return 'desc' if order == 'asc' else 'asc'
+
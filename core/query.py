@@ -0,0 +1,229 @@
+"""
+Shared SQL builder for the dynamic grid endpoints.
+
+A request is reduced to a *shape*: table, projection, the (field, operator, arity) of each
+filter, the sort keys and, for keyset pages, which cursor values are NULL. Each shape is
+compiled to SQL text once and kept in an LRU cache; values only ever travel as parameters.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+
+from .fulltext import fulltext_terms, match_query, match_sql
+from .pagination import build_seek_clause, decode_cursor, encode_cursor, reverse_order
+
+SQL_CACHE_SIZE = getattr(settings, 'GRID_SQL_CACHE_SIZE', 256)
+
+# Search operator -> SQL comparison
+OPERATOR_MAP = {
+    'equal': '=',
+    'contains': 'LIKE',
+    'greater': '>',
+    'less': '<',
+    'GSearch': 'LIKE',
+    'not_equal': '!=',
+    'not_contains': 'NOT LIKE',
+    'IN': 'IN',
+}
+
+# Keys of the search body that are not field filters
+RESERVED_KEYS = ('sort', 'page_size', 'cursor', 'count')
+
+
+class QueryError(ValueError):
+    """Raised when a search request references fields the table does not expose."""
+
+
+def column_expr(field, joins_job):
+    """SQL expression for a grid field; job is shown through the job join."""
+    if field == 'job' and joins_job:
+        return 'j.name'
+    return f"t.{field}"
+
+
+def _select_expr(field, joins_job):
+    if field == 'job' and joins_job:
+        return 'j.name AS job'
+    return f"t.{field}"
+
+
+def _from_sql(table_name, joins_job):
+    if joins_job:
+        return f"FROM {table_name} t LEFT JOIN job j ON t.job = j.id"
+    return f"FROM {table_name} t"
+
+
+def _where_parts(table_name, filter_shape, joins_job):
+    parts = []
+    for field, op, arity in filter_shape:
+        expr = column_expr(field, joins_job)
+        if op in ('match', 'not_match'):
+            parts.append(match_sql(table_name, field, op == 'not_match'))
+        elif op == 'IN':
+            if arity:
+                parts.append(f"{expr} IN ({','.join(['%s'] * arity)})")
+            else:
+                parts.append('1 = 0')
+        else:
+            parts.append(f"{expr} {OPERATOR_MAP[op]} %s")
+    return parts
+
+
+def compile_filters(schema, filters):
+    """
+    Split a search body into a hashable filter shape and its parameter list.
+    Unknown operators are skipped, as before; unknown fields raise QueryError.
+    contains-style filters on full-text fields compile to the internal match/not_match operators.
+    """
+    shape = []
+    params = []
+    for field, cond in filters.items():
+        if field in RESERVED_KEYS:
+            continue
+        if field != 'id' and field not in schema.by_name:
+            raise QueryError(f"Unknown field: {field}")
+        if not isinstance(cond, dict):
+            continue
+        op = cond.get('operator')
+        val = cond.get('value')
+        if op in ('contains', 'GSearch', 'not_contains'):
+            spec = schema.by_name.get(field)
+            # The job filter compares the joined job.name, which has no full-text index
+            terms = fulltext_terms(val) if spec is not None and spec.fulltext and field != 'job' else None
+            if terms:
+                shape.append((field, 'not_match' if op == 'not_contains' else 'match', 1))
+                params.append(match_query(field, terms))
+            else:
+                shape.append((field, op, 1))
+                params.append(f"%{val}%")
+        elif op in ('equal', 'greater', 'less', 'not_equal'):
+            shape.append((field, op, 1))
+            params.append(val)
+        elif op == 'IN' and isinstance(val, list):
+            shape.append((field, op, len(val)))
+            params.extend(val)
+    return tuple(shape), params
+
+
+def compile_sort(schema, sort, default=(('id', 'desc'),)):
+    """Validated (field, order) sort keys from a search body's sort array."""
+    keys = []
+    if isinstance(sort, list):
+        for s in sort:
+            if not isinstance(s, dict):
+                continue
+            field = s.get('field')
+            direction = (s.get('direction') or '').lower()
+            if direction in ('asc', 'desc') and (field == 'id' or field in schema.by_name):
+                keys.append((field, direction))
+    return tuple(keys) or tuple(default)
+
+
+def keyset_keys(sort_keys):
+    """Sort keys for keyset paging: cut at id, or append id as the tie-breaker."""
+    keys = []
+    for field, order in sort_keys:
+        keys.append((field, order))
+        if field == 'id':
+            # id is unique, so any later keys can never break a tie
+            return tuple(keys)
+    return tuple(keys) + (('id', 'asc'),)
+
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def compile_select(table_name, projection, joins_job, filter_shape=(), order_keys=(), seek_mask=None, limit=False):
+    """
+    Compile a grid SELECT. seek_mask (a tuple of NULL flags, one per order key) adds the keyset
+    predicate for rows after the cursor. Returns (sql, seek_indexes).
+    """
+    select_sql = ', '.join(_select_expr(f, joins_job) for f in projection)
+    where = _where_parts(table_name, filter_shape, joins_job)
+    seek_indexes = ()
+    if seek_mask is not None:
+        key_exprs = [(column_expr(f, joins_job), o) for f, o in order_keys]
+        seek_sql, indexes = build_seek_clause(key_exprs, seek_mask)
+        where.append(seek_sql)
+        seek_indexes = tuple(indexes)
+    sql = f"SELECT {select_sql} {_from_sql(table_name, joins_job)}"
+    if where:
+        sql += f" WHERE {' AND '.join(where)}"
+    if order_keys:
+        sql += ' ORDER BY ' + ', '.join(f"{column_expr(f, joins_job)} {o.upper()}" for f, o in order_keys)
+    if limit:
+        sql += ' LIMIT %s'
+    return sql, seek_indexes
+
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def compile_count(table_name, joins_job, filter_shape=()):
+    """Compile SELECT COUNT(*) over the same rows as compile_select."""
+    # The job LEFT JOIN never changes the row count, so only keep it when a filter needs job.name
+    joins_job = joins_job and any(field == 'job' for field, _, _ in filter_shape)
+    where = _where_parts(table_name, filter_shape, joins_job)
+    sql = f"SELECT COUNT(*) {_from_sql(table_name, joins_job)}"
+    if where:
+        sql += f" WHERE {' AND '.join(where)}"
+    return sql
+
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def compile_record(table_name, projection, joins_job):
+    """Compile the single-record lookup by id."""
+    select_sql = ', '.join(_select_expr(f, joins_job) for f in projection)
+    return f"SELECT {select_sql} {_from_sql(table_name, joins_job)} WHERE t.id = %s"
+
+
+def search_projection(schema):
+    """id followed by every search_config field, as returned by api_search."""
+    return ('id',) + tuple(f for f in schema.field_names if f != 'id')
+
+
+def execute(cursor, sql, params=()):
+    """Execute compiled grid SQL."""
+    cursor.execute(sql, list(params))
+
+
+def fetch_all(cursor, sql, params=()):
+    execute(cursor, sql, params)
+    return cursor.fetchall()
+
+
+def fetch_page(cursor, table_name, projection, joins_job, filter_shape, filter_params, keys, page_size, token=None,
+               as_dicts=True):
+    """
+    Run one keyset page and map rows to dicts keyed by projection (or leave them as tuples
+    in projection order with as_dicts=False).
+    keys are the (field, order) sort keys ending with id (see keyset_keys).
+    Returns (rows, next_cursor, prev_cursor).
+    """
+    direction = 'next'
+    order_keys = keys
+    seek_mask = None
+    values = []
+    if token:
+        values, direction = decode_cursor(token, keys)
+        if direction == 'prev':
+            order_keys = tuple((f, reverse_order(o)) for f, o in keys)
+        seek_mask = tuple(v is None for v in values)
+    sql, seek_indexes = compile_select(
+        table_name, tuple(projection), joins_job, filter_shape, tuple(order_keys), seek_mask, True
+    )
+    params = list(filter_params) + [values[i] for i in seek_indexes] + [page_size + 1]
+    execute(cursor, sql, params)
+    rows = cursor.fetchall()
+    has_more = len(rows) > page_size
+    rows = list(rows[:page_size])
+    if direction == 'prev':
+        rows.reverse()
+    # Cursors only need the boundary rows as dicts
+    first = dict(zip(projection, rows[0])) if rows else None
+    last = dict(zip(projection, rows[-1])) if rows else None
+    if direction == 'prev':
+        prev_cursor = encode_cursor(keys, first, 'prev') if has_more else None
+        next_cursor = encode_cursor(keys, last, 'next') if rows else None
+    else:
+        next_cursor = encode_cursor(keys, last, 'next') if has_more else None
+        prev_cursor = encode_cursor(keys, first, 'prev') if token and rows else None
+    if as_dicts:
+        rows = [dict(zip(projection, row)) for row in rows]
+    return rows, next_cursor, prev_cursor
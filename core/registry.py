@@ -0,0 +1,184 @@
+"""
+Process-wide registry of grid metadata compiled from the search_config and forms tables.
+
+Each worker memoizes immutable TableSchema / GridView objects and drops them all when the
+shared config version (see core.versions) changes; other workers notice a bump within
+GRID_VERSION_CHECK_INTERVAL seconds. Call bump_config_version(), or run
+`manage.py reload_grid_config`, after editing search_config or forms.
+"""
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from django.db import connection
+
+from .metrics import record_cache
+from .versions import bump_version, shared_version
+
+CONFIG_VERSION_KEY = 'grid_config_version'
+
+_lock = threading.Lock()
+_memo_version = None
+_tables = {}
+_views = {}
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    label: str
+    type: str
+    operator_tags: str
+    lookup_sql: str
+    mandatory: bool
+    fulltext: bool = False   # search_config.fulltext_search: contains/GSearch use a full-text index
+
+    @property
+    def operators(self):
+        return tuple(op.strip() for op in (self.operator_tags or '').split(',') if op.strip())
+
+    def as_dict(self):
+        return {
+            'label': self.label,
+            'name': self.name,
+            'type': self.type,
+            'operator_tags': self.operator_tags,
+            'lookup_sql': self.lookup_sql,
+            'mandatory': self.mandatory,
+            'fulltext': self.fulltext,
+        }
+
+
+@dataclass(frozen=True)
+class TableSchema:
+    table_name: str
+    fields: tuple               # Field objects in search_config order
+    by_name: MappingProxyType   # field name -> Field
+
+    @property
+    def field_names(self):
+        return tuple(f.name for f in self.fields)
+
+    @property
+    def joins_job(self):
+        """The job column holds a job.id and is shown through a join on job.name."""
+        return 'job' in self.by_name
+
+    def field(self, name):
+        return self.by_name.get(name)
+
+
+@dataclass(frozen=True)
+class GridView:
+    tableview: str
+    table_name: str
+    projection: tuple   # field names from forms, always including id
+    columns: tuple      # (label, field_name) pairs shown in the grid, id excluded
+    schema: TableSchema
+
+    @property
+    def joins_job(self):
+        return 'job' in self.projection
+
+    @property
+    def id_index(self):
+        return self.projection.index('id')
+
+    @property
+    def column_indexes(self):
+        """Positions of the shown columns in projection-ordered row tuples."""
+        return tuple(self.projection.index(name) for _, name in self.columns)
+
+
+def config_version():
+    """Return the shared config version, seeding it if the cache has none."""
+    return shared_version(CONFIG_VERSION_KEY)
+
+
+def bump_config_version():
+    """Invalidate compiled metadata in every worker sharing the cache."""
+    _sync(bump_version(CONFIG_VERSION_KEY))
+
+
+def _sync(version):
+    global _memo_version
+    if version != _memo_version:
+        with _lock:
+            if version != _memo_version:
+                _tables.clear()
+                _views.clear()
+                _memo_version = version
+
+
+def has_fulltext_column(cursor):
+    """search_config.fulltext_search is optional; `manage.py sync_fulltext` adds it."""
+    columns = connection.introspection.get_table_description(cursor, 'search_config')
+    return any(col.name == 'fulltext_search' for col in columns)
+
+
+def _load_table_schema(table_name):
+    cursor = connection.cursor()
+    fulltext_sql = 'fulltext_search' if has_fulltext_column(cursor) else '0'
+    cursor.execute(
+        "SELECT field_name, field_label, field_type, operator_tags, lookup_sql, mandatory, "
+        f"{fulltext_sql} FROM search_config WHERE table_name = %s ORDER BY id",
+        [table_name]
+    )
+    fields = tuple(
+        Field(name=row[0], label=row[1], type=row[2], operator_tags=row[3], lookup_sql=row[4], mandatory=row[5],
+              fulltext=bool(row[6]))
+        for row in cursor.fetchall()
+    )
+    return TableSchema(table_name=table_name, fields=fields, by_name=MappingProxyType({f.name: f for f in fields}))
+
+
+def _load_grid_view(tableview):
+    cursor = connection.cursor()
+    cursor.execute("SELECT * FROM forms WHERE tableview = %s", [tableview])
+    form_row = cursor.fetchone()
+    if not form_row:
+        return None
+    # forms columns: [2] comma-separated field list, [3] underlying table name
+    projection = [f.strip() for f in form_row[2].split(',')]
+    if 'id' not in projection:
+        projection = ['id'] + projection
+    schema = get_table_schema(form_row[3])
+    columns = tuple(
+        (schema.by_name[name].label, name)
+        for name in projection
+        if name.lower() != 'id' and name in schema.by_name
+    )
+    return GridView(
+        tableview=tableview,
+        table_name=form_row[3],
+        projection=tuple(projection),
+        columns=columns,
+        schema=schema,
+    )
+
+
+def get_table_schema(table_name):
+    """Return the compiled TableSchema for a table (fields may be empty if it is not configured)."""
+    version = config_version()
+    _sync(version)
+    schema = _tables.get(table_name)
+    record_cache('table_schema', schema is not None)
+    if schema is None:
+        schema = _load_table_schema(table_name)
+        # Don't memoize a schema read under a version that was bumped meanwhile
+        if version == _memo_version:
+            _tables[table_name] = schema
+    return schema
+
+
+def get_grid_view(tableview):
+    """Return the GridView for a forms.tableview, or None if no such form exists."""
+    version = config_version()
+    _sync(version)
+    record_cache('grid_view', tableview in _views)
+    if tableview in _views:
+        return _views[tableview]
+    view = _load_grid_view(tableview)
+    if version == _memo_version:
+        _views[tableview] = view
+    return view
@@ -0,0 +1,113 @@
+"""
+Read-replica routing for the grid's read-only endpoints.
+
+Views decorated with replica_reads read from one of GRID_READ_REPLICAS (picked at random
+per request): ReplicaRouter sends their ORM reads there, and raw SQL goes through
+read_connection(). Everything else, writes included, stays on the primary ('default'), so
+sessions, auth and read-modify-write paths never see replication lag.
+
+ReplicaStickinessMiddleware gives read-your-writes: after a successful POST / PUT / PATCH /
+DELETE to any view that is not a replica reader, the user's session stays on the primary
+for GRID_PRIMARY_STICKY_SECONDS.
+"""
+import asyncio
+import contextvars
+import random
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.deprecation import MiddlewareMixin
+
+STICKY_SESSION_KEY = 'grid_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_read_alias = contextvars.ContextVar('grid_read_alias', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in getattr(settings, 'GRID_READ_REPLICAS', ()) if alias in settings.DATABASES]
+
+
+def sticky_until(request):
+    session = getattr(request, 'session', None)
+    return session.get(STICKY_SESSION_KEY, 0) if session is not None else 0
+
+
+def pin_to_primary(request):
+    """Keep this user's reads on the primary for the sticky window."""
+    request.session[STICKY_SESSION_KEY] = time.time() + getattr(settings, 'GRID_PRIMARY_STICKY_SECONDS', 5)
+
+
+def choose_read_alias(request):
+    replicas = replica_aliases()
+    if not replicas or sticky_until(request) > time.time():
+        return DEFAULT_DB_ALIAS
+    return random.choice(replicas)
+
+
+def read_alias():
+    """The alias the current request reads from."""
+    return _read_alias.get() or DEFAULT_DB_ALIAS
+
+
+def read_connection():
+    return connections[read_alias()]
+
+
+def replica_reads(view):
+    """Run a read-only view against a replica (unless the user is pinned to the primary)."""
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            # The session may not be loaded yet, which is database work
+            token = _read_alias.set(await sync_to_async(choose_read_alias)(request))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _read_alias.reset(token)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            token = _read_alias.set(choose_read_alias(request))
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _read_alias.reset(token)
+    wrapper.replica_reads = True
+    return wrapper
+
+
+class ReplicaRouter:
+    """Reads follow the current request's read alias; writes and migrations go to the primary."""
+
+    def db_for_read(self, model, **hints):
+        # DatabaseCache entries (version stamps included) must not lag behind the primary
+        if model._meta.app_label == 'django_cache':
+            return DEFAULT_DB_ALIAS
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return False if db in replica_aliases() else None
+
+
+class ReplicaStickinessMiddleware(MiddlewareMixin):
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._grid_replica_reads = getattr(view_func, 'replica_reads', False)
+
+    def process_response(self, request, response):
+        if (request.method not in SAFE_METHODS and response.status_code < 400
+                and not getattr(request, '_grid_replica_reads', True)
+                and hasattr(request, 'session') and replica_aliases()):
+            pin_to_primary(request)
+        return response
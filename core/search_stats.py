@@ -0,0 +1,139 @@
+"""
+Which filter / sort shapes api_search runs per table, for `manage.py advise_indexes`.
+
+A shape keeps only what an index could serve:
+- equality fields (equal / IN)
+- range fields (greater / less)
+- the sort keys
+
+LIKE, != and full-text filters are left out, and so is the job field where it is shown
+through the job join. Each worker counts shapes in memory. A background thread adds the
+counts to SearchShapeStat rows every GRID_SEARCH_STATS_FLUSH_INTERVAL seconds, and once
+more at exit. Setting the interval to None turns the counting off.
+"""
+import atexit
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import IntegrityError, connections
+from django.db.models import F
+from django.utils import timezone
+
+EQUALITY_OPS = ('equal', 'IN')
+RANGE_OPS = ('greater', 'less')
+
+_counts = {}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+_flushing = False
+_executor = None
+
+
+def index_shape(schema, filter_shape, sort_keys):
+    """(equality, ranges, sort) of a compiled search, as sorted field tuples and (field, order) keys."""
+    def indexable(field):
+        # job filters and sorts compare the joined job.name
+        return not (field == 'job' and schema.joins_job)
+
+    equality, ranges = set(), set()
+    for field, op, arity in filter_shape:
+        if not indexable(field):
+            continue
+        if op in EQUALITY_OPS and arity:
+            equality.add(field)
+        elif op in RANGE_OPS:
+            ranges.add(field)
+    sort = []
+    for field, order in sort_keys:
+        if not indexable(field):
+            break
+        sort.append((field, order))
+    return tuple(sorted(equality)), tuple(sorted(ranges - equality)), tuple(sort)
+
+
+def shape_fields(table_name, shape):
+    """SearchShapeStat field values for a shape."""
+    equality, ranges, sort = shape
+    return {
+        'table_name': table_name,
+        'equality': ','.join(equality),
+        'ranges': ','.join(ranges),
+        'sort': ','.join(f"{field} {order}" for field, order in sort),
+    }
+
+
+def parse_shape(stat):
+    """The shape of a SearchShapeStat row."""
+    def split(value):
+        return tuple(v for v in value.split(',') if v)
+    sort = tuple(tuple(key.split(' ', 1)) for key in split(stat.sort))
+    return split(stat.equality), split(stat.ranges), sort
+
+
+def _flush_interval():
+    return getattr(settings, 'GRID_SEARCH_STATS_FLUSH_INTERVAL', 60)
+
+
+def record_search(table_name, schema, filter_shape, sort_keys):
+    """Count one api_search run; cheap enough for every request."""
+    global _flushing, _executor
+    interval = _flush_interval()
+    if interval is None:
+        return
+    key = (table_name, index_shape(schema, filter_shape, sort_keys))
+    with _lock:
+        _counts[key] = _counts.get(key, 0) + 1
+        if _flushing or time.monotonic() - _last_flush < interval:
+            return
+        _flushing = True
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='grid-search-stats')
+    _executor.submit(_flush_in_background)
+
+
+def _flush_in_background():
+    global _flushing
+    try:
+        flush()
+    except Exception:
+        # Telemetry must never take anything else down; the counts are lost
+        pass
+    finally:
+        # No request cycle closes this thread's connections (or returns them to the pool)
+        connections.close_all()
+        with _lock:
+            _flushing = False
+
+
+def flush():
+    """Add this process's counts since the last flush to SearchShapeStat."""
+    from .models import SearchShapeStat
+
+    global _counts, _last_flush
+    with _lock:
+        counts, _counts = _counts, {}
+        _last_flush = time.monotonic()
+    now = timezone.now()
+    for (table_name, shape), hits in counts.items():
+        fields = shape_fields(table_name, shape)
+        shape_key = hashlib.sha1('|'.join(fields.values()).encode('utf-8')).hexdigest()
+        stats = SearchShapeStat.objects.filter(shape_key=shape_key)
+        if stats.update(hits=F('hits') + hits, last_seen=now):
+            continue
+        try:
+            SearchShapeStat.objects.create(shape_key=shape_key, hits=hits, last_seen=now, **fields)
+        except IntegrityError:
+            # Another worker added the shape at the same moment
+            stats.update(hits=F('hits') + hits, last_seen=now)
+
+
+@atexit.register
+def _flush_at_exit():
+    if _counts:
+        try:
+            flush()
+        except Exception:
+            pass
@@ -0,0 +1,17 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+
+from .menus import bump_menu_version
+from .metrics import install_query_metrics
+from .models import Menu, RoleMenu, UserRole
+from .slowlog import install_slow_query_log
+
+# Cached menu trees and per-user role lists are invalidated by any change to these models
+for model in (Menu, RoleMenu, UserRole):
+    post_save.connect(bump_menu_version, sender=model, dispatch_uid=f'menu_version_{model.__name__}_save')
+    post_delete.connect(bump_menu_version, sender=model, dispatch_uid=f'menu_version_{model.__name__}_delete')
+
+# Per-request query metrics on every database connection
+connection_created.connect(install_query_metrics, dispatch_uid='grid_query_metrics')
+# Slow statements (when GRID_SLOW_QUERY_MS is set) with their plans
+connection_created.connect(install_slow_query_log, dispatch_uid='grid_slow_query_log')
@@ -0,0 +1,192 @@
+"""
+Opt-in slow-query log for the SQL the grid builds per request (filters, sorts, lookup_sql).
+
+While GRID_SLOW_QUERY_MS is set, an execute wrapper on every connection times each statement
+run for a request. Statements at or above the threshold are sampled at
+GRID_SLOW_QUERY_SAMPLE_RATE. For each sampled statement, a background thread runs EXPLAIN on
+the same database and stores a SlowQuery row (see the admin) with:
+- the normalized SQL and its fingerprint
+- the parameters (only their types unless GRID_SLOW_QUERY_REDACT_PARAMS is False)
+- duration, rows, endpoint and user
+- the plan
+
+Nothing is queued beyond GRID_SLOW_QUERY_QUEUE pending statements, so a burst of slow
+queries cannot back up the workers.
+
+Only SELECTs are explained. GRID_SLOW_QUERY_EXPLAIN = 'analyze' uses MySQL's EXPLAIN
+ANALYZE, which runs the query a second time.
+"""
+import hashlib
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from django.utils.functional import empty
+
+from .metrics import current_request, request_endpoint
+
+# Literals and placeholders become ?, lists of them (IN (...), VALUES) one (?+)
+_NORMALIZE = (
+    (re.compile(r"'(?:[^'\\]|\\.|'')*'"), '?'),
+    (re.compile(r'(?<![\w@])-?\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s|%\(\w+\)s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)'), '(?+)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+_executor = None
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def slow_query_threshold():
+    """Threshold in milliseconds, or None when the log is off."""
+    return getattr(settings, 'GRID_SLOW_QUERY_MS', None)
+
+
+def normalize(sql):
+    for pattern, replacement in _NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode('utf-8')).hexdigest()
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def redact(params):
+    if params is None:
+        return None
+    values = params.values() if isinstance(params, dict) else params
+    if getattr(settings, 'GRID_SLOW_QUERY_REDACT_PARAMS', True):
+        return [type(value).__name__ for value in values]
+    return [_json_value(value) for value in values]
+
+
+def _username(request):
+    # Only a user the request already loaded; loading it here would run more queries
+    user = getattr(request, 'user', None)
+    if user is None or getattr(user, '_wrapped', None) is empty:
+        return ''
+    return user.get_username() if user.is_authenticated else ''
+
+
+def _explain_prefix(vendor):
+    mode = getattr(settings, 'GRID_SLOW_QUERY_EXPLAIN', 'plan')
+    if mode is None:
+        return None
+    analyze = mode == 'analyze'
+    if vendor == 'mysql':
+        return 'EXPLAIN ANALYZE ' if analyze else 'EXPLAIN FORMAT=JSON '
+    if vendor == 'postgresql':
+        return 'EXPLAIN (ANALYZE, FORMAT JSON) ' if analyze else 'EXPLAIN (FORMAT JSON) '
+    if vendor == 'sqlite':
+        return 'EXPLAIN QUERY PLAN '
+    return None
+
+
+def explain(alias, sql, params):
+    """(plan, error) for a SELECT on the given database."""
+    if not re.match(r'\s*(\(\s*)*(SELECT|WITH)\b', sql, re.I):
+        return '', 'Only SELECT statements are explained.'
+    connection = connections[alias]
+    prefix = _explain_prefix(connection.vendor)
+    if prefix is None:
+        return '', f'No EXPLAIN configured for {connection.vendor}.'
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        names = [col[0] for col in cursor.description]
+        rows = cursor.fetchall()
+    if len(rows) == 1 and len(names) == 1:
+        # JSON / tree formats come back as a single value
+        return str(rows[0][0]), ''
+    lines = ['\t'.join(names)] + ['\t'.join('' if v is None else str(v) for v in row) for row in rows]
+    return '\n'.join(lines), ''
+
+
+def _record(entry):
+    from .models import SlowQuery
+
+    global _pending
+    try:
+        try:
+            plan, error = explain(entry['database'], entry['statement'], entry['params'])
+        except Exception as e:
+            plan, error = '', str(e)
+        SlowQuery.objects.create(
+            fingerprint=fingerprint(entry['sql']),
+            sql=entry['sql'],
+            params=redact(entry['params']),
+            duration_ms=entry['duration_ms'],
+            rows=entry['rows'],
+            endpoint=entry['endpoint'],
+            username=entry['username'],
+            database=entry['database'],
+            plan=plan,
+            plan_error=error,
+        )
+        keep_days = getattr(settings, 'GRID_SLOW_QUERY_KEEP_DAYS', 14)
+        if keep_days:
+            SlowQuery.objects.filter(created_at__lt=timezone.now() - timedelta(days=keep_days)).delete()
+    except Exception:
+        # The log must never take anything else down
+        pass
+    finally:
+        # No request cycle closes this thread's connections (or returns them to the pool)
+        connections.close_all()
+        with _pending_lock:
+            _pending -= 1
+
+
+def _submit(entry):
+    global _executor, _pending
+    with _pending_lock:
+        if _pending >= getattr(settings, 'GRID_SLOW_QUERY_QUEUE', 100):
+            return
+        _pending += 1
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='grid-slowlog')
+    _executor.submit(_record, entry)
+
+
+def _slow_query_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration_ms = (time.perf_counter() - started) * 1000
+    threshold = slow_query_threshold()
+    if threshold is None or duration_ms < threshold or many:
+        return result
+    # Only statements run for a request; this also skips the log's own EXPLAINs
+    request = current_request()
+    if request is None or random.random() >= getattr(settings, 'GRID_SLOW_QUERY_SAMPLE_RATE', 1.0):
+        return result
+    connection, cursor = context['connection'], context['cursor']
+    _submit({
+        'sql': normalize(sql),
+        'statement': sql,
+        'params': params,
+        'duration_ms': duration_ms,
+        'rows': cursor.rowcount if cursor.description is not None and cursor.rowcount >= 0 else None,
+        'endpoint': request_endpoint(request),
+        'username': _username(request),
+        'database': connection.alias,
+    })
+    return result
+
+
+def install_slow_query_log(sender, connection, **kwargs):
+    """connection_created receiver: time statements on the connection while the log is on."""
+    if slow_query_threshold() is not None and _slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _slow_query_wrapper)
@@ -1,11 +1,12 @@
 // dynamic_grid.js
 // Main orchestrator for the dynamic grid UI
-import { updateGrid } from './dynamic_grid/grid.js';
-import { createRecord, updateRecord, deleteRecords, searchRecords, resetGrid } from './dynamic_grid/crud.js';
+import { updateGrid, renderRows } from './dynamic_grid/grid.js';
+import { createRecord, updateRecord, deleteRecords, searchRecords, searchRecordsPage, resetGrid } from './dynamic_grid/crud.js';
 import { formatDateYMDToMDY, showToast } from './dynamic_grid/utils.js';
 import { SearchPatternManager } from './dynamic_grid/search_patterns.js';
+import { armColumnDragger, loadDragger, loadModal, needsColumnOrder } from './dynamic_grid/lazy.js';
 
-// Assumes modal.js is loaded and exposes window.renderFormFields, window.showEditModal, window.renderSearchFields
+// modal.js is loaded on first use (loadModal) and exposes window.renderFormFields, window.showEditModal, window.renderSearchFields
 
 // Global state restoration coordinator
 class GridStateRestorer {
@@ -90,6 +91,112 @@ class GridStateRestorer {
 // Global instance
 window.gridStateRestorer = new GridStateRestorer();
 
+// Infinite scroll over keyset pages from api_search. Only a bounded window of
+// pages is kept in the DOM: pages scrolled far out of view are dropped and
+// fetched again through their cursors when the user scrolls back.
+class InfiniteScroller {
+    constructor(tableName, container, tbody, pageSize, nextCursor, maxPages = 5) {
+        this.tableName = tableName;
+        this.container = container;
+        this.tbody = tbody;
+        this.pageSize = pageSize;
+        this.maxPages = maxPages;
+        this.threshold = 200; // px from either edge that triggers a fetch
+        this.query = { sort: [{ field: 'id', direction: 'asc' }] };
+        this.pages = [{ size: tbody.querySelectorAll('tr[data-record-id]').length, prev: null, next: nextCursor }];
+        this.loading = false;
+        container.addEventListener('scroll', () => this.onScroll());
+    }
+
+    // Start over with a new filter/sort query, replacing the grid body
+    async reset(query) {
+        this.query = query;
+        this.pages = [];
+        this.tbody.innerHTML = '';
+        const data = await searchRecordsPage(this.tableName, this.query, this.pageSize);
+        if (data.error) throw new Error(data.error);
+        this.insertRows(data.data, false);
+        this.pages.push({ size: data.data.length, prev: data.prev, next: data.next });
+        this.container.scrollTop = 0;
+        return data;
+    }
+
+    onScroll() {
+        const { scrollTop, clientHeight, scrollHeight } = this.container;
+        if (scrollTop + clientHeight >= scrollHeight - this.threshold) {
+            this.loadNext();
+        } else if (scrollTop <= this.threshold) {
+            this.loadPrev();
+        }
+    }
+
+    async loadNext() {
+        const last = this.pages[this.pages.length - 1];
+        if (this.loading || !last || !last.next) return;
+        this.loading = true;
+        try {
+            const data = await searchRecordsPage(this.tableName, this.query, this.pageSize, last.next);
+            if (data.error) throw new Error(data.error);
+            this.insertRows(data.data, false);
+            this.pages.push({ size: data.data.length, prev: data.prev, next: data.next });
+            if (this.pages.length > this.maxPages) this.dropPage(true);
+        } catch (error) {
+            console.error('Error loading next page:', error);
+        } finally {
+            this.loading = false;
+        }
+    }
+
+    async loadPrev() {
+        const first = this.pages[0];
+        if (this.loading || !first || !first.prev) return;
+        this.loading = true;
+        try {
+            const data = await searchRecordsPage(this.tableName, this.query, this.pageSize, first.prev);
+            if (data.error) throw new Error(data.error);
+            const before = this.container.scrollHeight;
+            this.insertRows(data.data, true);
+            // Keep the rows the user is looking at in place
+            this.container.scrollTop += this.container.scrollHeight - before;
+            this.pages.unshift({ size: data.data.length, prev: data.prev, next: data.next });
+            if (this.pages.length > this.maxPages) this.dropPage(false);
+        } catch (error) {
+            console.error('Error loading previous page:', error);
+        } finally {
+            this.loading = false;
+        }
+    }
+
+    // Drop the first (fromTop) or last page of rows; the neighbouring page's
+    // cursor brings it back when the user scrolls that way again
+    dropPage(fromTop) {
+        const rows = Array.from(this.tbody.querySelectorAll('tr[data-record-id]'));
+        if (fromTop) {
+            const page = this.pages.shift();
+            const before = this.container.scrollHeight;
+            rows.slice(0, page.size).forEach(row => row.remove());
+            this.container.scrollTop -= before - this.container.scrollHeight;
+        } else {
+            const page = this.pages.pop();
+            rows.slice(rows.length - page.size).forEach(row => row.remove());
+        }
+    }
+
+    // Columns in the current header order, so dragged columns line up
+    currentColumns() {
+        const labels = new Map((window.GRID_COLUMNS || []).map(col => [col[1], col[0]]));
+        return Array.from(document.querySelectorAll('#dynamic-grid-table thead .resizable-column'))
+            .map(th => [labels.get(th.dataset.columnName) || th.dataset.columnName, th.dataset.columnName]);
+    }
+
+    insertRows(rows, atTop) {
+        this.tbody.insertAdjacentHTML(atTop ? 'afterbegin' : 'beforeend', renderRows(this.currentColumns(), rows));
+        if (window.columnVisibilityManager) {
+            window.columnVisibilityManager.applyVisibilityToGrid();
+        }
+    }
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     const addBtn = document.getElementById('add-record-btn');
     const modal = new bootstrap.Modal(document.getElementById('createModal'));
@@ -110,6 +217,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Set table name for state restorer
     window.gridStateRestorer.setTableName(tableName);
+    armColumnDragger(tableName);
     
     let fieldConfigs = [];
     
@@ -120,6 +228,7 @@ document.addEventListener('DOMContentLoaded', function() {
         addBtn.addEventListener('click', function() {
             fetch(`/api/fields/${tableName}/`)
                 .then(res => res.json())
+                .then(data => loadModal().then(() => data))
                 .then(data => {
                     fieldConfigs = data.fields;
                     window.renderFormFields(fieldConfigs, formFieldsDiv, tableName);
@@ -177,27 +286,70 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    // Add double-click event handler to grid rows for Edit
+    // Add double-click event handler to grid rows for Edit (delegated, so rows
+    // appended by infinite scroll are covered too)
     const table = document.querySelector('table.table');
     if (table) {
-        table.querySelectorAll('tbody tr').forEach(row => {
-            row.addEventListener('dblclick', function() {
-                const recordId = row.getAttribute('data-record-id');
-                if (!recordId) return;
-                const fetchFields = fieldConfigs.length === 0
-                    ? fetch(`/api/fields/${tableName}/`).then(res => res.json()).then(data => { fieldConfigs = data.fields; })
-                    : Promise.resolve();
-                fetchFields.then(() => {
-                    fetch(`/api/record/${tableName}/${recordId}/`)
-                        .then(res => res.json())
-                        .then(recordData => {
-                            window.showEditModal(fieldConfigs, recordData, tableName);
-                        });
-                });
+        table.addEventListener('dblclick', function(e) {
+            const row = e.target.closest('tbody tr');
+            if (!row) return;
+            const recordId = row.getAttribute('data-record-id');
+            if (!recordId) return;
+            const fetchFields = fieldConfigs.length === 0
+                ? fetch(`/api/fields/${tableName}/`).then(res => res.json()).then(data => { fieldConfigs = data.fields; })
+                : Promise.resolve();
+            Promise.all([fetchFields, loadModal()]).then(() => {
+                fetch(`/api/record/${tableName}/${recordId}/`)
+                    .then(res => res.json())
+                    .then(recordData => {
+                        window.showEditModal(fieldConfigs, recordData, tableName);
+                    });
             });
         });
     }
 
+    // Infinite scroll: the server renders the first page, the rest is fetched by cursor
+    const gridContainer = document.querySelector('.grid-container');
+    const tbody = table ? table.querySelector('tbody') : null;
+    if (gridContainer && tbody) {
+        const pageSize = parseInt(tableNameElement.dataset.pageSize, 10) || 100;
+        const nextCursor = tableNameElement.dataset.nextCursor || null;
+        window.gridScroller = new InfiniteScroller(tableName, gridContainer, tbody, pageSize, nextCursor);
+        // A saved sort was restored before the scroller existed; reload the first page in that order
+        const savedSort = window.columnSorter ? window.columnSorter.currentSort : null;
+        if (savedSort && savedSort.column && savedSort.direction) {
+            window.columnSorter.sortTable(savedSort.column, savedSort.direction);
+        }
+    }
+
+    // Export: post the current query and visible columns as a native form so the browser
+    // streams the download to disk instead of buffering it
+    document.querySelectorAll('.export-format').forEach(link => {
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            const query = window.gridScroller ? window.gridScroller.query : {};
+            const payload = { ...query, format: this.dataset.format };
+            if (window.layoutManager) {
+                const layout = window.layoutManager.getCurrentLayoutData();
+                const visible = Array.isArray(layout.columnVisibility) && layout.columnVisibility.length
+                    ? new Set(layout.columnVisibility) : null;
+                const columns = layout.columnOrder.filter(name => name && (!visible || visible.has(name)));
+                if (columns.length) payload.columns = columns;
+            }
+            const form = document.createElement('form');
+            form.method = 'POST';
+            form.action = `/api/export/${tableName}/`;
+            const input = document.createElement('input');
+            input.type = 'hidden';
+            input.name = 'payload';
+            input.value = JSON.stringify(payload);
+            form.appendChild(input);
+            document.body.appendChild(form);
+            form.submit();
+            form.remove();
+        });
+    });
+
     // Edit modal form submission (global handler)
     document.addEventListener('submit', async function(e) {
         const form = e.target;
@@ -347,16 +499,14 @@ document.addEventListener('DOMContentLoaded', function() {
             resetGridBtn.innerHTML = 'Resetting...';
             
             try {
-                const response = await fetch(`/api/reset-grid/${tableName}/`);
-                const data = await response.json();
-                
-                if (data.success) {
-                    // Update grid with original data
-                    updateGrid(tableName, data.data, data.columns);
-                    showToast('Grid reset successfully', 'success');
-                } else {
-                    showToast('Error resetting grid: ' + data.error, 'error');
+                // Reload the first unfiltered page; further pages stream in on scroll
+                const data = await window.gridScroller.reset({ sort: [{ field: 'id', direction: 'asc' }] });
+                const totalBadge = document.getElementById('grid-total-count');
+                if (totalBadge && data.total_count !== null) {
+                    // Estimated totals are shown as ~N
+                    totalBadge.textContent = `Total: ${data.approximate ? '~' : ''}${data.total_count}`;
                 }
+                showToast('Grid reset successfully', 'success');
             } catch (error) {
                 console.error('Error resetting grid:', error);
                 showToast('Error resetting grid. Please refresh the page.', 'error');
@@ -408,8 +558,9 @@ function initializeStateRestoration(tableName) {
     // Add restoration tasks to the queue
     window.gridStateRestorer.addRestorationTask(async () => {
         // Restore column order first
-        if (window.columnDragger) {
-            await window.columnDragger.restoreColumnOrder();
+        const dragger = needsColumnOrder(tableName) ? await loadDragger() : window.columnDragger;
+        if (dragger) {
+            await dragger.restoreColumnOrder();
         }
     });
 
@@ -572,8 +723,9 @@ async function restoreGridStates(tableName) {
         await waitForDOM();
 
         // Restore states in order
-        if (window.columnDragger) {
-            await window.columnDragger.restoreColumnOrder();
+        const dragger = needsColumnOrder(tableName) ? await loadDragger() : window.columnDragger;
+        if (dragger) {
+            await dragger.restoreColumnOrder();
         }
 
         if (window.columnResizer) {
@@ -627,7 +779,7 @@ function attachGridEventHandlers(tableName, fieldConfigs) {
             const fetchFields = fieldConfigs.length === 0
                 ? fetch(`/api/fields/${tableName}/`).then(res => res.json()).then(data => { fieldConfigs = data.fields; })
                 : Promise.resolve();
-            fetchFields.then(() => {
+            Promise.all([fetchFields, loadModal()]).then(() => {
                 fetch(`/api/record/${tableName}/${recordId}/`)
                     .then(res => res.json())
                     .then(recordData => {
@@ -499,10 +499,15 @@ class ColumnDragger {
     }
 }
 
-// Initialize column dragger when DOM is loaded
-document.addEventListener('DOMContentLoaded', () => {
+// Initialize column dragger when DOM is loaded (it is imported lazily, possibly after that)
+function initColumnDragger() {
     window.columnDragger = new ColumnDragger();
-});
+}
+if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', initColumnDragger);
+} else {
+    initColumnDragger();
+}
 
 // Export for module usage
 if (typeof module !== 'undefined' && module.exports) {
@@ -50,78 +50,27 @@ class ColumnSorter {
         document.querySelectorAll('.sort-btn.active').forEach(btn => btn.classList.remove('active'));
     }
 
-    sortTable(column, direction) {
+    // Rows are paged in by cursor, so the order has to come from the server: restart the
+    // infinite scroller with the new sort (keeping any filters) instead of reordering the
+    // rows that happen to be loaded
+    async sortTable(column, direction) {
+        this.saveSortState(column, direction);
+        const scroller = window.gridScroller;
+        if (!scroller) {
+            // dynamic_grid.js applies currentSort once it has created the scroller
+            return;
+        }
+        const current = (scroller.query.sort || [])[0];
+        if (current && current.field === column && current.direction === direction) {
+            return;
+        }
         try {
-            const table = document.querySelector('#dynamic-grid-table');
-            if (!table) {
-                console.warn('Table not found for sorting');
-                return;
-            }
-
-            const tbody = table.querySelector('tbody');
-            if (!tbody) {
-                console.warn('Table body not found for sorting');
-                return;
-            }
-
-            const rows = Array.from(tbody.querySelectorAll('tr'));
-            if (rows.length === 0) {
-                console.warn('No rows found for sorting');
-                return;
-            }
-
-            // Sort and reorder - create a copy to avoid modifying original array
-            const sortedRows = this.sortRows([...rows], column, direction);
-            sortedRows.forEach(row => tbody.appendChild(row));
-            
-            this.saveSortState(column, direction);
+            await scroller.reset({ ...scroller.query, sort: [{ field: column, direction }] });
         } catch (error) {
             console.error('Error sorting table:', error);
         }
     }
 
-    sortRows(rows, column, direction) {
-        return rows.sort((rowA, rowB) => {
-            const valueA = this.parseValue(this.getCellValue(rowA, column));
-            const valueB = this.parseValue(this.getCellValue(rowB, column));
-
-            let comparison = 0;
-            if (valueA < valueB) comparison = -1;
-            else if (valueA > valueB) comparison = 1;
-
-            return direction === 'asc' ? comparison : -comparison;
-        });
-    }
-
-    getCellValue(row, columnName) {
-        const headers = document.querySelectorAll('.resizable-column');
-        const columnIndex = Array.from(headers).findIndex(header => 
-            header.dataset.columnName === columnName
-        );
-
-        if (columnIndex >= 0) {
-            const cells = row.querySelectorAll('td');
-            const cell = cells[columnIndex + 1]; // +1 for checkbox column
-            return cell ? cell.textContent.trim() : '';
-        }
-        return '';
-    }
-
-    parseValue(value) {
-        if (!value || value === '') return '';
-        
-        // Try number first
-        const numValue = parseFloat(value);
-        if (!isNaN(numValue)) return numValue;
-
-        // Try date
-        const dateValue = new Date(value);
-        if (!isNaN(dateValue.getTime())) return dateValue.getTime();
-
-        // Return lowercase string
-        return value.toLowerCase();
-    }
-
     saveSortState(column, direction) {
         localStorage.setItem(`grid_sort_state_${this.tableName}`, JSON.stringify({ column, direction }));
     }
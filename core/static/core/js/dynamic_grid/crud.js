@@ -40,19 +40,48 @@ export async function deleteRecords(tableName, ids) {
     return res.json();
 }
 
+// Grid results are requested as arrays of values under `fields` (no repeated keys on the
+// wire) and expanded here into the {field: value} objects the grid works with
+const GRID_ROWS_TYPE = 'application/vnd.grid.rows+json';
+
+function expandRows(payload) {
+    if (payload && Array.isArray(payload.fields) && Array.isArray(payload.data)) {
+        const fields = payload.fields;
+        payload.data = payload.data.map(row => {
+            const record = {};
+            for (let i = 0; i < fields.length; i++) record[fields[i]] = row[i];
+            return record;
+        });
+    }
+    return payload;
+}
+
 export async function searchRecords(tableName, searchData) {
     const res = await fetch(`/api/search/${tableName}/`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', 'Accept': GRID_ROWS_TYPE },
         body: JSON.stringify(searchData)
     });
-    return res.json();
+    return expandRows(await res.json());
+}
+
+// Fetch one keyset page of search results. Pass the `next`/`prev` cursor from a
+// previous page to continue; the cursor is only valid for the same sort.
+export async function searchRecordsPage(tableName, searchData, pageSize, cursor = null) {
+    const body = { ...searchData, page_size: pageSize };
+    if (cursor) body.cursor = cursor;
+    const res = await fetch(`/api/search/${tableName}/`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Accept': GRID_ROWS_TYPE },
+        body: JSON.stringify(body)
+    });
+    return expandRows(await res.json());
 }
 
 export async function resetGrid(tableName) {
     const res = await fetch(`/api/reset-grid/${tableName}/`, {
         method: 'GET',
-        headers: { 'Content-Type': 'application/json' }
+        headers: { 'Content-Type': 'application/json', 'Accept': GRID_ROWS_TYPE }
     });
-    return res.json();
+    return expandRows(await res.json());
 } 
\ No newline at end of file
@@ -1,5 +1,21 @@
 // grid.js
 // Handles rendering and updating the grid table
+import { formatDateYMDToMDY, escapeHtml } from './utils.js';
+
+// Build <tr> markup for data rows, matching the server-rendered grid body
+export function renderRows(columns, rows) {
+    return rows.map(row => {
+        const cells = columns.map(col => {
+            let value = row[col[1]];
+            if (value === null || value === undefined) value = '';
+            if (col[1] === 'birthday') value = formatDateYMDToMDY(String(value));
+            return `<td class="align-middle">${escapeHtml(value)}</td>`;
+        }).join('');
+        return `<tr data-record-id="${row.id}" class="align-middle">` +
+            `<td class="align-middle"><input type="checkbox" class="row-select-checkbox" value="${row.id}"></td>` +
+            `${cells}</tr>`;
+    }).join('');
+}
 
 export function updateGrid(tableName, data, columns) {
     const table = document.querySelector('#dynamic-grid-table');
@@ -1,4 +1,5 @@
 import { showToast } from './utils.js';
+import { loadDragger } from './lazy.js';
 
 /**
  * Layout Manager for Dynamic Grid
@@ -267,11 +268,11 @@ class LayoutManager {
         }
 
         // Apply column order
-        if (layoutData.columnOrder && window.columnDragger) {
+        if (layoutData.columnOrder) {
             // Save the order and let the dragger apply it
             const storageKey = `grid_column_order_${this.tableName}`;
             localStorage.setItem(storageKey, JSON.stringify(layoutData.columnOrder));
-            window.columnDragger.loadSavedColumnOrder();
+            loadDragger().then(dragger => dragger && dragger.loadSavedColumnOrder());
         }
 
         // Apply sort state
@@ -0,0 +1,66 @@
+// lazy.js
+// Loads the rarely used grid modules (record/search modals, column dragger) on first use.
+// Their URLs come from the page's #grid-lazy-modules JSON, so built pages get hashed names.
+
+const pending = {};
+
+function moduleUrl(name) {
+    const data = document.getElementById('grid-lazy-modules');
+    return data ? JSON.parse(data.textContent)[name] : null;
+}
+
+function loadModule(name) {
+    if (!pending[name]) {
+        pending[name] = import(moduleUrl(name)).catch(error => {
+            delete pending[name];
+            throw error;
+        });
+    }
+    return pending[name];
+}
+
+// modal.js attaches renderFormFields / showEditModal / renderSearchFields to window
+export async function loadModal() {
+    await loadModule('modal');
+}
+
+export async function loadDragger() {
+    await loadModule('dragger');
+    return window.columnDragger;
+}
+
+// Whether the saved column order (completed the way ColumnDragger.loadSavedColumnOrder does)
+// differs from the rendered one; the default order is saved too, and needs no dragger
+export function needsColumnOrder(tableName) {
+    const saved = localStorage.getItem(`grid_column_order_${tableName}`);
+    if (!saved) return false;
+    const current = Array.from(document.querySelectorAll('.resizable-column')).map(h => h.dataset.columnName);
+    try {
+        const order = JSON.parse(saved).filter(name => current.includes(name));
+        current.forEach(name => { if (!order.includes(name)) order.push(name); });
+        return order.join('\u0000') !== current.join('\u0000');
+    } catch (error) {
+        return true;
+    }
+}
+
+// Load the dragger right away when a saved column order has to be applied, otherwise on the
+// first press on a column header (which is then handed over as the start of a drag)
+export function armColumnDragger(tableName) {
+    if (needsColumnOrder(tableName)) {
+        loadDragger();
+        return;
+    }
+    function onMouseDown(e) {
+        const header = e.target.closest && e.target.closest('.resizable-column');
+        if (!header || e.button !== 0) return;
+        document.removeEventListener('mousedown', onMouseDown, true);
+        const start = { target: e.target, currentTarget: header, clientX: e.clientX, clientY: e.clientY, preventDefault() {} };
+        e.preventDefault();
+        loadDragger().then(dragger => dragger && dragger.startDrag(start));
+    }
+    document.addEventListener('mousedown', onMouseDown, true);
+}
+
+// The search modal's operator hooks live in modal.js; make sure it is there when the modal opens
+document.getElementById('searchModal')?.addEventListener('show.bs.modal', () => { loadModal(); });
@@ -3,6 +3,24 @@
 
 // Exported functions will be attached to window for now for compatibility
 
+// Select2 ajax source for /api/options: the server filters by q and pages the list
+function optionsAjax(tableName, fieldName) {
+    return {
+        url: `/api/options/${tableName}/${fieldName}/`,
+        dataType: 'json',
+        delay: 250,
+        data: function(params) {
+            return { q: params.term || '', page: params.page || 1 };
+        },
+        processResults: function(data) {
+            return {
+                results: data.options.map(function(option) { return { id: option.text, text: option.text }; }),
+                pagination: { more: !!(data.pagination && data.pagination.more) }
+            };
+        }
+    };
+}
+
 function renderFormFields(fields, formFieldsDiv, tableName) {
     formFieldsDiv.innerHTML = '';
     fields.forEach(field => {
@@ -97,13 +115,7 @@ function renderFormFields(fields, formFieldsDiv, tableName) {
             theme: 'bootstrap-5',
             tags: true,
             width: '100%',
-            ajax: {
-                url: `/api/options/${table}/${field}/`,
-                dataType: 'json',
-                processResults: function(data) {
-                    return { results: data.options.map(function(option) { return { id: option.text, text: option.text }; }) };
-                }
-            },
+            ajax: optionsAjax(table, field),
             placeholder: 'Select or type to add',
             allowClear: true,
             createTag: function (params) {
@@ -121,16 +133,24 @@ function setupJobAutocomplete(input, dropdownContainer, tableName, fieldName) {
     let selectedIndex = -1;
     let isDropdownVisible = false;
     
+    let inputTimer = null;
+    
+    // First page of matching jobs; the server does the filtering
+    async function fetchSuggestions(query) {
+        const params = new URLSearchParams({ q: query, page: 1 });
+        const response = await fetch(`/api/options/${tableName}/${fieldName}/?${params}`);
+        const data = await response.json();
+        return data.options.map(option => option.text);
+    }
+    
     // Fetch existing jobs on focus
     input.addEventListener('focus', async () => {
         try {
-            const response = await fetch(`/api/options/${tableName}/${fieldName}/`);
-            const data = await response.json();
-            suggestions = data.options.map(option => option.text);
+            suggestions = await fetchSuggestions(input.value.trim());
             
-            // Show all jobs when focused
+            // Show the first jobs when focused
             if (suggestions.length > 0) {
-                showDropdown(suggestions, '');
+                showDropdown(suggestions, input.value.trim().toLowerCase());
             }
         } catch (error) {
             console.error('Error fetching job options:', error);
@@ -140,28 +160,24 @@ function setupJobAutocomplete(input, dropdownContainer, tableName, fieldName) {
     
     // Handle input changes
     input.addEventListener('input', (e) => {
-        const query = e.target.value.toLowerCase();
-        
-        if (query.length === 0) {
-            // Show all jobs when input is empty
+        const query = e.target.value.trim().toLowerCase();
+        clearTimeout(inputTimer);
+        inputTimer = setTimeout(async () => {
+            try {
+                suggestions = await fetchSuggestions(query);
+            } catch (error) {
+                console.error('Error fetching job options:', error);
+                suggestions = [];
+            }
             if (suggestions.length > 0) {
-                showDropdown(suggestions, '');
+                showDropdown(suggestions, query);
+            } else if (query.length > 0) {
+                // Show "Create new job" option when no matches found
+                showDropdown([], query);
             } else {
                 hideDropdown();
             }
-            return;
-        }
-        
-        const filteredSuggestions = suggestions.filter(job => 
-            job.toLowerCase().includes(query)
-        );
-        
-        if (filteredSuggestions.length > 0) {
-            showDropdown(filteredSuggestions, query);
-        } else {
-            // Show "Create new job" option when no matches found
-            showDropdown([], query);
-        }
+        }, 200);
     });
     
     // Handle keyboard navigation
@@ -387,13 +403,7 @@ function showEditModal(fields, rowData, tableName) {
             theme: 'bootstrap-5',
             tags: true,
             width: '100%',
-            ajax: {
-                url: `/api/options/${table}/${field}/`,
-                dataType: 'json',
-                processResults: function(data) {
-                    return { results: data.options.map(function(option) { return { id: option.text, text: option.text }; }) };
-                }
-            },
+            ajax: optionsAjax(table, field),
             placeholder: 'Select or type to add',
             allowClear: true,
             createTag: function (params) {
@@ -511,19 +521,9 @@ function renderSearchFields(fields, searchFieldsContainer, tableName) {
                     width: '100%',
                     dropdownParent: $('#searchModal'),
                     allowClear: true,
-                    placeholder: `Select ${field.label}`
+                    placeholder: `Select ${field.label}`,
+                    ajax: optionsAjax(tableName, field.name)
                 });
-                fetch(`/api/options/${tableName}/${field.name}/`)
-                    .then(res => res.json())
-                    .then(data => {
-                        if (data.options) {
-                            data.options.forEach(opt => {
-                                const option = new Option(opt.text, opt.text, false, false);
-                                select.appendChild(option);
-                            });
-                            $(select).trigger('change');
-                        }
-                    });
             }
         }
         // GSearch autocomplete for text fields
@@ -744,7 +744,7 @@ function setupGSearchAutocomplete(input, dropdownContainer, tableName, fieldName
 
 // Patch inside renderSearchFields or after its call
 // (Assume renderSearchFields is called after modal is shown)
-document.getElementById('searchModal')?.addEventListener('shown.bs.modal', function() {
+function patchGSearchOperators() {
     // For each text field with GSearch operator, ensure plain input with autocomplete
     document.querySelectorAll('#searchModal .row.mb-3[data-field]').forEach(fieldRow => {
         const operatorSelect = fieldRow.querySelector('.operator-select');
@@ -786,7 +786,13 @@ document.getElementById('searchModal')?.addEventListener('shown.bs.modal', funct
             operatorSelect.dispatchEvent(new Event('change'));
         }
     });
-});
+}
+const searchModalEl = document.getElementById('searchModal');
+searchModalEl?.addEventListener('shown.bs.modal', patchGSearchOperators);
+// This module is loaded on first use, which may be while the search modal is opening
+if (searchModalEl?.classList.contains('show')) {
+    patchGSearchOperators();
+}
 
 window.renderFormFields = renderFormFields;
 window.showEditModal = showEditModal;
@@ -16,4 +16,13 @@ export function showToast(message, type = 'success') {
     toastEl.classList.add(type === 'success' ? 'text-bg-success' : 'text-bg-danger');
     const toast = bootstrap.Toast.getOrCreateInstance(toastEl);
     toast.show();
-} 
\ No newline at end of file
+}
+
+export function escapeHtml(value) {
+    return String(value)
+        .replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;')
+        .replace(/"/g, '&quot;')
+        .replace(/'/g, '&#39;');
+}
\ No newline at end of file
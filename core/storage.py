@@ -0,0 +1,20 @@
+"""
+Static files storage for the grid.
+
+ManifestStaticFilesStorage raises for any file missing from staticfiles.json, so a server
+started with DEBUG off before `manage.py collectstatic` / `build_assets` answered every page
+with a 500. Missing entries fall back to the unhashed name here instead: the page renders,
+and only the assets that were never built are missing.
+"""
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+
+class GridStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not in the manifest and not collected into STATIC_ROOT either
+            return name
@@ -0,0 +1,286 @@
+"""
+In-memory GSearch autocomplete index, one per (table, field), kept in each worker.
+
+An index holds the distinct values of a column with their row counts: a sorted key list
+for prefix matches, a trigram map for substring matches, and a frequency ranking.
+Suggestions are prefix matches first, then other substring matches, each by frequency.
+
+Indexes are built lazily on first use and kept under GRID_SUGGEST_MEMORY_BUDGET with LRU
+eviction. A field whose values alone would exceed the budget is not indexed; its suggestions
+come from a LIKE query instead. Writes bump a per-table version in the Django cache (see note_changes); the
+worker that made the write applies the delta in place, other workers rebuild on next use
+once they re-read the version (core.versions).
+"""
+import bisect
+import heapq
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import record_cache
+from .routing import read_connection
+from .versions import remember_version, shared_version
+
+SUGGEST_LIMIT = 20
+GRAM = 3
+LOAD_CHUNK = 5000
+
+_lock = threading.Lock()
+_indexes = OrderedDict()   # (table_name, field_name) -> SuggestionIndex, least recently used first
+_oversized = set()         # (table_name, field_name) too large to index in this worker
+_total_size = 0
+
+
+def _fold(value):
+    return str(value).casefold()
+
+
+def _grams(key):
+    return {key[i:i + GRAM] for i in range(len(key) - GRAM + 1)}
+
+
+class SuggestionIndex:
+    """Distinct values of one column with prefix, trigram and frequency lookups."""
+
+    def __init__(self, version, counts=()):
+        self.version = version
+        self.counts = {}    # value -> number of rows holding it
+        self.keys = []      # sorted (folded value, value) pairs
+        self.grams = {}     # trigram -> set of values
+        self.size = 0       # rough memory estimate in bytes
+        self._ranked = None
+        self.extend(counts)
+
+    def extend(self, counts):
+        """Add (value, count) rows of values not in the index yet."""
+        for value, count in counts:
+            self.counts[value] = count
+            self._index(value)
+        self.keys.sort()
+
+    def _weight(self, value):
+        key = _fold(value)
+        return 120 + 2 * len(key) + 60 * max(len(key) - GRAM + 1, 0)
+
+    def _index(self, value, insort=False):
+        key = _fold(value)
+        if insort:
+            bisect.insort(self.keys, (key, value))
+        else:
+            self.keys.append((key, value))
+        for gram in _grams(key):
+            self.grams.setdefault(gram, set()).add(value)
+        self.size += self._weight(value)
+        self._ranked = None
+
+    def _unindex(self, value):
+        key = _fold(value)
+        i = bisect.bisect_left(self.keys, (key, value))
+        if i < len(self.keys) and self.keys[i] == (key, value):
+            del self.keys[i]
+        for gram in _grams(key):
+            values = self.grams.get(gram)
+            if values is not None:
+                values.discard(value)
+                if not values:
+                    del self.grams[gram]
+        self.size -= self._weight(value)
+        self._ranked = None
+
+    def add(self, value, delta=1):
+        """Adjust the row count of a value, adding or dropping it from the index as needed."""
+        if value is None or not delta:
+            return
+        count = self.counts.get(value, 0) + delta
+        if count > 0:
+            if value not in self.counts:
+                self._index(value, insort=True)
+            self.counts[value] = count
+            self._ranked = None
+        elif value in self.counts:
+            del self.counts[value]
+            self._unindex(value)
+
+    def _rank(self, value):
+        return (-self.counts[value], _fold(value))
+
+    def ranked(self):
+        if self._ranked is None:
+            self._ranked = sorted(self.counts, key=self._rank)
+        return self._ranked
+
+    def suggest(self, q, limit=SUGGEST_LIMIT):
+        q = _fold(q)
+        if not q:
+            return self.ranked()[:limit]
+        # Prefix matches: a contiguous run of the sorted keys
+        keys = self.keys
+        i = bisect.bisect_left(keys, (q,))
+        prefix = []
+        while i < len(keys) and keys[i][0].startswith(q):
+            prefix.append(keys[i][1])
+            i += 1
+        results = heapq.nsmallest(limit, prefix, key=self._rank)
+        if len(results) >= limit:
+            return results
+        seen = set(prefix)
+        if len(q) < GRAM:
+            # Too short for trigrams: walk values by frequency until enough match
+            for value in self.ranked():
+                if value not in seen and q in _fold(value):
+                    results.append(value)
+                    if len(results) >= limit:
+                        break
+            return results
+        candidates = None
+        for gram in sorted(_grams(q), key=lambda g: len(self.grams.get(g, ()))):
+            values = self.grams.get(gram)
+            if not values:
+                return results
+            candidates = set(values) if candidates is None else candidates & values
+            if not candidates:
+                return results
+        rest = (v for v in candidates if v not in seen and q in _fold(v))
+        return results + heapq.nsmallest(limit - len(results), rest, key=self._rank)
+
+
+def _version_key(table_name):
+    return f"suggest_version:{table_name}"
+
+
+def table_version(table_name, fresh=False):
+    """Shared write version of a table, seeded if the cache has none."""
+    return shared_version(_version_key(table_name), seed=int, fresh=fresh)
+
+
+def memory_budget():
+    return getattr(settings, 'GRID_SUGGEST_MEMORY_BUDGET', 32 * 1024 * 1024)
+
+
+def _load(table_name, field_name, version):
+    """Build the index for a field, or return None as soon as it outgrows the memory budget."""
+    budget = memory_budget()
+    index = SuggestionIndex(version)
+    with read_connection().cursor() as cursor:
+        cursor.execute(
+            f"SELECT {field_name}, COUNT(*) FROM {table_name} WHERE {field_name} IS NOT NULL GROUP BY {field_name}"
+        )
+        while True:
+            rows = cursor.fetchmany(LOAD_CHUNK)
+            if not rows:
+                return index
+            index.extend(rows)
+            if index.size > budget:
+                return None
+
+
+def _sql_suggest(table_name, field_name, q, limit):
+    """Suggestions straight from the table, for fields too large to index."""
+    sql = f"SELECT DISTINCT {field_name} FROM {table_name} WHERE {field_name} IS NOT NULL"
+    params = []
+    if q:
+        sql += f" AND {field_name} LIKE %s"
+        params.append(f"%{q}%")
+    sql += f" ORDER BY {field_name} LIMIT %s"
+    with read_connection().cursor() as cursor:
+        cursor.execute(sql, params + [limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _store(key, index):
+    global _total_size
+    budget = memory_budget()
+    with _lock:
+        old = _indexes.pop(key, None)
+        if old is not None:
+            _total_size -= old.size
+        _indexes[key] = index
+        _total_size += index.size
+        # Evict least recently used fields; _load never returns one over the budget by itself
+        while _total_size > budget and len(_indexes) > 1:
+            _, evicted = _indexes.popitem(last=False)
+            _total_size -= evicted.size
+
+
+def get_index(table_name, field_name):
+    """
+    Return an up-to-date SuggestionIndex, building it if missing or stale, or None for a field
+    too large to index.
+    """
+    key = (table_name, field_name)
+    if key in _oversized:
+        return None
+    version = table_version(table_name)
+    index = _indexes.get(key)
+    record_cache('suggest_index', index is not None and index.version == version)
+    if index is not None and index.version == version:
+        with _lock:
+            if key in _indexes:
+                _indexes.move_to_end(key)
+        return index
+    index = _load(table_name, field_name, version)
+    if index is None:
+        # Don't try again on every keystroke; the field would have to shrink a lot to fit
+        _oversized.add(key)
+        return None
+    _store(key, index)
+    return index
+
+
+def suggest(table_name, field_name, q, limit=SUGGEST_LIMIT):
+    index = get_index(table_name, field_name)
+    if index is None:
+        return _sql_suggest(table_name, field_name, q, limit)
+    # note_changes may be patching the index from another thread
+    with _lock:
+        return index.suggest(q, limit)
+
+
+def indexed_fields(table_name):
+    """Fields of table_name that currently have an index in this worker."""
+    return [field for table, field in list(_indexes) if table == table_name]
+
+
+def snapshot_rows(cursor, table_name, ids):
+    """Current values of the indexed fields for the given row ids (empty if none are indexed)."""
+    fields = indexed_fields(table_name)
+    if not fields or not ids:
+        return []
+    placeholders = ','.join(['%s'] * len(ids))
+    cursor.execute(f"SELECT {', '.join(fields)} FROM {table_name} WHERE id IN ({placeholders})", list(ids))
+    return [dict(zip(fields, row)) for row in cursor.fetchall()]
+
+
+def note_changes(table_name, removed=(), added=(), rebuild=False):
+    """
+    Record a committed write to table_name. removed/added are snapshot_rows() results from
+    before and after the write; pass rebuild=True when the changed rows are not known.
+    Other workers see the new version and rebuild lazily.
+    """
+    global _total_size
+    key = _version_key(table_name)
+    old_version = table_version(table_name, fresh=True)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+        version = cache.get(key)
+    remember_version(key, version)
+    with _lock:
+        for (table, field), index in list(_indexes.items()):
+            if table != table_name:
+                continue
+            if rebuild or index.version != old_version or version != old_version + 1:
+                # Missed someone else's write in between; rebuild on next use
+                _total_size -= index.size
+                del _indexes[(table, field)]
+                continue
+            _total_size -= index.size
+            for row in removed:
+                index.add(row.get(field), -1)
+            for row in added:
+                index.add(row.get(field), 1)
+            index.version = version
+            _total_size += index.size
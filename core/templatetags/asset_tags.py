@@ -0,0 +1,17 @@
+from django import template
+
+from core.assets import bundles_enabled, lazy_module_urls
+
+register = template.Library()
+
+
+@register.simple_tag
+def grid_bundles_enabled():
+    """Whether pages load the built core/dist bundles instead of the source modules."""
+    return bundles_enabled()
+
+
+@register.simple_tag
+def lazy_grid_modules():
+    """{name: url} of the grid modules that dynamic_grid/lazy.js imports on first use."""
+    return lazy_module_urls()
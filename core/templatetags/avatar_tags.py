@@ -0,0 +1,27 @@
+from urllib.parse import quote
+
+from django import template
+from django.utils.html import format_html
+
+from core.avatars import avatar_sources
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar_img(user, size, css_class='', style=''):
+    """
+    <img> (or <picture> with a WebP source) for a user's avatar shown at size px, falling
+    back to a generated initials avatar.
+    """
+    sources = avatar_sources(user, size)
+    if sources is None:
+        src = f"https://ui-avatars.com/api/?name={quote(user.username)}&background=6366f1&color=fff&size={size}"
+        return format_html('<img src="{}" alt="Avatar" class="{}" style="{}">', src, css_class, style)
+    srcset, src = sources
+    img = format_html(
+        '<img src="{}" alt="Avatar" class="{}" style="{}" width="{}" height="{}">', src, css_class, style, size, size
+    )
+    if srcset is None:
+        return img
+    return format_html('<picture><source type="image/webp" srcset="{}">{}</picture>', srcset, img)
@@ -6,4 +6,9 @@ def get_item(list_or_tuple, i):
     try:
         return list_or_tuple[i]
     except Exception:
-        return '' 
\ No newline at end of file
+        return ''
+
+@register.filter
+def pick(row, indexes):
+    """Values of a row tuple at the given positions."""
+    return [row[i] for i in indexes]
@@ -1,3 +1,363 @@
-from django.test import TestCase
+import datetime
+import decimal
+import threading
+import time
+from types import MappingProxyType
+from unittest import mock
 
-# Create your tests here.
+from django.http import HttpResponse
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .backends.mysql_pool.pool import ConnectionPool, PoolTimeout
+from .indexes import _serves, index_columns
+from .pagination import CursorError, build_seek_clause, decode_cursor, encode_cursor
+from .query import QueryError, compile_filters, compile_select
+from .models import SearchPattern
+from .registry import Field, TableSchema
+from .routing import STICKY_SESSION_KEY, ReplicaRouter, ReplicaStickinessMiddleware, read_alias, replica_reads
+from .versions import bump_version, shared_version
+
+
+def make_schema(table_name, *fields, fulltext=()):
+    fields = tuple(
+        Field(name=name, label=name.title(), type='text', operator_tags='', lookup_sql='', mandatory=False,
+              fulltext=name in fulltext)
+        for name in fields
+    )
+    return TableSchema(table_name=table_name, fields=fields, by_name=MappingProxyType({f.name: f for f in fields}))
+
+
+class CursorTests(SimpleTestCase):
+    keys = (('birthday', 'desc'), ('id', 'asc'))
+
+    def test_round_trip(self):
+        row = {'birthday': datetime.date(1990, 5, 17), 'id': 42}
+        token = encode_cursor(self.keys, row, 'next')
+        self.assertEqual(decode_cursor(token, self.keys), (['1990-05-17', 42], 'next'))
+
+    def test_round_trip_keeps_precision(self):
+        keys = (('salary', 'asc'), ('id', 'asc'))
+        row = {'salary': decimal.Decimal('1234.50'), 'id': 7}
+        values, _ = decode_cursor(encode_cursor(keys, row, 'prev'), keys)
+        self.assertEqual(values, ['1234.50', 7])
+
+    def test_null_value(self):
+        token = encode_cursor(self.keys, {'birthday': None, 'id': 3}, 'next')
+        self.assertEqual(decode_cursor(token, self.keys), ([None, 3], 'next'))
+
+    def test_other_sort_is_rejected(self):
+        token = encode_cursor(self.keys, {'birthday': None, 'id': 3}, 'next')
+        with self.assertRaises(CursorError):
+            decode_cursor(token, (('id', 'asc'),))
+
+    def test_garbage_is_rejected(self):
+        for token in ('', 'not a cursor', 'e30'):
+            with self.assertRaises(CursorError):
+                decode_cursor(token, self.keys)
+
+
+class SeekClauseTests(SimpleTestCase):
+    def test_single_key(self):
+        self.assertEqual(build_seek_clause([('t.id', 'asc')], [False]), ('((t.id > %s))', [0]))
+
+    def test_two_keys(self):
+        sql, indexes = build_seek_clause([('t.age', 'desc'), ('t.id', 'asc')], [False, False])
+        self.assertEqual(sql, '(((t.age < %s OR t.age IS NULL)) OR (t.age = %s AND t.id > %s))')
+        self.assertEqual(indexes, [0, 0, 1])
+
+    def test_null_ascending(self):
+        # NULLs sort first ascending: after a NULL come the non-NULL values, then ties on id
+        sql, indexes = build_seek_clause([('t.age', 'asc'), ('t.id', 'asc')], [True, False])
+        self.assertEqual(sql, '((t.age IS NOT NULL) OR (t.age IS NULL AND t.id > %s))')
+        self.assertEqual(indexes, [1])
+
+    def test_null_descending(self):
+        # NULLs come last descending, so only ties on id are left
+        sql, indexes = build_seek_clause([('t.age', 'desc'), ('t.id', 'asc')], [True, False])
+        self.assertEqual(sql, '((t.age IS NULL AND t.id > %s))')
+        self.assertEqual(indexes, [1])
+
+    def test_nothing_after(self):
+        self.assertEqual(build_seek_clause([('t.age', 'desc')], [True]), ('1 = 0', []))
+
+
+class CompileFiltersTests(SimpleTestCase):
+    schema = make_schema('people', 'fullname', 'age', 'job', 'city', fulltext=('fullname',))
+
+    def test_shape_and_params(self):
+        shape, params = compile_filters(self.schema, {
+            'age': {'operator': 'greater', 'value': 30},
+            'city': {'operator': 'contains', 'value': 'os'},
+            'job': {'operator': 'IN', 'value': ['Nurse', 'Chef']},
+            'sort': [{'field': 'age', 'direction': 'asc'}],
+            'page_size': 10,
+        })
+        self.assertEqual(shape, (('age', 'greater', 1), ('city', 'contains', 1), ('job', 'IN', 2)))
+        self.assertEqual(params, [30, '%os%', 'Nurse', 'Chef'])
+
+    def test_same_shape_for_other_values(self):
+        first = compile_filters(self.schema, {'job': {'operator': 'IN', 'value': ['a', 'b']}})
+        second = compile_filters(self.schema, {'job': {'operator': 'IN', 'value': ['c', 'd']}})
+        self.assertEqual(first[0], second[0])
+        self.assertNotEqual(first[1], second[1])
+
+    def test_unknown_field(self):
+        with self.assertRaises(QueryError):
+            compile_filters(self.schema, {'salary': {'operator': 'equal', 'value': 1}})
+
+    def test_unknown_operator_is_skipped(self):
+        self.assertEqual(compile_filters(self.schema, {'age': {'operator': 'between', 'value': 1}}), ((), []))
+
+    def test_short_fulltext_value_falls_back_to_like(self):
+        # Terms under GRID_FULLTEXT_MIN_TOKEN are not in the index
+        shape, params = compile_filters(self.schema, {'fullname': {'operator': 'contains', 'value': 'al'}})
+        self.assertEqual(shape, (('fullname', 'contains', 1),))
+        self.assertEqual(params, ['%al%'])
+
+
+class CompileSelectTests(SimpleTestCase):
+    def test_plain(self):
+        sql, seek = compile_select('people', ('id', 'fullname'), False)
+        self.assertEqual(sql, 'SELECT t.id, t.fullname FROM people t')
+        self.assertEqual(seek, ())
+
+    def test_filters_sort_and_limit(self):
+        sql, _ = compile_select(
+            'people', ('id', 'job'), True, (('age', 'greater', 1), ('job', 'IN', 2)), (('id', 'desc'),), None, True
+        )
+        self.assertEqual(
+            sql,
+            'SELECT t.id, j.name AS job FROM people t LEFT JOIN job j ON t.job = j.id '
+            'WHERE t.age > %s AND j.name IN (%s,%s) ORDER BY t.id DESC LIMIT %s'
+        )
+
+    def test_empty_in(self):
+        sql, _ = compile_select('people', ('id',), False, (('age', 'IN', 0),))
+        self.assertEqual(sql, 'SELECT t.id FROM people t WHERE 1 = 0')
+
+    def test_seek(self):
+        sql, seek = compile_select(
+            'people', ('id', 'age'), False, (('city', 'equal', 1),), (('age', 'asc'), ('id', 'asc')), (False, False),
+            True
+        )
+        self.assertEqual(
+            sql,
+            'SELECT t.id, t.age FROM people t WHERE t.city = %s AND ((t.age > %s) OR (t.age = %s AND t.id > %s)) '
+            'ORDER BY t.age ASC, t.id ASC LIMIT %s'
+        )
+        self.assertEqual(seek, (0, 0, 1))
+
+
+class FakeConnection:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+        self.rollbacks = 0
+
+    def ping(self):
+        if not self.alive:
+            raise OSError('gone away')
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def make_pool(self, **options):
+        return ConnectionPool({'TIMEOUT': 0.05, **options})
+
+    def test_reuses_released_connection(self):
+        pool = self.make_pool()
+        raw = pool.acquire(FakeConnection)
+        pool.release(raw)
+        self.assertIs(pool.acquire(FakeConnection), raw)
+        self.assertEqual(raw.rollbacks, 1)
+        stats = pool.stats()
+        self.assertEqual((stats['created'], stats['checkouts'], stats['in_use']), (1, 2, 1))
+
+    def test_timeout_when_full(self):
+        pool = self.make_pool(MAX_SIZE=1)
+        pool.acquire(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(FakeConnection)
+        stats = pool.stats()
+        self.assertEqual((stats['size'], stats['waiting'], stats['timeouts']), (1, 0, 1))
+
+    def test_waiter_gets_released_connection(self):
+        pool = self.make_pool(MAX_SIZE=1, TIMEOUT=5)
+        raw = pool.acquire(FakeConnection)
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.acquire(FakeConnection)))
+        waiter.start()
+        while not pool.stats()['waiting']:
+            time.sleep(0.001)
+        pool.release(raw)
+        waiter.join(5)
+        self.assertEqual(got, [raw])
+        self.assertEqual(pool.stats()['waits'], 1)
+
+    def test_failed_connect_frees_the_slot(self):
+        pool = self.make_pool(MAX_SIZE=1)
+
+        def refuse():
+            raise OSError('refused')
+
+        with self.assertRaises(OSError):
+            pool.acquire(refuse)
+        self.assertIsInstance(pool.acquire(FakeConnection), FakeConnection)
+
+    def test_dead_connection_is_replaced(self):
+        pool = self.make_pool()
+        raw = pool.acquire(FakeConnection)
+        pool.release(raw)
+        raw.alive = False
+        fresh = pool.acquire(FakeConnection)
+        self.assertIsNot(fresh, raw)
+        self.assertTrue(raw.closed)
+        self.assertEqual(pool.stats()['ping_failures'], 1)
+
+    def test_expired_connection_is_closed_on_release(self):
+        pool = self.make_pool(MAX_LIFETIME=0)
+        raw = pool.acquire(FakeConnection)
+        pool.release(raw)
+        self.assertTrue(raw.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_fork_starts_an_empty_pool(self):
+        pool = self.make_pool(MAX_SIZE=1)
+        inherited = pool.acquire(FakeConnection)
+        # As seen from a child process: the parent's connections are not ours to use or count
+        pool.pid = -1
+        fresh = pool.acquire(FakeConnection)
+        self.assertIsNot(fresh, inherited)
+        self.assertFalse(inherited.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+
+class IndexColumnsTests(SimpleTestCase):
+    @staticmethod
+    def rank(field):
+        return field
+
+    def test_equality_then_sort_then_range(self):
+        shape = (('city', 'status'), ('age',), (('salary', 'desc'), ('id', 'desc')))
+        self.assertEqual(
+            index_columns(shape, self.rank, set(), 4),
+            (('city', 'asc'), ('status', 'asc'), ('salary', 'asc'), ('age', 'asc'))
+        )
+
+    def test_equality_order_follows_rank(self):
+        uses = {'status': 10, 'city': 3}
+        shape = (('city', 'status'), (), ())
+        columns = index_columns(shape, lambda f: (-uses.get(f, 0), f), set(), 4)
+        self.assertEqual(columns, (('status', 'asc'), ('city', 'asc')))
+
+    def test_mixed_sort_orders(self):
+        shape = ((), (), (('age', 'desc'), ('fullname', 'asc')))
+        self.assertEqual(index_columns(shape, self.rank, set(), 4), (('age', 'asc'), ('fullname', 'desc')))
+
+    def test_sort_on_equality_field_is_skipped(self):
+        shape = (('city',), (), (('city', 'asc'), ('age', 'asc')))
+        self.assertEqual(index_columns(shape, self.rank, set(), 4), (('city', 'asc'), ('age', 'asc')))
+
+    def test_unindexable_and_primary_key(self):
+        shape = (('city', 'notes'), ('age',), (('notes', 'asc'), ('age', 'asc')))
+        self.assertEqual(index_columns(shape, self.rank, {'notes'}, 4), (('city', 'asc'), ('age', 'asc')))
+        self.assertEqual(index_columns((('id',), (), ()), self.rank, set(), 4), ())
+
+    def test_max_columns(self):
+        shape = (('a', 'b', 'c'), ('d',), ())
+        self.assertEqual(len(index_columns(shape, self.rank, set(), 2)), 2)
+
+
+class ServesTests(SimpleTestCase):
+    def test_equality_prefix_in_any_order(self):
+        self.assertTrue(_serves(['status', 'city', 'age'], ['city', 'status', 'age'], 2))
+
+    def test_later_columns_keep_their_order(self):
+        self.assertFalse(_serves(['city', 'salary', 'age'], ['city', 'age', 'salary'], 1))
+
+    def test_wider_index_serves(self):
+        self.assertTrue(_serves(['city', 'age', 'salary'], ['city', 'age'], 1))
+
+    def test_narrower_index_does_not(self):
+        self.assertFalse(_serves(['city'], ['city', 'age'], 1))
+
+    def test_different_equality_fields(self):
+        self.assertFalse(_serves(['city', 'age'], ['status', 'age'], 1))
+
+
+@mock.patch('core.routing.replica_aliases', return_value=['replica'])
+class ReplicaRoutingTests(SimpleTestCase):
+    def request(self, method='get', session=None):
+        request = getattr(RequestFactory(), method)('/')
+        request.session = {} if session is None else session
+        return request
+
+    def test_replica_reader(self, _):
+        seen = []
+        view = replica_reads(lambda request: seen.append((read_alias(), ReplicaRouter().db_for_read(SearchPattern))))
+        view(self.request())
+        self.assertEqual(seen, [('replica', 'replica')])
+        # Outside the view everything is back on the primary
+        self.assertEqual(read_alias(), 'default')
+        self.assertIsNone(ReplicaRouter().db_for_read(SearchPattern))
+
+    def test_writes_stay_on_primary(self, _):
+        view = replica_reads(lambda request: ReplicaRouter().db_for_write(SearchPattern))
+        self.assertEqual(view(self.request()), 'default')
+
+    def test_pinned_after_write(self, _):
+        session = {}
+        middleware = ReplicaStickinessMiddleware(lambda request: HttpResponse())
+        request = self.request('post', session)
+        middleware.process_view(request, lambda r: None, (), {})
+        middleware.process_response(request, HttpResponse())
+        seen = []
+        replica_reads(lambda request: seen.append(read_alias()))(self.request(session=session))
+        self.assertEqual(seen, ['default'])
+
+    def test_pin_expires(self, _):
+        seen = []
+        session = {STICKY_SESSION_KEY: time.time() - 1}
+        replica_reads(lambda request: seen.append(read_alias()))(self.request(session=session))
+        self.assertEqual(seen, ['replica'])
+
+    def test_replica_readers_and_failures_do_not_pin(self, _):
+        middleware = ReplicaStickinessMiddleware(lambda request: HttpResponse())
+        reader = replica_reads(lambda request: None)
+        for view, response in ((reader, HttpResponse()), (lambda r: None, HttpResponse(status=400))):
+            request = self.request('post')
+            middleware.process_view(request, view, (), {})
+            middleware.process_response(request, response)
+            self.assertEqual(request.session, {})
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SharedVersionTests(SimpleTestCase):
+    key = 'test_version'
+
+    def setUp(self):
+        cache.clear()
+        shared_version(self.key, fresh=True)
+
+    def test_reads_are_memoized_within_the_interval(self):
+        version = shared_version(self.key)
+        cache.set(self.key, 'other worker', None)
+        with mock.patch.object(cache, 'get') as get:
+            self.assertEqual(shared_version(self.key), version)
+        get.assert_not_called()
+
+    @override_settings(GRID_VERSION_CHECK_INTERVAL=0)
+    def test_other_workers_bumps_are_seen_after_the_interval(self):
+        cache.set(self.key, 'other worker', None)
+        self.assertEqual(shared_version(self.key), 'other worker')
+
+    def test_own_bump_is_seen_at_once(self):
+        version = bump_version(self.key)
+        self.assertEqual(shared_version(self.key), version)
+        self.assertEqual(cache.get(self.key), version)
@@ -0,0 +1,47 @@
+"""
+Shared version stamps with a short per-process memo.
+
+Workers tag their in-process caches (compiled schemas, job ids, menu and option keys,
+suggest indexes) with version stamps kept in the shared Django cache and drop them when a
+stamp changes. Reading the shared cache on every lookup costs a query per request with
+the database cache, so each worker re-reads a stamp at most once every
+GRID_VERSION_CHECK_INTERVAL seconds. Bumps made by a worker are seen by that worker at
+once and by the others within the interval.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+_checked = {}   # cache key -> (version, time.monotonic() of the read)
+
+
+def check_interval():
+    return getattr(settings, 'GRID_VERSION_CHECK_INTERVAL', 1.0)
+
+
+def shared_version(key, seed=time.time_ns, fresh=False):
+    """Return the version stored under key, seeding it with seed() if the cache has none."""
+    now = time.monotonic()
+    memo = _checked.get(key)
+    if memo is not None and not fresh and now - memo[1] < check_interval():
+        return memo[0]
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, seed(), None)
+        version = cache.get(key)
+    _checked[key] = (version, now)
+    return version
+
+
+def remember_version(key, version):
+    """Record a version this worker just wrote so its next reads don't go back to the cache."""
+    _checked[key] = (version, time.monotonic())
+
+
+def bump_version(key):
+    """Store a new version under key; other workers see it within the check interval."""
+    version = time.time_ns()
+    cache.set(key, version, None)
+    remember_version(key, version)
+    return version
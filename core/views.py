@@ -8,12 +8,16 @@ from django.urls import reverse
 from .forms import CustomUserCreationForm, EmailAuthenticationForm, ProfileUpdateForm
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
-from django.db import connection
-from django.http import JsonResponse
-from django.views.decorators.http import require_GET, require_POST
+from django.db import connection, transaction
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotModified, JsonResponse,
+    StreamingHttpResponse,
+)
+from django.views.decorators.http import condition, require_GET, require_POST, require_safe
 from django.views.decorators.csrf import csrf_exempt
 from .models import SearchPattern
 import json
+import logging
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
@@ -21,6 +25,39 @@ from django.db import connection
 from .models import GridLayout
 from django.contrib.auth.decorators import login_required
 from .models import TabInterface
+from .pagination import CursorError, clamp_page_size
+from .query import (
+    QueryError, compile_filters, compile_record, compile_select, compile_sort,
+    execute, fetch_all, fetch_page, keyset_keys, search_projection,
+)
+from .registry import get_grid_view, get_table_schema
+from .counts import adjust_row_count, exact_count, filtered_count, table_row_count
+from .export import EXPORT_FORMATS, export_columns, iter_row_chunks, stream_csv, stream_ndjson
+from .suggest import note_changes, snapshot_rows, suggest
+from .options import invalidate_options, option_list, option_page
+from .conditional import (
+    config_cache_control, fields_etag, grid_layout_etag, grid_layout_last_modified, grid_layouts_etag,
+    grid_layouts_last_modified, options_etag, search_patterns_etag, search_patterns_last_modified,
+    tab_layouts_etag, tab_layouts_last_modified, user_data_cache_control,
+)
+from .bulk import apply_job_ids, chunked, existing_ids, insert_rows, update_rows, validate_records
+from .jobs import resolve_job, resolve_jobs
+from .menus import shell_context
+from . import aio
+from .routing import read_alias, read_connection, replica_reads
+from .search_stats import record_search
+from .mutations import mutation_chunk_size, run_mutation, validate_assignments
+from .avatars import AVATAR_DIR
+from .assets import accepted_encodings, content_type, is_hashed
+from .wire import grid_response
+from pathlib import Path
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+from django.core.files.storage import default_storage
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from .metrics import metrics_allowed, render as render_metrics
+
+logger = logging.getLogger(__name__)
 
 # Create your views here.
 
@@ -50,19 +87,6 @@ def custom_login(request):
             return super().form_valid(form)
     return CustomLoginView.as_view()(request)
 
-def get_user_menus(user):
-    from .models import UserRole, RoleMenu, Menu
-    role_ids = UserRole.objects.filter(user=user).values_list('role_id', flat=True)
-    menu_qs = Menu.objects.filter(
-        id__in=RoleMenu.objects.filter(role_id__in=role_ids).values_list('menu_id', flat=True)
-    ).order_by('order')
-    parents = [m for m in menu_qs if m.parent_id is None and m.url not in ['/', '/about/', '/contact/']]
-    menu_tree = []
-    for parent in parents:
-        children = [c for c in menu_qs if c.parent_id == parent.id]
-        menu_tree.append({'menu': parent, 'children': children})
-    return menu_tree
-
 @login_required
 def profile(request):
     if request.method == 'POST':
@@ -83,133 +107,142 @@ def profile(request):
                 return JsonResponse({'success': False, 'errors': form.errors})
     else:
         form = ProfileUpdateForm(instance=request.user)
-    # Render the modal template for both AJAX and normal requests
+    # The page shell only carries an empty modal; opening it fetches the form body over AJAX
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return render(request, 'profile_modal_body.html', {'form': form, 'user': request.user})
     return render(request, 'profile_modal.html', {'form': form, 'user': request.user})
 
 @login_required
 def home(request):
-    form = ProfileUpdateForm(instance=request.user)
-    menu_tree = get_user_menus(request.user)
-    return render(request, 'home.html', {'user': request.user, 'form': form, 'menu_tree': menu_tree})
+    return render(request, 'home.html', {'user': request.user, **shell_context(request.user)})
 
 @login_required
 def about(request):
-    form = ProfileUpdateForm(instance=request.user)
-    menu_tree = get_user_menus(request.user)
-    return render(request, 'about.html', {'user': request.user, 'form': form, 'menu_tree': menu_tree})
+    return render(request, 'about.html', {'user': request.user, **shell_context(request.user)})
 
 @login_required
 def contact(request):
-    form = ProfileUpdateForm(instance=request.user)
-    menu_tree = get_user_menus(request.user)
-    return render(request, 'contact.html', {'user': request.user, 'form': form, 'menu_tree': menu_tree})
+    return render(request, 'contact.html', {'user': request.user, **shell_context(request.user)})
 
 @login_required
+@replica_reads
 def dynamic_grid(request, form_name):
-    # 1. Get form config
-    form_cursor = connection.cursor()
-    form_cursor.execute("SELECT * FROM forms WHERE tableview = %s", [form_name])
-    form_row = form_cursor.fetchone()
-    if not form_row:
-        menu_tree = get_user_menus(request.user)
-        profile_form = ProfileUpdateForm(instance=request.user)
-        return render(request, 'dynamic_grid.html', {'error': 'Form not found.', 'menu_tree': menu_tree, 'form': profile_form, 'user': request.user})
-    select_fields_raw = [f.strip() for f in form_row[2].split(',')]
-    table_name = form_row[3]
-    # 2. Get column config
-    cursor = connection.cursor()
-    cursor.execute("SELECT field_label, field_name FROM search_config WHERE table_name = %s", [table_name])
-    columns_config = cursor.fetchall()  # list of (field_label, field_name)
-    # Build select_fields and columns in the order of select_fields_raw, using field_name for SQL and field_label for header
-    select_fields = []
-    columns = []
-    for field in select_fields_raw:
-        if field.lower() == 'id':
-            continue
-        for label, name in columns_config:
-            if name == field:
-                select_fields.append(name)
-                columns.append((label, name))
-                break
-    # Always keep ID in the SQL query for backend use
-    sql_fields = [f.strip() for f in form_row[2].split(',')]
-    
-    # Handle job field - join with job table to get job name
-    if 'job' in sql_fields:
-        # Replace job field with job name from join
-        select_fields_with_job = []
-        for field in sql_fields:
-            if field == 'job':
-                select_fields_with_job.append('j.name as job')
-            elif field == 'id':
-                select_fields_with_job.append('t.id')
-            else:
-                select_fields_with_job.append(field)
-        
-        sql = f"SELECT {', '.join(select_fields_with_job)} FROM {table_name} t LEFT JOIN job j ON t.job = j.id"
-    else:
-        sql = f"SELECT {', '.join(sql_fields)} FROM {table_name}"
+    # 1. Get form and column config from the metadata registry
+    view = get_grid_view(form_name)
+    if not view:
+        return render(request, 'dynamic_grid.html', {'error': 'Form not found.', 'user': request.user, **shell_context(request.user)})
+    table_name = view.table_name
+    # columns: (field_label, field_name) in the order of the form's field list
+    columns = list(view.columns)
+    # The projection always keeps ID for backend use
+    sql_fields = view.projection
+    cursor = read_connection().cursor()
     
-    cursor.execute(sql)
-    raw_data = cursor.fetchall()
-    # Build a list of dicts for each row, mapping field_name to value
-    data = []
-    for row in raw_data:
-        # Handle the case where we have aliased fields (like j.name as job)
-        row_dict = {}
-        for i, field in enumerate(sql_fields):
-            if field == 'job' and 'j.name as job' in sql:
-                # The job field comes from the alias, so use the alias name
-                row_dict[field] = row[i]
-            else:
-                row_dict[field] = row[i]
-        data.append(row_dict)
-    total_count = len(data)
-    menu_tree = get_user_menus(request.user)
-    profile_form = ProfileUpdateForm(instance=request.user)
+    # Render only the first page; the grid pulls the rest through api_search as the user scrolls
+    page_size = clamp_page_size(None)
+    data, next_cursor, _ = fetch_page(
+        cursor, table_name, sql_fields, view.joins_job, (), [], (('id', 'asc'),), page_size, as_dicts=False
+    )
+    total_count = table_row_count(table_name)
     return render(request, 'dynamic_grid.html', {
         'columns': columns,  # list of (label, field_name) to display
-        'data': data,        # list of dicts, field_name -> value
+        'data': data,        # row tuples in projection order
+        'id_index': view.id_index,
+        'column_indexes': view.column_indexes,
         'form_name': form_name,
         'table_name': table_name,
-        'menu_tree': menu_tree,
         'total_count': total_count,
-        'form': profile_form,      # <-- add this
-        'user': request.user,      # <-- and this
+        'page_size': page_size,
+        'next_cursor': next_cursor,
+        'user': request.user,
+        **shell_context(request.user),
     })
 
+@require_safe
+def static_asset(request, path):
+    """
+    Serve a collected static file, preferring its precompressed .br / .gz sibling when the
+    client accepts it. Hashed (manifest) names are cached forever, others revalidated.
+    """
+    root = Path(settings.STATIC_ROOT).resolve()
+    full = (root / path).resolve()
+    if root not in full.parents or not full.is_file() or full.suffix in ('.gz', '.br'):
+        raise Http404
+    stat = full.stat()
+    if not is_hashed(full.name) and not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+        return HttpResponseNotModified()
+    encodings = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    served, encoding = full, None
+    for name, suffix in (('br', '.br'), ('gzip', '.gz')):
+        variant = full.with_name(full.name + suffix)
+        if name in encodings and variant.is_file():
+            served, encoding = variant, name
+            break
+    response = FileResponse(open(served, 'rb'), content_type=content_type(full.name))
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if is_hashed(full.name):
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'GRID_STATIC_MAX_AGE', 31536000), immutable=True)
+    else:
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
 @require_GET
-@login_required
-def api_fields(request, table_name):
+def avatar_file(request, name):
+    """Serve a normalized avatar file. Names are content-addressed, so browsers may keep them forever."""
+    path = f"{AVATAR_DIR}/{name}"
+    if not default_storage.exists(path):
+        raise Http404
+    response = FileResponse(default_storage.open(path, 'rb'))
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'GRID_AVATAR_MAX_AGE', 31536000), immutable=True)
+    return response
+
+@require_GET
+def prometheus_metrics(request):
+    """Request, database and cache metrics of every worker, in Prometheus text format."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@aio.require_GET
+@aio.login_required
+@config_cache_control
+@aio.condition(etag_func=fields_etag)
+@replica_reads
+async def api_fields(request, table_name):
     """Return search_config for a table as JSON."""
-    cursor = connection.cursor()
-    cursor.execute("SELECT field_label, field_name, field_type, operator_tags, lookup_sql, mandatory FROM search_config WHERE table_name = %s ORDER BY id", [table_name])
-    fields = [
-        {
-            'label': row[0],
-            'name': row[1],
-            'type': row[2],
-            'operator_tags': row[3],
-            'lookup_sql': row[4],
-            'mandatory': row[5],
-        }
-        for row in cursor.fetchall()
-    ]
+    schema = await aio.run_db(get_table_schema, table_name)
+    fields = [field.as_dict() for field in schema.fields]
     return JsonResponse({'fields': fields})
 
-@require_GET
-@login_required
-def api_options(request, table_name, field_name):
-    """Return dropdown options for a field as JSON, using lookup_sql from search_config."""
-    cursor = connection.cursor()
-    cursor.execute("SELECT lookup_sql FROM search_config WHERE table_name = %s AND field_name = %s", [table_name, field_name])
-    row = cursor.fetchone()
-    if not row or not row[0]:
+@aio.require_GET
+@aio.login_required
+@config_cache_control
+@aio.condition(etag_func=options_etag)
+@replica_reads
+async def api_options(request, table_name, field_name):
+    """
+    Return dropdown options for a field as JSON, using lookup_sql from search_config.
+    With ?q= and/or ?page= the list is filtered and paginated the way Select2 expects.
+    """
+    schema = await aio.run_db(get_table_schema, table_name)
+    field = schema.field(field_name)
+    if not field or not field.lookup_sql:
         return JsonResponse({'options': []})
-    lookup_sql = row[0]
-    cursor.execute(lookup_sql)
-    options = [{'id': r[0], 'text': r[1]} for r in cursor.fetchall()]
-    return JsonResponse({'options': options})
+    options = await aio.run_db(option_list, table_name, field)
+    if 'q' not in request.GET and 'page' not in request.GET:
+        return JsonResponse({'options': [{'id': r[0], 'text': r[1]} for r in options]})
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    options, more = option_page(options, request.GET.get('q', '').strip(), page)
+    return JsonResponse({
+        'options': [{'id': r[0], 'text': r[1]} for r in options],
+        'pagination': {'more': more},
+    })
 
 @require_POST
 @csrf_exempt  # We'll handle CSRF in JS later
@@ -217,35 +250,20 @@ def api_options(request, table_name, field_name):
 def api_create(request, table_name):
     """Create a new record in table_name. For inputable dropdowns like job, check if the job exists and create it if needed."""
     data = json.loads(request.body)
+    # Field configs come from the registry, outside the write transaction
+    field_names = list(get_table_schema(table_name).field_names)
     cursor = connection.cursor()
     
     try:
-        # Start transaction
-        cursor.execute("START TRANSACTION")
-        
-        # Handle job field specifically - create new job if it doesn't exist
+        # Handle job field specifically - get or create the job before the write transaction
+        job_created = False
         if 'job' in data and data['job']:
             job_name = data['job'].strip()
             if job_name:
-                # Check if job exists
-                cursor.execute("SELECT id FROM job WHERE name = %s", [job_name])
-                existing_job = cursor.fetchone()
-                
-                if existing_job:
-                    # Use existing job ID
-                    data['job'] = existing_job[0]
-                else:
-                    # Create new job and use its ID
-                    cursor.execute("INSERT INTO job (name) VALUES (%s)", [job_name])
-                    new_job_id = cursor.lastrowid
-                    data['job'] = new_job_id
-        
-        # Get field configs
-        cursor.execute("SELECT field_name, field_type, lookup_sql FROM search_config WHERE table_name = %s", [table_name])
-        fields = cursor.fetchall()
-        field_names = [f[0] for f in fields]
+                data['job'], job_created = resolve_job(cursor, job_name)
+        
         values = []
-        for field_name, field_type, lookup_sql in fields:
+        for field_name in field_names:
             val = data.get(field_name)
             if val == "":
                 val = None
@@ -254,62 +272,111 @@ def api_create(request, table_name):
         # Build insert SQL
         placeholders = ','.join(['%s'] * len(field_names))
         sql = f"INSERT INTO {table_name} ({','.join(field_names)}) VALUES ({placeholders})"
-        cursor.execute(sql, values)
-        
-        # Commit transaction
-        cursor.execute("COMMIT")
+        # The row and its row-count adjustment commit together (rolled back on error)
+        with transaction.atomic():
+            cursor.execute(sql, values)
+            record_id = cursor.lastrowid
+            adjust_row_count(table_name, 1)
+        note_changes(table_name, added=snapshot_rows(cursor, table_name, [record_id]))
+        if job_created:
+            invalidate_options()
         
         return JsonResponse({'success': True})
         
     except Exception as e:
-        # Rollback transaction on error
-        cursor.execute("ROLLBACK")
         return JsonResponse({'error': str(e)}, status=500)
 
+def _bulk_records(request):
+    body = json.loads(request.body)
+    return body.get('records') if isinstance(body, dict) else body
+
+@require_POST
+@csrf_exempt
+@login_required
+def api_bulk_create(request, table_name):
+    """
+    Create many records in table_name from {"records": [...]} (or a bare list) in one transaction.
+    Nothing is written unless every record validates; results are reported per record.
+    """
+    records = _bulk_records(request)
+    if not records or not isinstance(records, list):
+        return JsonResponse({'error': 'No records provided.'}, status=400)
+    schema = get_table_schema(table_name)
+    field_names = [name for name in schema.field_names if name != 'id']
+    if not field_names:
+        return JsonResponse({'error': 'No fields found.'}, status=404)
+    rows, results = validate_records(schema, records)
+    if not all(result['success'] for result in results):
+        return JsonResponse({'error': 'Validation failed.', 'results': results}, status=400)
+    cursor = connection.cursor()
+    try:
+        jobs_created = 0
+        if 'job' in field_names:
+            job_ids, jobs_created = resolve_jobs(cursor, [row.get('job') for row in rows])
+            apply_job_ids(rows, job_ids)
+        with transaction.atomic():
+            insert_rows(cursor, table_name, field_names, rows)
+            adjust_row_count(table_name, len(rows))
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    note_changes(table_name, rebuild=True)
+    if jobs_created:
+        invalidate_options()
+    return JsonResponse({'success': True, 'created': len(rows), 'results': results})
+
+@require_POST
+@csrf_exempt
+@login_required
+def api_bulk_update(request, table_name):
+    """
+    Update many records in table_name by id from {"records": [{"id": ..., field: value}, ...]}.
+    Only the fields present in a record are changed; all records must validate and exist.
+    """
+    records = _bulk_records(request)
+    if not records or not isinstance(records, list):
+        return JsonResponse({'error': 'No records provided.'}, status=400)
+    schema = get_table_schema(table_name)
+    if not schema.fields:
+        return JsonResponse({'error': 'No fields found.'}, status=404)
+    rows, results = validate_records(schema, records, for_update=True)
+    cursor = connection.cursor()
+    found = existing_ids(cursor, table_name, [row['id'] for row in rows if 'id' in row])
+    for row, result in zip(rows, results):
+        if result['success'] and row['id'] not in found:
+            result.update(success=False, error='Record not found.')
+    if not all(result['success'] for result in results):
+        return JsonResponse({'error': 'Validation failed.', 'results': results}, status=400)
+    ids = [row['id'] for row in rows]
+    try:
+        jobs_created = 0
+        if 'job' in schema.by_name:
+            job_ids, jobs_created = resolve_jobs(cursor, [row.get('job') for row in rows])
+            apply_job_ids(rows, job_ids)
+        with transaction.atomic():
+            removed = snapshot_rows(cursor, table_name, ids)
+            update_rows(cursor, table_name, rows)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    note_changes(table_name, removed, snapshot_rows(cursor, table_name, ids))
+    if jobs_created:
+        invalidate_options()
+    return JsonResponse({'success': True, 'updated': len(rows), 'results': results})
+
 @require_GET
 @login_required
 def api_record(request, table_name, record_id):
     """Return a single record as a dict of field_name -> value, using search_config for the field list."""
-    cursor = connection.cursor()
-    # Get field names from search_config
-    cursor.execute("SELECT field_name FROM search_config WHERE table_name = %s ORDER BY id", [table_name])
-    fields = [row[0] for row in cursor.fetchall()]
-    if not fields:
+    schema = get_table_schema(table_name)
+    if not schema.fields:
         return JsonResponse({'error': 'No fields found.'}, status=404)
-    # Always include id for lookup
-    if 'id' not in fields:
-        fields = ['id'] + fields
-    
-    # Handle job field - join with job table to get job name
-    if 'job' in fields:
-        # Replace job field with job name from join
-        fields_with_job = []
-        for field in fields:
-            if field == 'job':
-                fields_with_job.append('j.name as job')
-            elif field == 'id':
-                fields_with_job.append('t.id')
-            else:
-                fields_with_job.append(field)
-        
-        sql = f"SELECT {', '.join(fields_with_job)} FROM {table_name} t LEFT JOIN job j ON t.job = j.id WHERE t.id = %s"
-    else:
-        sql = f"SELECT {', '.join(fields)} FROM {table_name} WHERE id = %s"
-    
-    cursor.execute(sql, [record_id])
+    # Always include id for lookup; job comes back as the job name from the join
+    fields = search_projection(schema)
+    cursor = connection.cursor()
+    execute(cursor, compile_record(table_name, fields, schema.joins_job), [record_id])
     row = cursor.fetchone()
     if not row:
         return JsonResponse({'error': 'Record not found.'}, status=404)
-    
-    # Create record dict, handling the job field specially
-    record = {}
-    for i, field in enumerate(fields):
-        if field == 'job':
-            record[field] = row[i]  # This will be the job name from the join
-        else:
-            record[field] = row[i]
-    
-    return JsonResponse(record)
+    return JsonResponse(dict(zip(fields, row)))
 
 @require_POST
 @csrf_exempt
@@ -318,44 +385,28 @@ def api_update(request, table_name, record_id):
     """Update a record in table_name by ID. Only updates fields defined in search_config."""
     try:
         data = json.loads(request.body)
-        print(f"api_update: table={table_name}, record_id={record_id}, data={data}")
     except json.JSONDecodeError as e:
-        print(f"api_update: JSON decode error: {e}")
+        logger.warning("api_update: JSON decode error: %s", e)
         return JsonResponse({'error': 'Invalid JSON data'}, status=400)
     except Exception as e:
-        print(f"api_update: Error parsing request body: {e}")
+        logger.warning("api_update: Error parsing request body: %s", e)
         return JsonResponse({'error': 'Invalid request data'}, status=400)
     
+    # Get field names from search_config
+    fields = list(get_table_schema(table_name).field_names)
+    
+    if not fields:
+        return JsonResponse({'error': 'No fields found.'}, status=404)
+    
     cursor = connection.cursor()
     
     try:
-        # Start transaction
-        cursor.execute("START TRANSACTION")
-        
-        # Handle job field specifically - create new job if it doesn't exist
+        # Handle job field specifically - get or create the job before the write transaction
+        job_created = False
         if 'job' in data and data['job']:
             job_name = data['job'].strip()
             if job_name:
-                # Check if job exists
-                cursor.execute("SELECT id FROM job WHERE name = %s", [job_name])
-                existing_job = cursor.fetchone()
-                
-                if existing_job:
-                    # Use existing job ID
-                    data['job'] = existing_job[0]
-                else:
-                    # Create new job and use its ID
-                    cursor.execute("INSERT INTO job (name) VALUES (%s)", [job_name])
-                    new_job_id = cursor.lastrowid
-                    data['job'] = new_job_id
-        
-        # Get field names from search_config
-        cursor.execute("SELECT field_name FROM search_config WHERE table_name = %s ORDER BY id", [table_name])
-        fields = [row[0] for row in cursor.fetchall()]
-        print(f"api_update: Available fields: {fields}")
-        
-        if not fields:
-            return JsonResponse({'error': 'No fields found.'}, status=404)
+                data['job'], job_created = resolve_job(cursor, job_name)
         
         # Remove 'id' from updatable fields
         updatable_fields = [f for f in fields if f != 'id']
@@ -367,27 +418,23 @@ def api_update(request, table_name, record_id):
                 set_clauses.append(f"{field} = %s")
                 values.append(data[field] if data[field] != '' else None)
         
-        print(f"api_update: Set clauses: {set_clauses}")
-        print(f"api_update: Values: {values}")
-        
         if not set_clauses:
             return JsonResponse({'error': 'No fields to update.'}, status=400)
         
         values.append(record_id)
         sql = f"UPDATE {table_name} SET {', '.join(set_clauses)} WHERE id = %s"
-        print(f"api_update: SQL: {sql}")
         
-        cursor.execute(sql, values)
-        
-        # Commit transaction
-        cursor.execute("COMMIT")
+        with transaction.atomic():
+            removed = snapshot_rows(cursor, table_name, [record_id])
+            cursor.execute(sql, values)
+        note_changes(table_name, removed, snapshot_rows(cursor, table_name, [record_id]))
+        if job_created:
+            invalidate_options()
         
         return JsonResponse({'success': True})
         
     except Exception as e:
-        # Rollback transaction on error
-        cursor.execute("ROLLBACK")
-        print(f"api_update: Database error: {e}")
+        logger.exception("api_update: Database error on %s id %s", table_name, record_id)
         return JsonResponse({'error': str(e)}, status=500)
 
 @require_POST
@@ -400,146 +447,207 @@ def api_delete(request, table_name):
     if not ids or not isinstance(ids, list):
         return JsonResponse({'error': 'No IDs provided.'}, status=400)
     cursor = connection.cursor()
-    # Use parameterized query for safety
-    placeholders = ','.join(['%s'] * len(ids))
-    sql = f"DELETE FROM {table_name} WHERE id IN ({placeholders})"
-    cursor.execute(sql, ids)
+    try:
+        with transaction.atomic():
+            removed = snapshot_rows(cursor, table_name, ids)
+            # Use parameterized query for safety, in bounded IN lists
+            for batch in chunked(ids, mutation_chunk_size()):
+                placeholders = ','.join(['%s'] * len(batch))
+                sql = f"DELETE FROM {table_name} WHERE id IN ({placeholders})"
+                cursor.execute(sql, batch)
+                adjust_row_count(table_name, -cursor.rowcount)
+        note_changes(table_name, removed)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
     return JsonResponse({'success': True, 'deleted': ids})
 
-@require_GET
+def _mutate_matching(request, table_name, action):
+    schema = get_table_schema(table_name)
+    if not schema.fields:
+        return JsonResponse({'error': 'No fields found.'}, status=404)
+    body = json.loads(request.body)
+    assignments = None
+    if action == 'update':
+        assignments, error = validate_assignments(schema, body.pop('set', None))
+        if error:
+            return JsonResponse({'error': error}, status=400)
+    match_all = body.pop('all', False) is True
+    try:
+        filter_shape, params = compile_filters(schema, body)
+    except QueryError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if not filter_shape and not match_all:
+        return JsonResponse({'error': 'No filters given; send "all": true to change every row.'}, status=400)
+    cursor = connection.cursor()
+    job_created = False
+    if assignments and isinstance(assignments.get('job'), str):
+        assignments['job'], job_created = resolve_job(cursor, assignments['job'])
+    total, approximate = filtered_count(cursor, table_name, schema.joins_job, filter_shape, params)
+
+    def progress():
+        yield json.dumps({'total': total, 'approximate': approximate}) + '\n'
+        last = {'processed': 0, 'affected': 0}
+        try:
+            for step in run_mutation(cursor, table_name, schema.joins_job, filter_shape, params, action, assignments):
+                last = step
+                yield json.dumps(step) + '\n'
+        except Exception as e:
+            last = {**last, 'error': str(e)}
+        finally:
+            note_changes(table_name, rebuild=True)
+            if job_created:
+                invalidate_options()
+        yield json.dumps({'done': 'error' not in last, **last}) + '\n'
+
+    return StreamingHttpResponse(aio.stream_content(request, progress()), content_type='application/x-ndjson')
+
+@require_POST
+@csrf_exempt
 @login_required
-def api_gsearch(request, table_name, field_name):
-    print(f"api_gsearch: {table_name}, {field_name}")
+def api_delete_matching(request, table_name):
+    """
+    Delete every row matching the api_search filter JSON, in primary-key chunks.
+    Streams NDJSON progress: {"total"}, then {"processed", "affected"} per chunk, then {"done"}.
+    """
+    return _mutate_matching(request, table_name, 'delete')
+
+@require_POST
+@csrf_exempt
+@login_required
+def api_update_matching(request, table_name):
+    """Set fields ({"set": {field: value}}) on every row matching the api_search filter JSON, in chunks."""
+    return _mutate_matching(request, table_name, 'update')
+
+@aio.require_GET
+@aio.login_required
+@replica_reads
+async def api_gsearch(request, table_name, field_name):
     """Return autocomplete suggestions for GSearch operator as JSON."""
     q = request.GET.get('q', '').strip()
-    cursor = connection.cursor()
-    # Only allow alphanumeric/underscore field names for safety
-    if not field_name.replace('_', '').isalnum():
+    schema = await aio.run_db(get_table_schema, table_name)
+    # Only configured fields can be indexed
+    if field_name not in schema.by_name:
         return JsonResponse({'options': []})
-    # Build SQL
-    sql = f"SELECT DISTINCT {field_name} FROM {table_name}"
-    params = []
-    if q:
-        sql += f" WHERE {field_name} LIKE %s"
-        params.append(f"%{q}%")
-    sql += f" ORDER BY {field_name} LIMIT 20"
-    cursor.execute(sql, params)
-    options = [{'text': row[0]} for row in cursor.fetchall() if row[0] is not None]
+    # Served from the worker's in-memory index (prefix matches first, then by frequency);
+    # building a missing index reads the table, and fields too large to index use a LIKE query
+    values = await aio.run_db(suggest, table_name, field_name, q)
+    options = [{'text': value} for value in values]
     return JsonResponse({'options': options})
 
-@require_POST
-@csrf_exempt
-@login_required
-def api_search(request, table_name):
-    """Return filtered grid data based on search filters and sort."""
+@aio.require_POST
+@aio.csrf_exempt
+@aio.login_required
+@replica_reads
+async def api_search(request, table_name):
+    """
+    Return filtered grid data based on search filters and sort.
+    The page (or full result) and the total are queried concurrently on separate connections.
+    """
     filters = json.loads(request.body)
-    cursor = connection.cursor()
+    schema = await aio.run_db(get_table_schema, table_name)
     # Get columns config
-    cursor.execute("SELECT field_label, field_name, field_type FROM search_config WHERE table_name = %s ORDER BY id", [table_name])
-    columns = [(row[0], row[1], row[2]) for row in cursor.fetchall()]
-    select_fields = [col[1] for col in columns]
-    # Build WHERE clause
-    where_clauses = []
-    params = []
-    operator_map = {
-        'equal': '=',
-        'contains': 'LIKE',
-        'greater': '>',
-        'less': '<',
-        'GSearch': 'LIKE',
-        'not_equal': '!=',
-        'not_contains': 'NOT LIKE',
-        # Add more mappings as needed
-    }
-    for field, cond in filters.items():
-        if field == 'sort':
-            continue  # skip sort key
-        op = cond.get('operator')
-        val = cond.get('value')
-        sql_op = operator_map.get(op, op)  # fallback to op if not mapped
-        if op in ('contains', 'GSearch'):
-            where_clauses.append(f"{field} {sql_op} %s")
-            params.append(f"%{val}%")
-        elif op == 'not_contains':
-            where_clauses.append(f"{field} {sql_op} %s")
-            params.append(f"%{val}%")
-        elif op in ('equal', 'greater', 'less', 'not_equal'):
-            where_clauses.append(f"{field} {sql_op} %s")
-            params.append(val)
-        elif op == 'IN':
-            if isinstance(val, list):
-                placeholders = ','.join(['%s'] * len(val))
-                where_clauses.append(f"{field} IN ({placeholders})")
-                params.extend(val)
-        # Add more operators as needed
-    where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ''
-    select_fields = ['id'] + select_fields
-    # --- Handle sort array ---
-    sort = filters.get('sort', [])
-    valid_field_names = set(col[1] for col in columns)
-    order_by_clauses = []
-    if isinstance(sort, list):
-        for s in sort:
-            field = s.get('field')
-            direction = s.get('direction', '').lower()
-            if field in valid_field_names and direction in ('asc', 'desc'):
-                order_by_clauses.append(f"{field} {direction.upper()}")
-    if not order_by_clauses:
-        order_by_clauses = ['id DESC']
-    order_by_sql = 'ORDER BY ' + ', '.join(order_by_clauses)
-    
-    # Handle job field - join with job table to get job name
-    if 'job' in select_fields:
-        # Replace job field with job name from join
-        select_fields_with_job = []
-        for field in select_fields:
-            if field == 'job':
-                select_fields_with_job.append('j.name as job')
-            elif field == 'id':
-                select_fields_with_job.append('t.id')
-            else:
-                select_fields_with_job.append(field)
-        
-        # Update WHERE clauses to use table alias
-        where_clauses_with_alias = []
-        for clause in where_clauses:
-            # Only replace exact field name matches, not partial matches
-            if clause.startswith('job ') or ' job ' in clause or clause.endswith(' job'):
-                # Replace job field references with table alias
-                clause = clause.replace(' job ', ' j.name ').replace('job ', 'j.name ').replace(' job', ' j.name')
-            where_clauses_with_alias.append(clause)
-        
-        where_sql = f"WHERE {' AND '.join(where_clauses_with_alias)}" if where_clauses_with_alias else ''
-        sql = f"SELECT {', '.join(select_fields_with_job)} FROM {table_name} t LEFT JOIN job j ON t.job = j.id {where_sql} {order_by_sql}"
-    else:
-        sql = f"SELECT {', '.join(select_fields)} FROM {table_name} {where_sql} {order_by_sql}"
-    
-    print(f"sql: {sql}")
-    cursor.execute(sql, params)
+    columns = [(f.label, f.name, f.type) for f in schema.fields]
+    select_fields = search_projection(schema)
+    try:
+        filter_shape, params = compile_filters(schema, filters)
+    except QueryError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    sort_keys = compile_sort(schema, filters.get('sort', []))
+    record_search(table_name, schema, filter_shape, sort_keys)
+
+    def count():
+        return aio.run_query(filtered_count, table_name, schema.joins_job, filter_shape, params, filters.get('count'))
     
-    # Handle field mapping correctly when we have aliases
-    data = []
-    for row in cursor.fetchall():
-        row_dict = {}
-        for i, field in enumerate(select_fields):
-            if field == 'job' and 'j.name as job' in sql:
-                # The job field comes from the alias
-                row_dict[field] = row[i]
-            else:
-                row_dict[field] = row[i]
-        data.append(row_dict)
+    # Paginated mode: keyset (seek) pages over the sort keys plus id as tie-breaker
+    if 'page_size' in filters or 'cursor' in filters:
+        page_size = clamp_page_size(filters.get('page_size'))
+        queries = [aio.run_query(
+            fetch_page, table_name, select_fields, schema.joins_job, filter_shape, params,
+            keyset_keys(sort_keys), page_size, filters.get('cursor'), as_dicts=False
+        )]
+        # Only the first page pays for the total; later pages keep the client's value
+        if not filters.get('cursor'):
+            queries.append(count())
+        try:
+            results = await aio.gather(*queries)
+        except CursorError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        rows, next_cursor, prev_cursor = results[0]
+        total_count, approximate = results[1] if len(results) > 1 else (None, False)
+        return grid_response(request, {
+            'columns': columns,
+            'total_count': total_count,
+            'approximate': approximate,
+            'page_size': page_size,
+            'next': next_cursor,
+            'prev': prev_cursor,
+        }, select_fields, rows)
     
-    # Get total count
-    if 'job' in select_fields:
-        count_sql = f"SELECT COUNT(*) FROM {table_name} t LEFT JOIN job j ON t.job = j.id {where_sql}"
+    sql, _ = compile_select(table_name, select_fields, schema.joins_job, filter_shape, sort_keys)
+    # Total count: maintained counter when unfiltered, possibly an estimate when filtered
+    rows, (total_count, approximate) = await aio.gather(aio.run_query(fetch_all, sql, params), count())
+    return grid_response(
+        request, {'columns': columns, 'total_count': total_count, 'approximate': approximate}, select_fields, rows
+    )
+
+@require_POST
+@csrf_exempt
+@login_required
+@replica_reads
+def api_count(request, table_name):
+    """Return the exact number of rows matching the same filter JSON api_search accepts."""
+    filters = json.loads(request.body)
+    schema = get_table_schema(table_name)
+    try:
+        filter_shape, params = compile_filters(schema, filters)
+    except QueryError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if not filter_shape:
+        return JsonResponse({'total_count': table_row_count(table_name), 'approximate': False})
+    cursor = read_connection().cursor()
+    total_count = exact_count(cursor, table_name, schema.joins_job, filter_shape, params)
+    return JsonResponse({'total_count': total_count, 'approximate': False})
+
+@require_POST
+@csrf_exempt
+@login_required
+@replica_reads
+def api_export(request, table_name):
+    """
+    Stream every row matching the api_search filter/sort JSON as CSV or NDJSON.
+    Accepts a JSON body, or a form post with the JSON in a "payload" field so the
+    browser can download the file natively.
+    """
+    body = json.loads(request.POST.get('payload') or request.body)
+    # Export options are not field filters
+    fmt = body.pop('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({'error': f"Unsupported format: {fmt}"}, status=400)
+    schema = get_table_schema(table_name)
+    columns = export_columns(request, schema, body)
+    body.pop('columns', None)
+    body.pop('layout_id', None)
+    try:
+        filter_shape, params = compile_filters(schema, body)
+    except QueryError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    sort_keys = compile_sort(schema, body.get('sort', []), default=(('id', 'asc'),))
+    chunks = iter_row_chunks(
+        table_name, columns, schema.joins_job, filter_shape, params, sort_keys, using=read_alias()
+    )
+    if fmt == 'csv':
+        labels = {f.name: f.label for f in schema.fields}
+        content = stream_csv(chunks, columns, labels)
     else:
-        count_sql = f"SELECT COUNT(*) FROM {table_name} {where_sql}"
-    cursor.execute(count_sql, params)
-    total_count = cursor.fetchone()[0]
-    return JsonResponse({'columns': columns, 'data': data, 'total_count': total_count})
+        content = stream_ndjson(chunks, columns)
+    response = StreamingHttpResponse(aio.stream_content(request, content), content_type=EXPORT_FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{table_name}.{fmt}"'
+    return response
 
 @require_GET
 @login_required
+@user_data_cache_control
+@condition(etag_func=search_patterns_etag, last_modified_func=search_patterns_last_modified)
 def api_search_patterns(request, table_name):
     """Get all search patterns for the current user and table."""
     try:
@@ -622,78 +730,35 @@ def api_delete_search_pattern(request, table_name):
 
 @require_GET
 @login_required
+@replica_reads
 def api_reset_grid(request, table_name):
     """Reset grid to original data without any filters."""
-    cursor = connection.cursor()
+    cursor = read_connection().cursor()
     
-    # Get form config to determine which fields to select
-    form_cursor = connection.cursor()
-    form_cursor.execute("SELECT * FROM forms WHERE tableview = %s", [table_name])
-    form_row = form_cursor.fetchone()
-    if not form_row:
+    # Get form and column config to determine which fields to select
+    view = get_grid_view(table_name)
+    if not view:
         return JsonResponse({'error': 'Form not found.'}, status=404)
     
-    select_fields_raw = [f.strip() for f in form_row[2].split(',')]
-    
-    # Get column config
-    cursor.execute("SELECT field_label, field_name FROM search_config WHERE table_name = %s", [table_name])
-    columns_config = cursor.fetchall()
-    
-    # Build select_fields and columns in the order of select_fields_raw, using field_name for SQL and field_label for header
-    select_fields = []
-    columns = []
-    for field in select_fields_raw:
-        if field.lower() == 'id':
-            continue
-        for label, name in columns_config:
-            if name == field:
-                select_fields.append(name)
-                columns.append((label, name))
-                break
+    # columns: (field_label, field_name) in the order of the form's field list
+    columns = list(view.columns)
     
     # Always keep ID in the SQL query for backend use
-    sql_fields = [f.strip() for f in form_row[2].split(',')]
-    
-    # Handle job field - join with job table to get job name
-    if 'job' in sql_fields:
-        select_fields_with_job = []
-        for field in sql_fields:
-            if field == 'job':
-                select_fields_with_job.append('j.name as job')
-            elif field == 'id':
-                select_fields_with_job.append('t.id')
-            else:
-                select_fields_with_job.append(field)
-        
-        sql = f"SELECT {', '.join(select_fields_with_job)} FROM {table_name} t LEFT JOIN job j ON t.job = j.id"
-    else:
-        sql = f"SELECT {', '.join(sql_fields)} FROM {table_name}"
+    sql_fields = view.projection
     
-    cursor.execute(sql)
-    raw_data = cursor.fetchall()
+    sql, _ = compile_select(table_name, sql_fields, view.joins_job)
+    execute(cursor, sql)
+    rows = cursor.fetchall()
     
-    # Build data list
-    data = []
-    for row in raw_data:
-        row_dict = {}
-        for i, field in enumerate(sql_fields):
-            if field == 'job' and 'j.name as job' in sql:
-                row_dict[field] = row[i]
-            else:
-                row_dict[field] = row[i]
-        data.append(row_dict)
+    total_count = table_row_count(table_name)
     
-    total_count = len(data)
-    
-    return JsonResponse({
-        'columns': columns,
-        'data': data,
-        'total_count': total_count
-    })
+    return grid_response(request, {'columns': columns, 'total_count': total_count}, sql_fields, rows)
 
 @csrf_exempt
 @require_http_methods(["GET"])
 @login_required
+@user_data_cache_control
+@condition(etag_func=grid_layouts_etag, last_modified_func=grid_layouts_last_modified)
 def api_grid_layouts(request, table_name):
     """Get all layouts for the current user and table"""
     try:
@@ -762,6 +827,8 @@ def api_save_grid_layout(request, table_name):
 @csrf_exempt
 @require_http_methods(["GET"])
 @login_required
+@user_data_cache_control
+@condition(etag_func=grid_layout_etag, last_modified_func=grid_layout_last_modified)
 def api_load_grid_layout(request, table_name, layout_id):
     """Load a specific grid layout"""
     try:
@@ -824,6 +891,8 @@ def api_set_default_layout(request, table_name, layout_id):
 @csrf_exempt
 @require_http_methods(["GET"])
 @login_required
+@user_data_cache_control
+@condition(etag_func=tab_layouts_etag, last_modified_func=tab_layouts_last_modified)
 def api_tab_layouts(request):
     """Get all tab layouts for the current user"""
     try:
@@ -0,0 +1,104 @@
+"""
+Content negotiation for grid result payloads (api_search, api_reset_grid).
+
+Rows come straight from cursor tuples. The default `application/json` keeps the original
+shape (one {field: value} object per row); clients that send a more specific Accept get
+the rows without repeated keys:
+
+    application/vnd.grid.rows+json      "fields": [...], "data": [[v, v, ...], ...]
+    application/vnd.grid.columnar+json  "fields": [...], "data": [[column values], ...]
+    application/msgpack                 rows shape, MessagePack-encoded
+
+JSON is encoded with orjson when it is installed; MessagePack needs the msgpack package
+and is simply not offered without it.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+
+JSON = 'application/json'
+ROWS_JSON = 'application/vnd.grid.rows+json'
+COLUMNAR_JSON = 'application/vnd.grid.columnar+json'
+MSGPACK = 'application/msgpack'
+
+_ALIASES = {'application/x-msgpack': MSGPACK}
+
+_encoder = DjangoJSONEncoder()
+
+
+def _default(value):
+    # Decimals, dates and anything else the fast encoders do not know, as Django would encode them
+    return _encoder.default(value)
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+
+def available_formats():
+    formats = [JSON, ROWS_JSON, COLUMNAR_JSON]
+    if _msgpack() is not None:
+        formats.append(MSGPACK)
+    return formats
+
+
+def preferred_format(request):
+    """The supported media type the Accept header ranks highest; JSON when nothing matches."""
+    header = request.headers.get('Accept', '')
+    available = available_formats()
+    best, best_q = JSON, -1.0
+    for position, part in enumerate(header.split(',')):
+        media, _, params = part.strip().partition(';')
+        media = _ALIASES.get(media.strip().lower(), media.strip().lower())
+        if media not in available:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        # Ties go to the first listed type
+        if q > best_q and q > 0:
+            best, best_q = media, q
+    return best
+
+
+def dumps_json(payload):
+    try:
+        import orjson
+    except ImportError:
+        return json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+    return orjson.dumps(payload, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+def grid_response(request, payload, fields, rows):
+    """
+    Respond with payload plus the rows (tuples in fields order) in the negotiated format.
+    The original JSON shape adds rows as dicts under 'data'; the others add 'fields' too.
+    """
+    media_type = preferred_format(request)
+    if media_type == JSON:
+        payload['data'] = [dict(zip(fields, row)) for row in rows]
+        response = JsonResponse(payload)
+    else:
+        payload['fields'] = list(fields)
+        if media_type == COLUMNAR_JSON:
+            payload['data'] = [list(column) for column in zip(*rows)] if rows else [[] for _ in fields]
+        else:
+            payload['data'] = rows
+        if media_type == MSGPACK:
+            body = _msgpack().packb(payload, default=_default, use_bin_type=True)
+        else:
+            body = dumps_json(payload)
+        response = HttpResponse(body, content_type=media_type)
+    patch_vary_headers(response, ('Accept',))
+    return response
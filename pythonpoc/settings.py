@@ -51,11 +51,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.routing.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -86,15 +89,53 @@ WSGI_APPLICATION = 'pythonpoc.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        # MySQL with a per-process connection pool (core/backends/mysql_pool)
+        'ENGINE': 'core.backends.mysql_pool',
         'NAME': 'pythonpoc',
         'USER': 'root',
         'PASSWORD': '',
         'HOST': 'localhost',
         'PORT': '3306',
-    }
+        # Keep at 0: connections go back to the pool at the end of each request
+        'CONN_MAX_AGE': 0,
+        # processes x MAX_SIZE must stay below MySQL's max_connections; MAX_SIZE should cover
+        # GRID_DB_THREADS plus the server's request threads. Times are in seconds.
+        'POOL': {
+            'MAX_SIZE': 20,
+            'TIMEOUT': 10,
+            'MAX_LIFETIME': 1800,
+            'IDLE_TIMEOUT': 300,
+            'PRE_PING': True,
+        },
+    },
+    # Read replicas are further entries named in GRID_READ_REPLICAS, e.g.
+    # 'replica1': {**<the default entry>, 'HOST': 'replica1.internal'},
 }
 
+# Read-only grid views read from a random replica alias; writes and everything else use
+# 'default' (core/routing.py). After a write the user stays on 'default' for
+# GRID_PRIMARY_STICKY_SECONDS so they read their own changes.
+DATABASE_ROUTERS = ['core.routing.ReplicaRouter']
+GRID_READ_REPLICAS = []
+GRID_PRIMARY_STICKY_SECONDS = 5
+
+# The config, job, options and menu version stamps must be seen by every worker, so the
+# cache is shared: a table in the primary database (created by migration 0014, or by
+# `manage.py createcachetable`). Redis or Memcached work as well, e.g.
+# {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379'}.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'grid_cache',
+        # Role ids and shell fragments are cached per user; the default of 300 entries would
+        # keep culling them
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+# Workers re-read those version stamps from the cache at most this often (seconds), so a
+# config or menu change reaches the other workers within this delay
+GRID_VERSION_CHECK_INTERVAL = 1.0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -133,6 +174,14 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # Hashed names for collectstatic / build_assets; {% static %} stays unhashed while DEBUG
+    # and for files that were never collected (core/storage.py)
+    'staticfiles': {'BACKEND': 'core.storage.GridStaticFilesStorage'},
+}
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
@@ -143,3 +192,93 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
+
+# Dynamic grid paging: rows per keyset page and the largest page a client may request
+GRID_PAGE_SIZE = 100
+GRID_MAX_PAGE_SIZE = 1000
+
+# Grid SQL: compiled statement shapes kept per worker
+GRID_SQL_CACHE_SIZE = 256
+
+# Grid totals: 'estimate' returns optimizer estimates (flagged approximate) for filtered
+# searches estimated at GRID_EXACT_COUNT_THRESHOLD rows or more; 'exact' always counts
+GRID_COUNT_MODE = 'estimate'
+GRID_EXACT_COUNT_THRESHOLD = 10000
+
+# Rows fetched per round trip when streaming grid exports
+GRID_EXPORT_CHUNK_SIZE = 2000
+
+# Approximate memory (bytes) the in-memory GSearch autocomplete indexes may use per worker
+GRID_SUGGEST_MEMORY_BUDGET = 32 * 1024 * 1024
+
+# Shortest word a full-text filter may use (match innodb_ft_min_token_size); shorter
+# values fall back to LIKE
+GRID_FULLTEXT_MIN_TOKEN = 3
+
+# Dropdown options: seconds a lookup_sql result stays cached, and options per page for ?page=
+GRID_OPTIONS_TTL = 300
+GRID_OPTIONS_PAGE_SIZE = 50
+
+# Seconds browsers may reuse config-derived API responses (fields, options) before revalidating
+GRID_CONFIG_MAX_AGE = 60
+
+# Rows per executemany() batch in the bulk create/update endpoints
+GRID_BULK_CHUNK_SIZE = 500
+
+# Job names each worker keeps resolved to ids (the cache is cleared when it fills up)
+GRID_JOB_CACHE_SIZE = 10000
+
+# Rows changed per committed chunk by the filter-based delete/update endpoints
+GRID_MUTATION_CHUNK_SIZE = 1000
+
+# Seconds the menu trees, users' role ids and rendered page shell fragments (sidebar per role
+# set, top bar per user) stay cached
+GRID_SHELL_CACHE_TTL = 3600
+
+# Avatar thumbnails: square sizes (px) written on upload, the JPEG master's size, encoder
+# quality, and how long browsers may cache the content-addressed files
+GRID_AVATAR_SIZES = (32, 64, 80, 160)
+GRID_AVATAR_MASTER_SIZE = 512
+GRID_AVATAR_QUALITY = 82
+GRID_AVATAR_MAX_AGE = 365 * 24 * 60 * 60
+
+# Grid front end: load the core/dist bundles built by `manage.py build_assets` (the source
+# modules otherwise), and how long browsers may cache hashed static files
+GRID_STATIC_BUNDLES = not DEBUG
+GRID_STATIC_MAX_AGE = 365 * 24 * 60 * 60
+
+# API response compression (zstd / br / gzip by Accept-Encoding): path prefixes it applies
+# to, smallest non-streaming body worth compressing, and per-encoding levels
+GRID_COMPRESSION_PATHS = ('/api/',)
+GRID_COMPRESSION_MIN_SIZE = 1024
+GRID_COMPRESSION_LEVELS = {'zstd': 10, 'br': 6, 'gzip': 6}
+
+# Threads the async grid endpoints run database work on (core.aio); also the most
+# connections those endpoints hold open per process
+GRID_DB_THREADS = 16
+
+# Prometheus metrics at /metrics (core/metrics.py). Worker processes share their numbers
+# through files in GRID_METRICS_DIR (None: each process reports only its own); empty it on
+# deploy. Scrapes are allowed with "Authorization: Bearer <GRID_METRICS_TOKEN>", from
+# GRID_METRICS_ALLOWED_IPS and for staff users. Behind a reverse proxy on the same host every
+# request comes from 127.0.0.1, so only list addresses the proxy cannot forward from.
+GRID_METRICS_DIR = None   # e.g. '/run/pythonpoc-metrics'
+GRID_METRICS_FLUSH_INTERVAL = 1.0
+GRID_METRICS_TOKEN = None
+GRID_METRICS_ALLOWED_IPS = ()
+
+# Slow-query log (core/slowlog.py), off while GRID_SLOW_QUERY_MS is None. Request statements
+# taking at least that many ms are sampled at GRID_SLOW_QUERY_SAMPLE_RATE and kept as
+# SlowQuery rows (admin) for GRID_SLOW_QUERY_KEEP_DAYS, with a plan from a background EXPLAIN
+# ('analyze' runs the SELECT again under EXPLAIN ANALYZE; None skips it). Parameters are
+# stored as type names unless GRID_SLOW_QUERY_REDACT_PARAMS is False.
+GRID_SLOW_QUERY_MS = None   # e.g. 500
+GRID_SLOW_QUERY_SAMPLE_RATE = 1.0
+GRID_SLOW_QUERY_EXPLAIN = 'plan'
+GRID_SLOW_QUERY_REDACT_PARAMS = True
+GRID_SLOW_QUERY_QUEUE = 100
+GRID_SLOW_QUERY_KEEP_DAYS = 14
+
+# Seconds between writes of each worker's api_search filter / sort shape counts to
+# SearchShapeStat, read by `manage.py advise_indexes` (None: don't count)
+GRID_SEARCH_STATS_FLUSH_INTERVAL = 60
@@ -0,0 +1,22 @@
+"""
+Settings for the benchmarks (core/benchmarks) on a local SQLite database.
+
+DEBUG is off so Django keeps no query log and timings match production more closely.
+Static files keep their source names, so pages render without a collectstatic run.
+"""
+from .settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['localhost', '127.0.0.1']
+
+STORAGES = {
+    **STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'bench.sqlite3',
+    }
+}
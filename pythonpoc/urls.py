@@ -15,11 +15,13 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path
+from django.urls import path, re_path
 from django.contrib.auth import views as auth_views
-from core.views import register, custom_login, profile, home, about, contact, dynamic_grid
+from core.views import register, custom_login, profile, home, about, contact, dynamic_grid, avatar_file, static_asset
+from core.views import prometheus_metrics
 from core.views import api_fields, api_options, api_create, api_record, api_update 
-from core.views import api_delete, api_gsearch, api_search
+from core.views import api_bulk_create, api_bulk_update, api_delete_matching, api_update_matching
+from core.views import api_delete, api_gsearch, api_search, api_count, api_export
 from core.views import api_search_patterns, api_save_search_pattern, api_delete_search_pattern, api_reset_grid
 from core.views import api_grid_layouts, api_save_grid_layout, api_load_grid_layout, api_delete_grid_layout, api_set_default_layout
 from core.views import api_tab_layouts, api_save_tab_layout, api_load_tab_layout, api_delete_tab_layout, api_set_default_tab_layout
@@ -40,9 +42,15 @@ urlpatterns = [
     path('api/create/<str:table_name>/', api_create, name='api_create'),
     path('api/record/<str:table_name>/<int:record_id>/', api_record, name='api_record'),
     path('api/update/<str:table_name>/<int:record_id>/', api_update, name='api_update'),
+    path('api/bulk-create/<str:table_name>/', api_bulk_create, name='api_bulk_create'),
+    path('api/bulk-update/<str:table_name>/', api_bulk_update, name='api_bulk_update'),
     path('api/delete/<str:table_name>/', api_delete, name='api_delete'),
+    path('api/delete-matching/<str:table_name>/', api_delete_matching, name='api_delete_matching'),
+    path('api/update-matching/<str:table_name>/', api_update_matching, name='api_update_matching'),
     path('api/gsearch/<str:table_name>/<str:field_name>/', api_gsearch, name='api_gsearch'),
     path('api/search/<str:table_name>/', api_search, name='api_search'),
+    path('api/count/<str:table_name>/', api_count, name='api_count'),
+    path('api/export/<str:table_name>/', api_export, name='api_export'),
     path('api/search-patterns/<str:table_name>/', api_search_patterns, name='api_search_patterns'),
     path('api/search-patterns/<str:table_name>/save/', api_save_search_pattern, name='api_save_search_pattern'),
     path('api/search-patterns/<str:table_name>/<int:pattern_id>/delete/', api_delete_search_pattern, name='api_delete_search_pattern'),
@@ -58,4 +66,10 @@ urlpatterns = [
     path('api/tab-layouts/<int:layout_id>/delete/', api_delete_tab_layout, name='api_delete_tab_layout'),
     path('api/tab-layouts/<int:layout_id>/set-default/', api_set_default_tab_layout, name='api_set_default_tab_layout'),
     path('dynamic-grid/<str:form_name>/', dynamic_grid, name='dynamic_grid'),
+    # Prometheus scrape endpoint (token, allowed IPs or staff only)
+    path('metrics', prometheus_metrics, name='prometheus_metrics'),
+    # Built static files with precompressed variants (runserver serves /static/ itself when DEBUG)
+    re_path(rf"^{settings.STATIC_URL.lstrip('/')}(?P<path>.+)$", static_asset, name='static_asset'),
+    # Normalized (content-addressed) avatars; other media falls through to static() below
+    re_path(rf"^{settings.MEDIA_URL.lstrip('/')}avatars/(?P<name>[0-9a-f]{{20}}(-[0-9]+)?\.(jpg|webp))$", avatar_file, name='avatar_file'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)